@@ -0,0 +1,9 @@
+"""
+Бенчмарки горячих путей: симуляция, хранение, снимки, отрисовка.
+Время в baseline хранится в долях эталонного цикла, замеренного рядом
+с каждым замером, поэтому один baseline годится для разных машин.
+
+    python -m benchmarks                   # прогон и сравнение с baseline.json
+    python -m benchmarks --save-baseline   # дописать новые замеры в baseline
+    python -m benchmarks --save-baseline --update 'save_users*'   # перезаписать выбранные
+"""
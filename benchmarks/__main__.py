@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+from . import bench_render, bench_simulation, bench_snapshot, bench_storage
+from .harness import (
+    BASELINE_FILE, compare, format_report, load_baseline, measure_reference, save_baseline,
+)
+
+
+GROUPS = {
+    'simulation': bench_simulation,
+    'storage': bench_storage,
+    'snapshot': bench_snapshot,
+    'render': bench_render,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('groups', nargs='*', choices=[[], *GROUPS], default=[],
+                        help='groups to run (default: all)')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='add benchmarks missing from the baseline')
+    parser.add_argument('--update', action='append', default=[], metavar='PATTERN',
+                        help='with --save-baseline: re-record entries matching PATTERN')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown before a timing counts as a regression')
+    args = parser.parse_args(argv)
+
+    # Эталон всего прогона для замеров без своего (см. harness.measure):
+    # до и после замеров, берётся меньшее время
+    reference = measure_reference()
+    results = []
+    for name in args.groups or GROUPS:
+        print(f"running {name}...", file=sys.stderr)
+        results.extend(GROUPS[name].run())
+    reference = min(reference, measure_reference())
+
+    if args.save_baseline:
+        save_baseline(results, reference, args.baseline, args.update)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    rows, regressions = compare(results, load_baseline(args.baseline), args.threshold,
+                                reference)
+    print(format_report(rows))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Отрисовка PlanetWidget и обновление экрана игры в безоконном Kivy.
+
+Kivy запускается в отдельном процессе: без дисплея окно создаётся через
+SDL offscreen. Если Kivy нет или окно получить нельзя, процесс выходит с
+кодом NO_WINDOW и группа помечается пропущенной; любая другая ошибка
+процесса - это падение замеров.
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+from .harness import Result
+
+
+FRAMES = 300
+COUNTED_FRAMES = 30
+# Оборот планеты при 10 градусах в секунду и 30 кадрах
+WARMUP_FRAMES = 360 * 3 + 1
+
+# Код выхода дочернего процесса, когда отрисовывать некуда
+NO_WINDOW = 77
+
+
+def walk(instructions):
+    for instruction in instructions:
+        yield instruction
+        children = getattr(instruction, 'children', None)
+        if children:
+            yield from walk(children)
+
+
+def child_main():
+    import time
+    
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    # Пропуск только при явной невозможности: нет Kivy или нет окна.
+    # Ошибки в main.py дальше должны ронять замеры
+    if importlib.util.find_spec('kivy') is None:
+        print("Kivy is not installed", file=sys.stderr)
+        sys.exit(NO_WINDOW)
+    from kivy.core.window import Window
+    if Window is None:
+        print("no Kivy window provider could create a window", file=sys.stderr)
+        sys.exit(NO_WINDOW)
+    import main
+    from pocket_universe import Planet
+    
+    results = {}
+    for label, water, oxygen, biomass, shield, stars in [
+            ('barren', 10, 5, 0, 0, 50),
+            ('lush', 90, 60, 90, 1, 50),
+            ('lush, 2000 stars', 90, 60, 90, 1, 2000)]:
+        planet = Planet('Bench', 'terra', seed=1)
+        planet.water, planet.oxygen, planet.biomass, planet.shield = water, oxygen, biomass, shield
+        widget = main.PlanetWidget(planet=planet, stars=stars)
+        widget.size = (400, 400)
+        # Полный оборот: все кадры тела планеты уже в кэше текстур
+        for _ in range(WARMUP_FRAMES):
+            widget.animate(1 / 30)
+        
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            widget.animate(1 / 30)
+        elapsed = time.perf_counter() - start
+        
+        allocated = 0
+        for _ in range(COUNTED_FRAMES):
+            # Старые инструкции держим живыми, чтобы их id не достались новым
+            previous = list(walk(widget.canvas.children))
+            before = {id(i) for i in previous}
+            widget.animate(1 / 30)
+            allocated += sum(1 for i in walk(widget.canvas.children) if id(i) not in before)
+            del previous
+        
+        results[f"redraw[{label}]"] = (elapsed / FRAMES * 1e6, 'us')
+        results[f"redraw_instructions[{label}]"] = (
+            sum(1 for _ in walk(widget.canvas.children)), 'count')
+        results[f"redraw_allocations_per_frame[{label}]"] = (allocated / COUNTED_FRAMES, 'count')
+        
+        # Промах кэша: отрисовка одного кадра тела планеты в Fbo
+        state = main.planet_body_state(planet)
+        radius = main.render_radius(120)
+        start = time.perf_counter()
+        for frame in range(FRAMES // 10):
+            main.render_planet_body(state, frame, radius)
+        results[f"planet_body_render[{label}]"] = (
+            (time.perf_counter() - start) / (FRAMES // 10) * 1e6, 'us')
+    
+    results.update(game_screen_results(main))
+    print(json.dumps(results))
+
+
+def game_screen_results(main):
+    # Сколько текстур Label пересоздаётся за тик игры на экране и в фоне
+    import tempfile
+    import time
+    from kivy.clock import Clock
+    from kivy.uix.label import Label
+    from kivy.uix.screenmanager import ScreenManager, Screen
+    from pocket_universe import DataManager, Planet
+    
+    app = main.PocketUniverseApp()
+    app.data_manager = DataManager(tempfile.mkdtemp(), save_delay=0)
+    app.data_manager.register('bench', '1234')
+    app.data_manager.login('bench', '1234')
+    manager = ScreenManager()
+    manager.add_widget(Screen(name='menu'))
+    screen = main.GameScreen(app, name='game')
+    manager.add_widget(screen)
+    manager.current = 'game'
+    planet = Planet('Bench', 'terra', seed=3)
+    app.data_manager.put_planet('planet_1', planet)
+    app.data_manager.user_data['current_planet'] = 'planet_1'
+    screen.set_planet(planet)
+    screen.tick_speed = 5
+    
+    textures = [0]
+    for label in screen.walk():
+        if isinstance(label, Label):
+            label.bind(texture=lambda *args: textures.__setitem__(0, textures[0] + 1))
+    
+    def ticks(count):
+        textures[0] = 0
+        for _ in range(count):
+            screen.game_tick(1.0)
+            Clock.tick()
+        return textures[0] / count
+    
+    results = {'game_label_textures_per_tick[visible]': (ticks(COUNTED_FRAMES), 'count')}
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        screen.update_display()
+    results['game_update_display[unchanged]'] = (
+        (time.perf_counter() - start) / FRAMES * 1e6, 'us')
+    manager.current = 'menu'
+    results['game_label_textures_per_tick[hidden]'] = (ticks(COUNTED_FRAMES), 'count')
+    app.data_manager.close()
+    return results
+
+
+def run():
+    env = dict(os.environ)
+    if not env.get('DISPLAY'):
+        env.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    proc = subprocess.run([sys.executable, '-m', 'benchmarks.bench_render'],
+                          cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode == NO_WINDOW:
+        reason = proc.stderr.strip().splitlines()[-1:] or ['no Kivy window']
+        print(f"render benchmarks skipped: {reason[0]}", file=sys.stderr)
+        return []
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        sys.stderr.write(proc.stderr)
+        raise RuntimeError(f"render benchmarks failed (exit code {proc.returncode})")
+    data = json.loads(lines[-1])
+    return [Result(name, value, unit) for name, (value, unit) in data.items()]
+
+
+if __name__ == '__main__':
+    child_main()
@@ -0,0 +1,93 @@
+"""
+Симуляция: тик на каждой стадии жизни, определение стадии, перемотка,
+сериализация планеты, запись и выборка статов.
+"""
+
+from pocket_universe import LIFE_STAGES, Planet, StatRecorder
+
+from .harness import Result, measure
+
+
+TICKS = 100
+
+
+def planet_at_stage(index):
+    # Статы чуть выше порогов стадии; температура подходит для роста
+    planet = Planet('Bench', 'terra', seed=index)
+    conditions = LIFE_STAGES[index]['min_conditions']
+    planet.water = conditions.get('water', 0) + 1
+    planet.oxygen = conditions.get('oxygen', 0) + 1
+    planet.temperature = max(50, conditions.get('temperature', 0) + 1)
+    planet.biomass = conditions.get('biomass', 0) + 1
+    planet.update_life_stage()
+    for year in range(50):
+        planet.add_history({'year': year, 'event': 'Small Meteor'})
+    return planet
+
+
+def run():
+    results = []
+    for index, stage in enumerate(LIFE_STAGES):
+        planet = planet_at_stage(index)
+        snapshot = planet.snapshot()
+        
+        def ticks():
+            planet.restore(snapshot)
+            for _ in range(TICKS):
+                planet.simulate_tick()
+        
+        results.append(measure(f"simulate_tick[{stage['name']}]", ticks, ops=TICKS))
+        results.append(measure(f"update_life_stage[{stage['name']}]",
+                               planet.update_life_stage))
+    
+    planet = planet_at_stage(3)
+    snapshot = planet.snapshot()
+    
+    def advance():
+        planet.restore(snapshot)
+        planet.advance(10000)
+    
+    advanced = measure('advance[10000 years]', advance)
+    results.append(advanced)
+    
+    def ticks():
+        planet.restore(snapshot)
+        for _ in range(10000):
+            planet.simulate_tick()
+    
+    # Перемотка должна быть заметно быстрее тех же лет потиками: отношение
+    # не зависит от скорости машины, и вдвое медленнее уже регрессия
+    ticked = measure('simulate_tick[10000 years]', ticks)
+    results.append(ticked)
+    results.append(Result('advance_vs_ticks[10000 years]',
+                          advanced.value / ticked.value, 'ratio', limit=0.5))
+    
+    def advance_recorded():
+        planet.restore(snapshot)
+        planet.recorder = StatRecorder()
+        planet.advance(10000)
+        planet.recorder = None
+    
+    results.append(measure('advance[10000 years, recorded]', advance_recorded))
+    results.append(measure('to_dict', planet.to_dict))
+    data = planet.to_dict()
+    results.append(measure('from_dict', lambda: Planet.from_dict(data)))
+    results.append(measure('to_dict+from_dict', lambda: Planet.from_dict(planet.to_dict())))
+    
+    # Записанные миллион лет: память фиксирована, выборка не больше 200 точек
+    recorder = StatRecorder()
+    planet.restore(snapshot)
+    planet.recorder = recorder
+    planet.advance(1000000)
+    planet.recorder = None
+    
+    def record():
+        planet.age += 1
+        recorder.record(planet)
+    
+    results.append(measure('recorder.record', record))
+    results.append(measure('recorder.query[last 1000 years]',
+                           lambda: recorder.query(planet.age - 1000, planet.age)))
+    results.append(measure('recorder.query[all]', lambda: recorder.query()))
+    return results
+
@@ -0,0 +1,35 @@
+"""
+Снимки планеты: двоичный формат против JSON по размеру и скорости.
+"""
+
+import json
+
+from pocket_universe import Planet, PlanetSnapshot, encode_planet
+
+from .harness import Result, measure
+
+
+def run():
+    planet = Planet('Bench', 'terra', seed=7)
+    # Время создания фиксировано: иначе размер JSON зависит от числа
+    # цифр в time.time()
+    planet.created = planet.last_simulated = 1.7e9
+    planet.advance(3000)
+    planet.apply_divine_power('rain')
+    planet.advance(3000)
+    data = planet.to_dict()
+    text = json.dumps(data)
+    raw = encode_planet(data)
+
+    results = [
+        Result('snapshot_size[json]', len(text.encode('utf-8')), 'count'),
+        Result('snapshot_size[binary]', len(raw), 'count'),
+        measure('snapshot_encode[json]', lambda: json.dumps(planet.to_dict())),
+        measure('snapshot_encode[binary]', lambda: encode_planet(planet.to_dict())),
+        measure('snapshot_load[json]', lambda: Planet.from_dict(json.loads(text))),
+        measure('snapshot_load[binary]', lambda: PlanetSnapshot(raw).to_planet()),
+        # Экран списка: только статы, история не нужна
+        measure('snapshot_stats[json]', lambda: json.loads(text)['population']),
+        measure('snapshot_stats[binary]', lambda: PlanetSnapshot(raw).population),
+    ]
+    return results
@@ -0,0 +1,140 @@
+"""
+Хранение: загрузка и сохранение пользователей в JSON и SQLite.
+"""
+
+import os
+import shutil
+import tempfile
+
+from pocket_universe import DataManager, EventLog, Planet, PlanetIndex, open_backend
+
+from .harness import measure
+
+
+USER_COUNTS = (1, 100, 10000)
+HEAVY_PLANETS = 300
+BACKENDS = ('json', 'sqlite')
+
+
+def make_users(count):
+    planet = Planet('Bench', 'terra', seed=1)
+    planet.advance(500)
+    planet_data = planet.to_dict()
+    users = {'users': {}}
+    for i in range(count):
+        users['users'][f"user{i}"] = {
+            'pin_hash': '0' * 16,
+            'created': 0,
+            'divine_energy': 100,
+            'total_planets': 1,
+            'achievements': ['creator'],
+            'divine_uses': 0,
+            'planets': {'planet_1': dict(planet_data)},
+            'current_planet': 'planet_1',
+            'stats': {'total_years': 0, 'max_life_stage': 0, 'disasters_survived': 0},
+        }
+    return users
+
+
+def make_heavy_user(planets):
+    planet_data = make_users(1)['users']['user0']['planets']['planet_1']
+    user = make_users(1)['users']['user0']
+    user['planets'] = {f"planet_{i}": dict(planet_data) for i in range(planets)}
+    return user
+
+
+def run_backend(backend_name, path):
+    # Имена JSON-замеров без метки - как до появления SQLite
+    label = '' if backend_name == 'json' else f"{backend_name}, "
+    results = []
+    for count in USER_COUNTS:
+        manager = DataManager(path, backend=open_backend(backend_name, path))
+        users = make_users(count)
+        manager.save_users(users)
+        min_time = 0.1 if count < 10000 else 0.5
+        results.append(measure(f"save_users[{label}{count} users]",
+                               lambda: manager.save_users(users), min_time=min_time))
+        results.append(measure(f"load_users[{label}{count} users]",
+                               manager.load_users, min_time=min_time))
+        results.append(measure(f"find_user[{label}{count} users]",
+                               lambda: manager.backend.find_user('nobody')))
+        
+        manager.current_user = 'user0'
+        manager.user_data = users['users']['user0']
+        # Сам вызов только ставит запись в очередь; запись на диск
+        # измеряет save_current_user+flush
+        results.append(measure(f"schedule_save[{label}{count} users]",
+                               manager.save_current_user, min_time=min_time))
+        
+        def save_and_flush():
+            manager.save_current_user()
+            manager.flush()
+        results.append(measure(f"save_current_user+flush[{label}{count} users]",
+                               save_and_flush, min_time=min_time))
+        manager.close()
+    
+    # Игрок с сотнями планет: между сохранениями меняется одна планета
+    manager = DataManager(path, backend=open_backend(backend_name, path))
+    manager.current_user = 'heavy'
+    manager.user_data = make_heavy_user(HEAVY_PLANETS)
+    manager.save_current_user()
+    manager.flush()
+    planet = manager.user_data['planets']['planet_0']
+    
+    def save_one_planet():
+        manager.user_data['planets']['planet_0'] = dict(planet)
+        manager.save_current_user()
+        manager.flush()
+    results.append(measure(f"save_current_user+flush[{label}{HEAVY_PLANETS} planets]",
+                           save_one_planet))
+    
+    # Вход: полный пользователь против сводок для списка планет
+    results.append(measure(f"load_user[{label}{HEAVY_PLANETS} planets]",
+                           lambda: manager.backend.load_user('heavy')))
+    results.append(measure(f"planet_index_load[{label}{HEAVY_PLANETS} planets]",
+                           lambda: PlanetIndex(manager.backend.load_summaries('heavy'))))
+    manager.close()
+    return results
+
+
+def run_planet_list():
+    # Экран "My Planets": раньше Planet.from_dict на каждую планету
+    planets = make_heavy_user(HEAVY_PLANETS)['planets']
+    index = PlanetIndex(planets)
+    return [
+        measure(f"planet_list_from_dict[{HEAVY_PLANETS} planets]",
+                lambda: [Planet.from_dict(data) for data in planets.values()]),
+        measure(f"planet_index_build[{HEAVY_PLANETS} planets]",
+                lambda: PlanetIndex(planets)),
+        measure(f"planet_index_query[{HEAVY_PLANETS} planets]",
+                lambda: index.query(sort='age', reverse=True, limit=20)),
+    ]
+
+
+def run_event_log(path):
+    # Журнал на 30000 лет; запрос читает только нужные сегменты
+    log = EventLog(os.path.join(path, 'log'))
+    planet = Planet('Bench', 'terra', seed=9)
+    planet.history_log = log
+    planet.advance(30000)
+    log.flush()
+    entry = {'year': planet.age, 'event': 'Small Meteor'}
+    results = [
+        measure('event_log_append', lambda: log.append(entry)),
+        measure('event_log_query[1000 years]', lambda: list(log.query(10000, 11000))),
+    ]
+    log.close()
+    return results
+
+
+def run():
+    results = run_planet_list()
+    for backend_name in BACKENDS:
+        path = tempfile.mkdtemp(prefix='pu_bench_')
+        try:
+            results.extend(run_backend(backend_name, path))
+            if backend_name == 'json':
+                results.extend(run_event_log(path))
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    return results
@@ -0,0 +1,161 @@
+"""
+Замер времени, базовые значения и отчёт о регрессиях.
+"""
+
+import fnmatch
+import json
+import os
+import platform
+import time
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+class Result:
+    # value — время на операцию (мкс), счётчик или отношение двух замеров
+    # (unit 'ratio'); меньше — лучше. limit — верхняя граница, превышение
+    # которой считается регрессией независимо от baseline. reference —
+    # время эталонного цикла (мкс), замеренное вперемешку с этим замером
+    def __init__(self, name, value, unit='us', limit=None, reference=None):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.limit = limit
+        self.reference = reference
+
+
+# Вызовов _reference_loop в одном замере эталона (около миллисекунды)
+REFERENCE_CALLS = 10
+
+
+def _reference_loop():
+    # Смесь того, из чего состоят горячие пути: арифметика float,
+    # словари, атрибуты и вызовы
+    box = Result('reference', 0.0)
+    counts = {}
+    for i in range(2000):
+        box.value += i * 0.5
+        counts[i & 15] = counts.get(i & 15, 0) + 1
+    return box.value
+
+
+def _time_reference():
+    start = time.perf_counter()
+    for _ in range(REFERENCE_CALLS):
+        _reference_loop()
+    return (time.perf_counter() - start) / REFERENCE_CALLS
+
+
+def measure(name, func, ops=1, min_time=0.1, repeat=5, setup=None):
+    # Лучший из repeat прогонов: помехи (другие процессы, частота ЦП)
+    # только замедляют, поэтому минимум стабильнее медианы. Один прогон —
+    # столько вызовов func, чтобы набрать min_time секунд. ops — операций
+    # в одном вызове. После каждого прогона замеряется эталонный цикл:
+    # baseline хранит время в его долях, поэтому сравнение не зависит ни
+    # от машины, ни от того, насколько она загружена в эту минуту
+    if setup:
+        setup()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = [elapsed]
+    references = [_time_reference()]
+    for _ in range(repeat - 1):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append(time.perf_counter() - start)
+        references.append(_time_reference())
+    per_op = min(samples) / (loops * ops)
+    return Result(name, per_op * 1e6, 'us', reference=min(references) * 1e6)
+
+
+def measure_reference(repeat=5):
+    # Эталон всего прогона в мкс: для замеров без своего (bench_render
+    # считает в отдельном процессе)
+    return min(_time_reference() for _ in range(repeat)) * 1e6
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(results, reference, path=BASELINE_FILE, update=()):
+    # Дописываются только новые замеры. Уже записанные меняются лишь по
+    # шаблонам имён update, иначе замедление молча ушло бы в baseline.
+    # Время записывается в долях эталонного цикла (unit 'ref')
+    stored = load_baseline(path)
+    for r in results:
+        if r.name not in stored or any(fnmatch.fnmatchcase(r.name, p) for p in update):
+            if r.unit == 'us':
+                stored[r.name] = {'value': r.value / (r.reference or reference), 'unit': 'ref'}
+            else:
+                stored[r.name] = {'value': r.value, 'unit': r.unit}
+    data = {
+        'machine': f"{platform.machine()} {platform.python_implementation()} "
+                   f"{platform.python_version()}",
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'reference_us': reference,
+        'results': stored,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+
+def compare(results, baseline, threshold, reference):
+    # Время сравнивается с допуском threshold, счётчики — строго.
+    # Baseline времени переводится в мкс по эталонному циклу, замеренному
+    # рядом с результатом, а если его нет — по эталону всего прогона
+    rows = []
+    regressions = []
+    for r in results:
+        if r.limit is not None and r.value > r.limit:
+            rows.append((r, r.limit, r.value / r.limit, 'OVER LIMIT'))
+            regressions.append(r.name)
+            continue
+        base = baseline.get(r.name)
+        if base is None:
+            rows.append((r, None, None, 'new'))
+            continue
+        base_value = base['value']
+        if base['unit'] == 'ref':
+            base_value *= r.reference or reference
+        if base_value:
+            ratio = r.value / base_value
+        else:
+            ratio = float('inf') if r.value else 1.0
+        limit = 1.0 if r.unit == 'count' else 1.0 + threshold
+        if ratio > limit:
+            status = 'SLOWER' if r.unit != 'count' else 'MORE'
+            regressions.append(r.name)
+        elif r.unit != 'count' and ratio < 1.0 - threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((r, base_value, ratio, status))
+    return rows, regressions
+
+
+def format_report(rows):
+    lines = [f"{'benchmark':<44}{'current':>14}{'baseline':>14}{'ratio':>8}  status"]
+    units = {'count': "{:.0f}", 'ratio': "{:.3f}"}
+    for r, base, ratio, status in rows:
+        form = units.get(r.unit, "{:.2f} us")
+        value = form.format(r.value)
+        base_text = '-' if base is None else form.format(base)
+        ratio_text = '-' if ratio is None else f"{ratio:.2f}x"
+        lines.append(f"{r.name:<44}{value:>14}{base_text:>14}{ratio_text:>8}  {status}")
+    return '\n'.join(lines)
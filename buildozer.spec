@@ -4,8 +4,9 @@ package.name = pocketuniverse
 package.domain = org.galaxy
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
+source.exclude_dirs = tests,benchmarks
 version = 1.0
-requirements = python3,kivy
+requirements = python3,kivy,sqlite3
 orientation = portrait
 fullscreen = 1
 
@@ -3,12 +3,14 @@ POCKET UNIVERSE — Симулятор Вселенной
 Создай планету. Развивай жизнь. Стань богом.
 """
 
-import json
+import hashlib
+import os
 import random
 import math
 import time
-import os
-import hashlib
+import weakref
+from array import array
+from collections import OrderedDict
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -24,407 +26,485 @@ from kivy.uix.slider import Slider
 from kivy.uix.image import Image
 from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition, SlideTransition
 from kivy.uix.popup import Popup
+from kivy.uix.spinner import Spinner
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.widget import Widget
-from kivy.graphics import Color, Rectangle, Ellipse, Line, Triangle, PushMatrix, PopMatrix, Rotate
+from kivy.graphics import (Color, Rectangle, Ellipse, Line, Triangle, PushMatrix, PopMatrix, Rotate,
+                           Mesh, RenderContext, Translate, Fbo, ClearColor,
+                           ClearBuffers, Callback, BindTexture)
+from kivy.graphics.opengl import (glBlendFuncSeparate, GL_ONE, GL_SRC_ALPHA,
+                                  GL_ONE_MINUS_SRC_ALPHA)
+from kivy.graphics.texture import Texture
+from kivy.core.image import Image as CoreImage
 from kivy.clock import Clock
 from kivy.animation import Animation
 from kivy.metrics import dp, sp
-from kivy.utils import platform
 from kivy.core.window import Window
-from kivy.properties import NumericProperty, StringProperty, ListProperty
-
-
-# ==================== КОНФИГУРАЦИЯ ====================
-
-LIFE_STAGES = [
-    {'name': 'Lifeless', 'icon': '.', 'min_conditions': {}},
-    {'name': 'Bacteria', 'icon': '*', 'min_conditions': {'water': 10, 'temperature': 20}},
-    {'name': 'Algae', 'icon': '~', 'min_conditions': {'water': 25, 'oxygen': 5, 'temperature': 25}},
-    {'name': 'Plants', 'icon': 'Y', 'min_conditions': {'water': 35, 'oxygen': 15, 'temperature': 30}},
-    {'name': 'Insects', 'icon': 'x', 'min_conditions': {'water': 40, 'oxygen': 25, 'biomass': 20}},
-    {'name': 'Fish', 'icon': '>', 'min_conditions': {'water': 50, 'oxygen': 30, 'biomass': 30}},
-    {'name': 'Reptiles', 'icon': 'S', 'min_conditions': {'water': 45, 'oxygen': 40, 'biomass': 40}},
-    {'name': 'Mammals', 'icon': 'M', 'min_conditions': {'water': 50, 'oxygen': 50, 'biomass': 50}},
-    {'name': 'Primates', 'icon': 'P', 'min_conditions': {'water': 55, 'oxygen': 55, 'biomass': 60}},
-    {'name': 'Civilization', 'icon': 'A', 'min_conditions': {'water': 50, 'oxygen': 60, 'biomass': 70}},
-    {'name': 'Industrial', 'icon': 'I', 'min_conditions': {'water': 45, 'oxygen': 55, 'biomass': 65}},
-    {'name': 'Space Age', 'icon': 'V', 'min_conditions': {'water': 40, 'oxygen': 50, 'biomass': 60}},
-    {'name': 'Galactic', 'icon': '@', 'min_conditions': {'water': 40, 'oxygen': 50, 'biomass': 55}},
-]
+from kivy.properties import NumericProperty, StringProperty, ListProperty, ObjectProperty
 
-EVENTS = {
-    'meteor_small': {
-        'name': 'Small Meteor',
-        'desc': 'A small meteor strikes!',
-        'effects': {'biomass': -5, 'temperature': 2},
-        'chance': 0.03
-    },
-    'meteor_large': {
-        'name': 'EXTINCTION EVENT',
-        'desc': 'Massive asteroid impact!',
-        'effects': {'biomass': -40, 'temperature': -15, 'oxygen': -10},
-        'chance': 0.005
-    },
-    'volcano': {
-        'name': 'Volcanic Eruption',
-        'desc': 'Volcanoes release gases',
-        'effects': {'temperature': 3, 'oxygen': -2, 'biomass': -3},
-        'chance': 0.02
-    },
-    'ice_age': {
-        'name': 'Ice Age Begins',
-        'desc': 'Global cooling event',
-        'effects': {'temperature': -20, 'water': -10, 'biomass': -15},
-        'chance': 0.008
-    },
-    'solar_flare': {
-        'name': 'Solar Flare',
-        'desc': 'Intense radiation!',
-        'effects': {'temperature': 10, 'biomass': -8},
-        'chance': 0.015
-    },
-    'evolution_boost': {
-        'name': 'Evolution Leap!',
-        'desc': 'Rapid mutation event',
-        'effects': {'biomass': 15},
-        'chance': 0.02
-    },
-    'ocean_bloom': {
-        'name': 'Ocean Bloom',
-        'desc': 'Algae explosion!',
-        'effects': {'oxygen': 8, 'biomass': 5},
-        'chance': 0.025
-    },
-    'magnetic_shift': {
-        'name': 'Magnetic Reversal',
-        'desc': 'Poles are shifting',
-        'effects': {'biomass': -5},
-        'chance': 0.01
-    },
-}
+from pocket_universe import (
+    LIFE_STAGES, DIVINE_POWERS, ACHIEVEMENTS, PLANET_TYPES, OFFLINE_PROGRESS, ANIMATION,
+    RENDER_CACHE, DataManager, ListState, Planet, apply_rows,
+)
 
-DIVINE_POWERS = {
-    'rain': {
-        'name': 'Divine Rain',
-        'desc': '+15 Water',
-        'cost': 20,
-        'effects': {'water': 15}
-    },
-    'sunlight': {
-        'name': 'Blessed Sun',
-        'desc': '+10 Temperature',
-        'cost': 15,
-        'effects': {'temperature': 10}
-    },
-    'breath': {
-        'name': 'Breath of Life',
-        'desc': '+20 Oxygen',
-        'cost': 30,
-        'effects': {'oxygen': 20}
-    },
-    'seed': {
-        'name': 'Genesis Seed',
-        'desc': '+25 Biomass',
-        'cost': 40,
-        'effects': {'biomass': 25}
-    },
-    'shield': {
-        'name': 'Divine Shield',
-        'desc': 'Block next disaster',
-        'cost': 50,
-        'effects': {'shield': 1}
-    },
-    'miracle': {
-        'name': 'Miracle',
-        'desc': '+10 to all stats',
-        'cost': 100,
-        'effects': {'water': 10, 'oxygen': 10, 'temperature': 5, 'biomass': 10}
-    },
+
+# ==================== ВИДЖЕТ ПЛАНЕТЫ ====================
+
+# Звёздное небо одной сеткой: на звезду 4 вершины (x, y, угол квадрата,
+# яркость, фаза мерцания). Мерцание берётся из таблицы в текстуре по
+# сдвигу фазы, поэтому кадр стоит одну uniform-переменную при любом
+# числе звёзд
+STAR_FORMAT = [(b'vPosition', 2, 'float'), (b'vStar', 4, 'float')]
+TWINKLE_STEPS = 64
+
+STAR_VS = """
+$HEADER$
+attribute vec4 vStar;
+uniform float twinkle;
+varying vec2 corner;
+varying float brightness;
+varying float phase;
+
+void main(void) {
+    corner = vStar.xy;
+    brightness = vStar.z;
+    phase = vStar.w + twinkle;
+    gl_Position = projection_mat * modelview_mat * vec4(vPosition.xy, 0.0, 1.0);
 }
+"""
 
-ACHIEVEMENTS = {
-    'creator': {'name': 'Creator', 'desc': 'Create your first planet', 'reward': 50},
-    'life_giver': {'name': 'Life Giver', 'desc': 'Evolve to Bacteria', 'reward': 30},
-    'gardener': {'name': 'Gardener', 'desc': 'Evolve to Plants', 'reward': 50},
-    'shepherd': {'name': 'Shepherd', 'desc': 'Evolve to Mammals', 'reward': 100},
-    'civilization': {'name': 'Civilization', 'desc': 'Reach Civilization', 'reward': 200},
-    'space_age': {'name': 'Space Age', 'desc': 'Reach Space Age', 'reward': 500},
-    'galactic': {'name': 'Galactic Empire', 'desc': 'Reach Galactic stage', 'reward': 1000},
-    'survivor': {'name': 'Survivor', 'desc': 'Survive an extinction event', 'reward': 150},
-    'balance': {'name': 'Balance', 'desc': 'All stats above 50', 'reward': 100},
-    'ancient': {'name': 'Ancient World', 'desc': 'Planet age > 1000 years', 'reward': 200},
-    'multiverse': {'name': 'Multiverse', 'desc': 'Create 3 planets', 'reward': 300},
-    'divine_10': {'name': 'Minor God', 'desc': 'Use 10 divine powers', 'reward': 100},
-    'divine_50': {'name': 'Major God', 'desc': 'Use 50 divine powers', 'reward': 300},
+STAR_FS = """
+$HEADER$
+varying vec2 corner;
+varying float brightness;
+varying float phase;
+
+void main(void) {
+    if (dot(corner, corner) > 1.0)
+        discard;
+    float b = brightness * texture2D(texture0, vec2(phase, 0.5)).r;
+    gl_FragColor = vec4(b, b, min(b * 1.1, 1.0), 1.0);
 }
+"""
+
+
+def make_twinkle_texture():
+    # Таблица 0.7 + 0.3 * sin по периоду; повтор текстуры заменяет остаток
+    # от деления фазы, линейная фильтрация сглаживает шаги
+    texture = Texture.create(size=(TWINKLE_STEPS, 1), colorfmt='rgba')
+    texture.wrap = 'repeat'
+    texture.mag_filter = 'linear'
+    texture.min_filter = 'linear'
+    
+    def upload(texture):
+        values = bytearray()
+        for i in range(TWINKLE_STEPS):
+            v = int(round(255 * (0.7 + 0.3 * math.sin(2 * math.pi * i / TWINKLE_STEPS))))
+            values += bytes((v, v, v, 255))
+        texture.blit_buffer(bytes(values), colorfmt='rgba', bufferfmt='ubyte')
+    
+    upload(texture)
+    texture.add_reload_observer(upload)
+    return texture
+
+
+class StarField:
+    def __init__(self, count=50, rng=None):
+        self.count = count
+        self.rng = rng or random.Random()
+        self.vertices = array('f', bytes(4 * 6 * 4 * count))
+        indices = array('H')
+        for i in range(count):
+            v = i * 4
+            indices.extend((v, v + 1, v + 2, v + 2, v + 3, v))
+        
+        self.context = RenderContext(vs=STAR_VS, fs=STAR_FS,
+                                     use_parent_projection=True,
+                                     use_parent_modelview=True)
+        self.context['twinkle'] = 0.0
+        with self.context:
+            self.translate = Translate(0, 0)
+            self.mesh = Mesh(vertices=self.vertices, indices=indices, fmt=STAR_FORMAT,
+                             mode='triangles', texture=make_twinkle_texture())
+    
+    def scatter(self, width, height):
+        # Новые случайные звёзды в прямоугольнике width x height
+        uniform = self.rng.uniform
+        vertices = self.vertices
+        for i in range(self.count):
+            x = uniform(0, width)
+            y = uniform(0, height)
+            size = uniform(1, 3)
+            brightness = uniform(0.3, 1.0)
+            # sin(time * 2 + x) из таблицы: фаза в долях периода со сдвигом
+            # на половину ячейки к её центру; остаток держит точность float
+            phase = (x / (2 * math.pi) + 0.5 / TWINKLE_STEPS) % 1.0
+            base = i * 24
+            for corner, (dx, dy) in enumerate(((0, 0), (1, 0), (1, 1), (0, 1))):
+                o = base + corner * 6
+                vertices[o:o + 6] = array('f', (x + dx * size, y + dy * size,
+                                                dx * 2 - 1, dy * 2 - 1, brightness, phase))
+        self.mesh.vertices = vertices
+    
+    def move(self, x, y):
+        self.translate.xy = (x, y)
+    
+    def update(self, now):
+        self.context['twinkle'] = (now / math.pi) % 1.0
+
+
+class AnimationClock:
+    # Один таймер анимации на всё приложение. Тикают только виджеты на
+    # текущем экране ScreenManager; без видимых виджетов и в фоне таймер
+    # снят и не будит процессор
+    def __init__(self, fps=None, low_power=None):
+        self.fps = fps or ANIMATION['fps']
+        self.low_power = ANIMATION['low_power'] if low_power is None else low_power
+        self.widgets = weakref.WeakSet()
+        self.active = []
+        self.manager = None
+        self.paused = False
+        self.event = None
+    
+    @property
+    def interval(self):
+        fps = self.fps
+        if self.low_power:
+            fps = min(fps, ANIMATION['low_power_fps'])
+        return 1 / fps
+    
+    def register(self, widget):
+        self.widgets.add(widget)
+        self.refresh()
+    
+    def unregister(self, widget):
+        self.widgets.discard(widget)
+        self.refresh()
+    
+    def attach(self, manager):
+        self.manager = manager
+        manager.bind(current_screen=self.refresh)
+        self.refresh()
+    
+    def is_visible(self, widget):
+        # Без ScreenManager видимыми считаются все виджеты
+        if self.manager is None:
+            return True
+        parent = widget.parent
+        while parent is not None and not isinstance(parent, Screen):
+            parent = parent.parent
+        return parent is not None and parent is self.manager.current_screen
+    
+    def refresh(self, *args):
+        self.active = [w for w in self.widgets if self.is_visible(w)]
+        self.reschedule()
+    
+    def reschedule(self):
+        run = bool(self.active) and not self.paused
+        if self.event is not None and (not run or self.event.timeout != self.interval):
+            self.event.cancel()
+            self.event = None
+        if run and self.event is None:
+            self.event = Clock.schedule_interval(self.tick, self.interval)
+    
+    def tick(self, dt):
+        for widget in self.active:
+            widget.animate(dt)
+    
+    def set_fps(self, fps):
+        self.fps = fps
+        self.reschedule()
+    
+    def set_low_power(self, enabled):
+        self.low_power = enabled
+        self.reschedule()
+    
+    def pause(self):
+        self.paused = True
+        self.reschedule()
+    
+    def resume(self):
+        self.paused = False
+        self.refresh()
+
+
+animation_clock = AnimationClock()
+
+
+# Тело планеты рисуется в текстуру (Fbo) один раз на состояние и кадр
+# вращения; виджеты и список только выводят готовые текстуры. В Fbo
+# смешивание даёт цвет, уже умноженный на альфу, поэтому текстура
+# выводится с glBlendFunc(ONE, ONE_MINUS_SRC_ALPHA)
+
+def default_blend(instruction):
+    glBlendFuncSeparate(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE)
+
+
+def premultiplied_blend(instruction):
+    glBlendFuncSeparate(GL_ONE, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE)
+
 
-PLANET_TYPES = {
-    'terra': {'name': 'Terra', 'color': (0.2, 0.5, 0.3), 'water': 50, 'temp': 50},
-    'ocean': {'name': 'Ocean World', 'color': (0.1, 0.3, 0.7), 'water': 80, 'temp': 40},
-    'desert': {'name': 'Desert World', 'color': (0.7, 0.5, 0.2), 'water': 20, 'temp': 70},
-    'ice': {'name': 'Ice World', 'color': (0.7, 0.8, 0.9), 'water': 60, 'temp': 10},
-    'volcanic': {'name': 'Volcanic World', 'color': (0.5, 0.2, 0.1), 'water': 15, 'temp': 85},
+def over_blend(instruction):
+    # Альфа в Fbo копится как "поверх", а не суммой
+    glBlendFuncSeparate(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
+
+
+# Тело планеты на экране - смесь двух соседних кадров вращения: детали
+# сдвигаются плавно, а не скачком на 360 / rotation_frames градусов.
+# Кадры уже умножены на альфу, поэтому их смесь - тоже готовый цвет
+BODY_FS = """
+$HEADER$
+uniform sampler2D texture1;
+uniform float frame_mix;
+
+void main(void) {
+    vec4 current = texture2D(texture0, tex_coord0);
+    vec4 next = texture2D(texture1, tex_coord0);
+    gl_FragColor = mix(current, next, frame_mix) * frag_color;
 }
+"""
 
+# Байт на пиксель Fbo тела: RGBA-текстура и трафарет GL_STENCIL_INDEX8
+BODY_FBO_PIXEL_BYTES = 4 + 1
 
-# ==================== УТИЛИТЫ ====================
 
-def get_data_path():
-    if platform == 'android':
-        try:
-            from android.storage import app_storage_path
-            return app_storage_path()
-        except:
-            pass
-    return os.path.expanduser('~')
+def planet_body_state(planet):
+    # Всё, от чего зависит вид тела планеты, с точностью до видимых
+    # порогов: пятна воды и биомассы, облака, прозрачность атмосферы
+    # шагами по 5 кислорода, щит
+    water, biomass, oxygen = planet.water, planet.biomass, planet.oxygen
+    return (
+        planet.type,
+        int(water / 20) if water > 20 else 0,
+        int(biomass / 15) if biomass > 10 else 0,
+        water > 30,
+        int(min(oxygen, 60) / 5) if oxygen > 20 else 0,
+        planet.shield > 0,
+    )
 
 
-def hash_pin(pin):
-    return hashlib.sha256(pin.encode()).hexdigest()[:16]
+def body_side(radius):
+    # Сторона текстуры: свечение 1.3 радиуса и запас под линию щита
+    return 2 * math.ceil(radius * 1.3) + 4
 
 
-# ==================== МЕНЕДЖЕР ДАННЫХ ====================
+def render_radius(radius):
+    # Крупные планеты рисуются в текстуру не больше max_side и растягиваются
+    max_radius = int((RENDER_CACHE['max_side'] - 4) / 2.6)
+    return max(1, min(int(round(radius)), max_radius))
 
-class DataManager:
-    def __init__(self):
-        self.data_path = get_data_path()
-        self.users_file = os.path.join(self.data_path, 'pu_users.json')
-        self.current_user = None
-        self.user_data = None
+
+def draw_planet_body(state, rotation, cx, cy, radius):
+    planet_type, water_spots, biomass_spots, clouds, atmosphere, shield = state
+    pc = PLANET_TYPES.get(planet_type, PLANET_TYPES['terra'])['color']
     
-    def load_users(self):
-        try:
-            if os.path.exists(self.users_file):
-                with open(self.users_file, 'r') as f:
-                    return json.load(f)
-        except:
-            pass
-        return {'users': {}}
+    # Свечение
+    Color(pc[0], pc[1], pc[2], 0.2)
+    Ellipse(pos=(cx - radius * 1.3, cy - radius * 1.3),
+            size=(radius * 2.6, radius * 2.6))
     
-    def save_users(self, data):
-        try:
-            with open(self.users_file, 'w') as f:
-                json.dump(data, f)
-        except:
-            pass
+    # Основа планеты
+    Color(pc[0], pc[1], pc[2], 1)
+    Ellipse(pos=(cx - radius, cy - radius),
+            size=(radius * 2, radius * 2))
     
-    def register(self, username, pin):
-        users = self.load_users()
-        if username.lower() in [u.lower() for u in users['users']]:
-            return False, "Username already exists"
-        if len(username) < 3:
-            return False, "Username too short"
-        if len(pin) < 4:
-            return False, "PIN must be 4+ digits"
-        
-        users['users'][username] = {
-            'pin_hash': hash_pin(pin),
-            'created': time.time(),
-            'divine_energy': 100,
-            'total_planets': 0,
-            'achievements': [],
-            'divine_uses': 0,
-            'planets': {},
-            'current_planet': None,
-            'stats': {
-                'total_years': 0,
-                'max_life_stage': 0,
-                'disasters_survived': 0
-            }
-        }
-        self.save_users(users)
-        return True, "Account created!"
-    
-    def login(self, username, pin):
-        users = self.load_users()
-        if username not in users['users']:
-            return False, "User not found"
-        if users['users'][username]['pin_hash'] != hash_pin(pin):
-            return False, "Wrong PIN"
-        
-        self.current_user = username
-        self.user_data = users['users'][username]
-        return True, "Welcome back!"
-    
-    def save_current_user(self):
-        if not self.current_user:
-            return
-        users = self.load_users()
-        users['users'][self.current_user] = self.user_data
-        self.save_users(users)
+    # Вода (синие пятна)
+    if water_spots:
+        Color(0.1, 0.3, 0.7, 0.6)
+        for i in range(water_spots):
+            angle = (rotation + i * 72) * math.pi / 180
+            dist = radius * 0.5
+            x = cx + math.cos(angle) * dist - radius * 0.2
+            y = cy + math.sin(angle) * dist - radius * 0.15
+            Ellipse(pos=(x, y), size=(radius * 0.4, radius * 0.3))
     
-    def logout(self):
-        self.save_current_user()
-        self.current_user = None
-        self.user_data = None
-
-
-# ==================== ПЛАНЕТА ====================
-
-class Planet:
-    def __init__(self, name, planet_type='terra'):
-        self.name = name
-        self.type = planet_type
-        self.type_data = PLANET_TYPES.get(planet_type, PLANET_TYPES['terra'])
-        
-        self.water = self.type_data['water']
-        self.oxygen = 5
-        self.temperature = self.type_data['temp']
-        self.biomass = 0
-        
-        self.age = 0
-        self.life_stage = 0
-        self.population = 0
-        self.shield = 0
-        
-        self.history = []
-        self.created = time.time()
-    
-    def to_dict(self):
-        return {
-            'name': self.name,
-            'type': self.type,
-            'water': self.water,
-            'oxygen': self.oxygen,
-            'temperature': self.temperature,
-            'biomass': self.biomass,
-            'age': self.age,
-            'life_stage': self.life_stage,
-            'population': self.population,
-            'shield': self.shield,
-            'history': self.history[-50:],
-            'created': self.created
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        p = cls(data['name'], data.get('type', 'terra'))
-        p.water = data.get('water', 50)
-        p.oxygen = data.get('oxygen', 5)
-        p.temperature = data.get('temperature', 50)
-        p.biomass = data.get('biomass', 0)
-        p.age = data.get('age', 0)
-        p.life_stage = data.get('life_stage', 0)
-        p.population = data.get('population', 0)
-        p.shield = data.get('shield', 0)
-        p.history = data.get('history', [])
-        p.created = data.get('created', time.time())
-        return p
-    
-    def clamp_stats(self):
-        self.water = max(0, min(100, self.water))
-        self.oxygen = max(0, min(100, self.oxygen))
-        self.temperature = max(-50, min(150, self.temperature))
-        self.biomass = max(0, min(100, self.biomass))
-    
-    def simulate_tick(self):
-        self.age += 1
-        event_happened = None
-        
-        # Естественные процессы
-        if self.biomass > 10:
-            self.oxygen += self.biomass * 0.02
-        if self.water > 30 and self.temperature > 20 and self.temperature < 80:
-            self.biomass += 0.1
-        if self.temperature > 100:
-            self.biomass -= 0.5
-            self.water -= 0.3
-        if self.temperature < 0:
-            self.biomass -= 0.2
-        
-        # Случайные события
-        for event_id, event in EVENTS.items():
-            if random.random() < event['chance']:
-                if self.shield > 0 and event['effects'].get('biomass', 0) < -10:
-                    self.shield -= 1
-                    event_happened = {'id': 'shield_block', 'name': 'Shield Blocked!', 
-                                     'desc': f"Blocked: {event['name']}"}
-                else:
-                    for stat, value in event['effects'].items():
-                        if stat == 'shield':
-                            continue
-                        current = getattr(self, stat, 0)
-                        setattr(self, stat, current + value)
-                    event_happened = event
-                    self.history.append({
-                        'year': self.age,
-                        'event': event['name']
-                    })
-                break
-        
-        # Обновление стадии жизни
-        self.update_life_stage()
-        
-        # Популяция
-        if self.life_stage >= 9:  # Civilization+
-            self.population = int(self.biomass * 1000000 * (self.life_stage - 8))
-        elif self.life_stage >= 5:
-            self.population = int(self.biomass * 10000)
-        else:
-            self.population = int(self.biomass * 100)
-        
-        self.clamp_stats()
-        return event_happened
-    
-    def update_life_stage(self):
-        for i in range(len(LIFE_STAGES) - 1, -1, -1):
-            stage = LIFE_STAGES[i]
-            conditions_met = True
-            for stat, min_val in stage['min_conditions'].items():
-                current = getattr(self, stat, 0)
-                if current < min_val:
-                    conditions_met = False
-                    break
-            if conditions_met:
-                if i > self.life_stage:
-                    self.history.append({
-                        'year': self.age,
-                        'event': f"Evolved to {stage['name']}!"
-                    })
-                self.life_stage = i
-                break
-    
-    def get_life_stage_name(self):
-        return LIFE_STAGES[self.life_stage]['name']
-    
-    def apply_divine_power(self, power_id):
-        if power_id not in DIVINE_POWERS:
-            return False
-        power = DIVINE_POWERS[power_id]
-        for stat, value in power['effects'].items():
-            if stat == 'shield':
-                self.shield += value
-            else:
-                current = getattr(self, stat, 0)
-                setattr(self, stat, current + value)
-        self.clamp_stats()
-        self.history.append({
-            'year': self.age,
-            'event': f"Divine: {power['name']}"
-        })
-        return True
+    # Биомасса (зелёные пятна)
+    if biomass_spots:
+        Color(0.2, 0.6, 0.2, 0.5)
+        for i in range(biomass_spots):
+            angle = (rotation * 0.5 + i * 51) * math.pi / 180
+            dist = radius * 0.4
+            x = cx + math.cos(angle) * dist - radius * 0.15
+            y = cy + math.sin(angle) * dist - radius * 0.15
+            Ellipse(pos=(x, y), size=(radius * 0.3, radius * 0.3))
+    
+    # Облака
+    if clouds:
+        Color(1, 1, 1, 0.3)
+        for i in range(3):
+            angle = (rotation * 1.5 + i * 120) * math.pi / 180
+            dist = radius * 0.6
+            x = cx + math.cos(angle) * dist - radius * 0.25
+            y = cy + math.sin(angle) * dist * 0.5
+            Ellipse(pos=(x, y), size=(radius * 0.5, radius * 0.15))
+    
+    # Атмосфера (если есть кислород)
+    if atmosphere:
+        Color(0.5, 0.7, 1.0, min(0.3, atmosphere * 5 / 200))
+        Ellipse(pos=(cx - radius * 1.1, cy - radius * 1.1),
+                size=(radius * 2.2, radius * 2.2))
+    
+    # Щит
+    if shield:
+        Color(0.3, 0.8, 1.0, 0.3)
+        Line(circle=(cx, cy, radius * 1.2), width=2)
 
 
-# ==================== ВИДЖЕТ ПЛАНЕТЫ ====================
+def render_planet_body(state, rotation, radius):
+    side = body_side(radius)
+    # Трафарет нужен Line шириной больше 1
+    fbo = Fbo(size=(side, side), with_stencilbuffer=True)
+    with fbo:
+        ClearColor(0, 0, 0, 0)
+        ClearBuffers()
+        Callback(over_blend)
+        draw_planet_body(state, rotation, side / 2, side / 2, radius)
+        Callback(default_blend)
+    fbo.texture.mag_filter = 'linear'
+    fbo.draw()
+    # После потери GL-контекста (Android) содержимое рисуется заново
+    fbo.add_reload_observer(lambda fbo: fbo.draw())
+    return fbo
+
+
+class TextureCache:
+    # LRU текстур с бюджетом памяти: вытесняются давно не выводившиеся
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, key, value, size):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.used -= old[1]
+        self.entries[key] = (value, size)
+        self.used += size
+        # Последняя запись остаётся, даже если одна не влезает в бюджет
+        while self.used > self.budget and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.used -= evicted
+            self.evictions += 1
+    
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+    
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.used, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+planet_textures = TextureCache(RENDER_CACHE['budget_mb'] << 20)
+
+
+def planet_body_texture(state, frame, radius):
+    # Кадр frame из rotation_frames; radius - уже после render_radius
+    key = (state, frame, radius)
+    fbo = planet_textures.get(key)
+    if fbo is None:
+        rotation = frame * 360 / RENDER_CACHE['rotation_frames']
+        fbo = render_planet_body(state, rotation, radius)
+        planet_textures.put(key, fbo, fbo.size[0] * fbo.size[1] * BODY_FBO_PIXEL_BYTES)
+    return fbo.texture
+
+
+class ThumbnailCache:
+    # Миниатюры для списка планет: в памяти LRU, на диске PNG с именем
+    # по хэшу состояния. Состояний конечное число, поэтому каталог не
+    # растёт без предела
+    VERSION = 1
+    
+    def __init__(self, directory, radius=None, budget=None):
+        self.directory = directory
+        self.radius = render_radius(radius or dp(RENDER_CACHE['thumbnail_radius']))
+        self.textures = TextureCache(budget or RENDER_CACHE['thumbnail_budget_mb'] << 20)
+    
+    def state_hash(self, state):
+        raw = repr((self.VERSION, self.radius, state)).encode('utf-8')
+        return hashlib.sha1(raw).hexdigest()[:20]
+    
+    def get(self, state):
+        texture = self.textures.get(state)
+        if texture is not None:
+            return texture
+        path = os.path.join(self.directory, self.state_hash(state) + '.png')
+        texture = self.load(path)
+        if texture is None:
+            fbo = render_planet_body(state, 0, self.radius)
+            texture = fbo.texture
+            self.save(texture, path)
+        self.textures.put(state, texture, texture.width * texture.height * 4)
+        return texture
+    
+    def load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return CoreImage(path, nocache=True).texture
+        except Exception:
+            return None
+    
+    def save(self, texture, path):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = path[:-4] + '.tmp.png'
+            texture.save(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
+
 
 class PlanetWidget(Widget):
-    def __init__(self, planet=None, **kwargs):
+    def __init__(self, planet=None, stars=50, **kwargs):
         super().__init__(**kwargs)
         self.planet = planet
         self.rotation = 0
-        self.stars = []
+        self.star_rng = random.Random()
+        
+        # Инструкции создаются один раз; тело планеты - две текстуры из
+        # planet_textures (кадр и следующий за ним), они меняются только
+        # при смене состояния или кадра вращения, а между кадрами
+        # меняется лишь доля смеси
+        with self.canvas:
+            Color(0.02, 0.02, 0.08, 1)
+            self.background = Rectangle(pos=self.pos, size=self.size)
+        self.star_field = StarField(stars, self.star_rng)
+        self.canvas.add(self.star_field.context)
+        self.body_context = RenderContext(fs=BODY_FS,
+                                          use_parent_projection=True,
+                                          use_parent_modelview=True)
+        self.body_context['texture1'] = 1
+        self.body_context['frame_mix'] = 0.0
+        with self.body_context:
+            Callback(premultiplied_blend)
+            self.next_body = BindTexture(index=1)
+            # При premultiplied-смешивании скрытие - чёрный цвет с нулевой альфой
+            self.body_color = Color(0, 0, 0, 0)
+            self.body = Rectangle()
+            Callback(default_blend)
+        self.canvas.add(self.body_context)
+        self.body_key = None
+        
         self.bind(size=self.setup_stars, pos=self.redraw)
-        Clock.schedule_interval(self.animate, 1/30)
+        animation_clock.register(self)
     
     def setup_stars(self, *args):
-        self.stars = []
-        for _ in range(50):
-            self.stars.append({
-                'x': random.uniform(0, self.width),
-                'y': random.uniform(0, self.height),
-                'size': random.uniform(1, 3),
-                'brightness': random.uniform(0.3, 1.0)
-            })
+        self.star_field.scatter(self.width, self.height)
         self.redraw()
     
     def animate(self, dt):
@@ -434,87 +514,36 @@ class PlanetWidget(Widget):
         self.redraw()
     
     def redraw(self, *args):
-        self.canvas.clear()
+        # Фон космоса
+        self.background.pos = self.pos
+        self.background.size = self.size
         
-        with self.canvas:
-            # Фон космоса
-            Color(0.02, 0.02, 0.08, 1)
-            Rectangle(pos=self.pos, size=self.size)
-            
-            # Звёзды
-            for star in self.stars:
-                b = star['brightness'] * (0.7 + 0.3 * math.sin(time.time() * 2 + star['x']))
-                Color(b, b, b * 1.1, 1)
-                Ellipse(
-                    pos=(self.x + star['x'], self.y + star['y']),
-                    size=(star['size'], star['size'])
-                )
-            
-            if self.planet:
-                # Планета
-                cx = self.x + self.width / 2
-                cy = self.y + self.height / 2
-                radius = min(self.width, self.height) * 0.3
-                
-                # Свечение
-                pc = self.planet.type_data['color']
-                Color(pc[0], pc[1], pc[2], 0.2)
-                Ellipse(pos=(cx - radius * 1.3, cy - radius * 1.3), 
-                       size=(radius * 2.6, radius * 2.6))
-                
-                # Основа планеты
-                Color(pc[0], pc[1], pc[2], 1)
-                Ellipse(pos=(cx - radius, cy - radius), 
-                       size=(radius * 2, radius * 2))
-                
-                # Детали на планете
-                self.draw_planet_details(cx, cy, radius)
-                
-                # Атмосфера (если есть кислород)
-                if self.planet.oxygen > 20:
-                    alpha = min(0.3, self.planet.oxygen / 200)
-                    Color(0.5, 0.7, 1.0, alpha)
-                    Ellipse(pos=(cx - radius * 1.1, cy - radius * 1.1), 
-                           size=(radius * 2.2, radius * 2.2))
-                
-                # Щит
-                if self.planet.shield > 0:
-                    Color(0.3, 0.8, 1.0, 0.3)
-                    Line(circle=(cx, cy, radius * 1.2), width=2)
-    
-    def draw_planet_details(self, cx, cy, radius):
-        if not self.planet:
-            return
+        # Звёзды
+        self.star_field.move(self.x, self.y)
+        self.star_field.update(time.time())
         
-        # Вода (синие пятна)
-        if self.planet.water > 20:
-            Color(0.1, 0.3, 0.7, 0.6)
-            for i in range(int(self.planet.water / 20)):
-                angle = (self.rotation + i * 72) * math.pi / 180
-                dist = radius * 0.5
-                x = cx + math.cos(angle) * dist - radius * 0.2
-                y = cy + math.sin(angle) * dist - radius * 0.15
-                Ellipse(pos=(x, y), size=(radius * 0.4, radius * 0.3))
-        
-        # Биомасса (зелёные пятна)
-        if self.planet.biomass > 10:
-            Color(0.2, 0.6, 0.2, 0.5)
-            for i in range(int(self.planet.biomass / 15)):
-                angle = (self.rotation * 0.5 + i * 51) * math.pi / 180
-                dist = radius * 0.4
-                x = cx + math.cos(angle) * dist - radius * 0.15
-                y = cy + math.sin(angle) * dist - radius * 0.15
-                Ellipse(pos=(x, y), size=(radius * 0.3, radius * 0.3))
-        
-        # Облака
-        if self.planet.water > 30:
-            Color(1, 1, 1, 0.3)
-            for i in range(3):
-                angle = (self.rotation * 1.5 + i * 120) * math.pi / 180
-                dist = radius * 0.6
-                x = cx + math.cos(angle) * dist - radius * 0.25
-                y = cy + math.sin(angle) * dist * 0.5
-                Ellipse(pos=(x, y), size=(radius * 0.5, radius * 0.15))
+        # Планета
+        radius = min(self.width, self.height) * 0.3
+        if not self.planet or radius < 1:
+            self.body_color.rgba = (0, 0, 0, 0)
+            self.body_key = None
+            return
+        frames = RENDER_CACHE['rotation_frames']
+        position = self.rotation * frames / 360
+        state = planet_body_state(self.planet)
+        key = (state, int(position) % frames, render_radius(radius))
+        if key != self.body_key:
+            self.body_key = key
+            self.body.texture = planet_body_texture(*key)
+            self.next_body.texture = planet_body_texture(state, (key[1] + 1) % frames, key[2])
+            self.body_color.rgba = (1, 1, 1, 1)
+        self.body_context['frame_mix'] = position - int(position)
+        
+        cx = self.x + self.width / 2
+        cy = self.y + self.height / 2
+        side = body_side(key[2]) * radius / key[2]
+        self.body.pos = (cx - side / 2, cy - side / 2)
+        self.body.size = (side, side)
 
 
 # ==================== ЭКРАНЫ ====================
@@ -757,11 +786,11 @@ class MenuScreen(BaseScreen):
         self.welcome_label.text = f"Welcome, {self.app.data_manager.current_user}!"
         self.energy_label.text = f"Divine Energy: {data.get('divine_energy', 100)}"
         
-        current = data.get('current_planet')
-        if current and current in data.get('planets', {}):
-            planet = Planet.from_dict(data['planets'][current])
-            self.planet_widget.planet = planet
-            self.planet_name_label.text = f"{planet.name} - {planet.get_life_stage_name()}"
+        # Превью рисуется по сводке - без разбора всей планеты
+        summary = self.app.data_manager.planet_index.get(data.get('current_planet'))
+        if summary:
+            self.planet_widget.planet = summary
+            self.planet_name_label.text = f"{summary.name} - {summary.get_life_stage_name()}"
         else:
             self.planet_widget.planet = None
             self.planet_name_label.text = "No planet - Create one!"
@@ -899,7 +928,6 @@ class CreatePlanetScreen(BaseScreen):
         
         type_data = PLANET_TYPES[type_id]
         self.preview.planet.type = type_id
-        self.preview.planet.type_data = type_data
         self.preview.planet.water = type_data['water']
         self.preview.planet.temperature = type_data['temp']
     
@@ -912,10 +940,7 @@ class CreatePlanetScreen(BaseScreen):
         planet_id = f"planet_{int(time.time())}"
         
         data = self.app.data_manager.user_data
-        if 'planets' not in data:
-            data['planets'] = {}
-        
-        data['planets'][planet_id] = planet.to_dict()
+        self.app.data_manager.put_planet(planet_id, planet)
         data['current_planet'] = planet_id
         data['total_planets'] = data.get('total_planets', 0) + 1
         
@@ -938,6 +963,24 @@ class CreatePlanetScreen(BaseScreen):
 
 # ==================== ИГРОВОЙ ЭКРАН ====================
 
+class ViewState:
+    # Последние выведенные на экран значения: свойство виджета
+    # присваивается, только если значение изменилось, - иначе Label
+    # заново раскладывает текст и загружает текстуру
+    def __init__(self):
+        self.shown = {}
+    
+    def changed(self, key, value):
+        if key in self.shown and self.shown[key] == value:
+            return False
+        self.shown[key] = value
+        return True
+    
+    def set(self, widget, name, value):
+        if self.changed((widget, name), value):
+            setattr(widget, name, value)
+
+
 class GameScreen(BaseScreen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
@@ -1084,6 +1127,11 @@ class GameScreen(BaseScreen):
         
         self.add_widget(layout)
         
+        # Выведенные значения; тики только помечают экран, вывод - не
+        # чаще раза за кадр
+        self.view = ViewState()
+        self.display_trigger = Clock.create_trigger(self.update_display)
+        
         Clock.schedule_interval(self.game_tick, 1.0)
     
     def create_stat_bar(self, name, color):
@@ -1105,22 +1153,32 @@ class GameScreen(BaseScreen):
         self.planet_widget.planet = planet
         self.update_display()
     
-    def update_display(self):
+    def request_display(self):
+        self.display_trigger()
+    
+    def update_display(self, *args):
         if not self.planet:
             return
+        # Скрытый экран обновится в on_pre_enter
+        if self.manager is not None and self.manager.current_screen is not self:
+            return
         
         p = self.planet
+        view = self.view
         data = self.app.data_manager.user_data
+        energy = data.get('divine_energy', 0)
         
-        self.planet_label.text = p.name
-        self.energy_label.text = f"E: {data.get('divine_energy', 0)}"
-        self.life_label.text = p.get_life_stage_name()
-        
-        pop_str = self.format_population(p.population)
-        self.age_label.text = f"Age: {p.age} years | Pop: {pop_str}"
+        view.set(self.planet_label, 'text', p.name)
+        view.set(self.energy_label, 'text', f"E: {energy}")
+        if view.changed('life_stage', p.life_stage):
+            self.life_label.text = p.get_life_stage_name()
         
-        if p.shield > 0:
-            self.age_label.text += f" | Shield: {p.shield}"
+        if view.changed('age', (p.age, p.population, p.shield)):
+            pop_str = self.format_population(p.population)
+            text = f"Age: {p.age} years | Pop: {pop_str}"
+            if p.shield > 0:
+                text += f" | Shield: {p.shield}"
+            self.age_label.text = text
         
         self.update_stat_bar(self.water_bar, 'Water', p.water)
         self.update_stat_bar(self.oxygen_bar, 'O2', p.oxygen)
@@ -1128,17 +1186,16 @@ class GameScreen(BaseScreen):
         self.update_stat_bar(self.bio_bar, 'Bio', p.biomass)
         
         # Обновить кнопки сил
-        energy = data.get('divine_energy', 0)
         for power_id, power in DIVINE_POWERS.items():
-            btn = self.power_buttons[power_id]
             if energy >= power['cost']:
-                btn.background_color = (0.3, 0.45, 0.3, 1)
+                color = (0.3, 0.45, 0.3, 1)
             else:
-                btn.background_color = (0.25, 0.25, 0.3, 1)
+                color = (0.25, 0.25, 0.3, 1)
+            view.set(self.power_buttons[power_id], 'background_color', color)
     
     def update_stat_bar(self, stat_box, name, value):
-        stat_box.label.text = f"{name}: {int(value)}"
-        stat_box.bar.value = max(0, min(100, value))
+        self.view.set(stat_box.label, 'text', f"{name}: {int(value)}")
+        self.view.set(stat_box.bar, 'value', max(0, min(100, value)))
     
     def format_population(self, pop):
         if pop >= 1000000000:
@@ -1149,19 +1206,29 @@ class GameScreen(BaseScreen):
             return f"{pop/1000:.1f}K"
         return str(pop)
     
+    def show_offline_summary(self, summary):
+        events = sum(summary['events'].values())
+        evolutions = len(summary['evolutions'])
+        self.event_label.text = (f"While away: {summary['years']} years, "
+                                 f"{events} events, {evolutions} evolutions")
+    
     def game_tick(self, dt):
-        if not self.planet or self.paused:
+        if not self.planet:
+            return
+        self.planet.last_simulated = time.time()
+        if self.paused:
             return
         
-        for _ in range(int(self.tick_speed)):
-            event = self.planet.simulate_tick()
-            
-            if event:
-                self.event_label.text = f"{event.get('name', 'Event')}: {event.get('desc', '')}"
-                # Проверка достижения
-                if 'EXTINCTION' in event.get('name', ''):
-                    if self.planet.biomass > 5:
-                        self.app.check_achievement('survivor')
+        last_event = None
+        for event in self.planet.advance(int(self.tick_speed)):
+            last_event = event
+            # Проверка достижения
+            if 'EXTINCTION' in event.get('name', ''):
+                if self.planet.biomass > 5:
+                    self.app.check_achievement('survivor')
+        # На высокой скорости за тик бывает несколько событий - видно последнее
+        if last_event is not None:
+            self.event_label.text = f"{last_event.get('name', 'Event')}: {last_event.get('desc', '')}"
         
         # Генерация энергии
         data = self.app.data_manager.user_data
@@ -1175,7 +1242,7 @@ class GameScreen(BaseScreen):
         if self.planet.age % 100 == 0:
             self.save_planet()
         
-        self.update_display()
+        self.request_display()
     
     def check_game_achievements(self):
         p = self.planet
@@ -1221,7 +1288,7 @@ class GameScreen(BaseScreen):
         if data['divine_uses'] >= 50:
             self.app.check_achievement('divine_50')
         
-        self.update_display()
+        self.request_display()
     
     def toggle_pause(self):
         self.paused = not self.paused
@@ -1237,7 +1304,7 @@ class GameScreen(BaseScreen):
         data = self.app.data_manager.user_data
         current = data.get('current_planet')
         if current:
-            data['planets'][current] = self.planet.to_dict()
+            self.app.data_manager.put_planet(current, self.planet)
         self.app.data_manager.save_current_user()
     
     def go_back(self):
@@ -1246,12 +1313,88 @@ class GameScreen(BaseScreen):
         self.manager.current = 'menu'
 
 
+# ==================== СПИСКИ ====================
+
+class ListRow(RecycleDataViewBehavior, Button):
+    # Строка RecycleView: экземпляры создаются только для видимых строк
+    # и переиспользуются при прокрутке
+    row_id = ObjectProperty(None, allownone=True)
+    owner = ObjectProperty(None, allownone=True)
+    # Состояние тела планеты (planet_body_state) для миниатюры слева
+    thumbnail = ObjectProperty(None, allownone=True)
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('background_normal', '')
+        kwargs.setdefault('halign', 'left')
+        kwargs.setdefault('valign', 'middle')
+        super().__init__(**kwargs)
+        with self.canvas.after:
+            Callback(premultiplied_blend)
+            self.thumb_color = Color(0, 0, 0, 0)
+            self.thumb_rect = Rectangle()
+            Callback(default_blend)
+        self.bind(pos=self.update_thumbnail, size=self.update_thumbnail)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        self.thumbnail = None
+        super().refresh_view_attrs(rv, index, data)
+        self.update_thumbnail()
+    
+    def update_thumbnail(self, *args):
+        texture = None
+        if self.thumbnail is not None and self.owner is not None:
+            texture = self.owner.get_thumbnail(self.thumbnail)
+        if texture is None:
+            self.thumb_color.rgba = (0, 0, 0, 0)
+            self.padding = (0, 0, 0, 0)
+            return
+        self.thumb_color.rgba = (1, 1, 1, 1)
+        self.thumb_rect.texture = texture
+        self.thumb_rect.pos = (self.x, self.y)
+        self.thumb_rect.size = (self.height, self.height)
+        self.padding = (self.height, 0, 0, 0)
+    
+    def on_release(self):
+        if self.owner is not None and self.row_id is not None:
+            self.owner.on_row(self.row_id)
+
+
+def make_list_view(row_height, spacing):
+    rv = RecycleView(size_hint=(1, 1))
+    layout = RecycleBoxLayout(
+        orientation='vertical',
+        default_size=(None, row_height),
+        default_size_hint=(1, None),
+        size_hint_y=None,
+        spacing=spacing,
+        padding=dp(5)
+    )
+    layout.bind(minimum_height=layout.setter('height'))
+    rv.add_widget(layout)
+    # viewclass хранится в layout manager, поэтому задаётся после add_widget
+    rv.viewclass = ListRow
+    return rv
+
+
 # ==================== МОИ ПЛАНЕТЫ ====================
 
+PLANET_SORTS = [
+    ('Newest', None, True),
+    ('Stage', 'life_stage', True),
+    ('Age', 'age', True),
+    ('Name', 'name', False),
+]
+AGE_FILTERS = [('Any age', 0), ('100+', 100), ('1000+', 1000), ('10000+', 10000)]
+ALL_STAGES = 'All stages'
+
+
 class PlanetsScreen(BaseScreen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
         self.app = app
+        self.sort_index = 0
+        self.age_index = 0
+        self.list_state = ListState()
         
         layout = BoxLayout(orientation='vertical', padding=dp(15), spacing=dp(10))
         
@@ -1262,11 +1405,38 @@ class PlanetsScreen(BaseScreen):
             color=(0.5, 0.7, 1, 1)
         ))
         
-        self.scroll = ScrollView(size_hint=(1, 0.8))
-        self.grid = GridLayout(cols=1, spacing=dp(8), size_hint_y=None, padding=dp(5))
-        self.grid.bind(minimum_height=self.grid.setter('height'))
-        self.scroll.add_widget(self.grid)
-        layout.add_widget(self.scroll)
+        # Сортировка и фильтры
+        controls = BoxLayout(size_hint=(1, 0.07), spacing=dp(5))
+        self.sort_btn = Button(
+            font_size=sp(12),
+            background_color=(0.25, 0.25, 0.35, 1),
+            background_normal=''
+        )
+        self.sort_btn.bind(on_release=lambda x: self.cycle_sort())
+        controls.add_widget(self.sort_btn)
+        
+        self.stage_spinner = Spinner(
+            text=ALL_STAGES,
+            values=[ALL_STAGES] + [stage['name'] for stage in LIFE_STAGES],
+            font_size=sp(12),
+            background_color=(0.25, 0.25, 0.35, 1),
+            background_normal=''
+        )
+        self.stage_spinner.bind(text=lambda *args: self.refresh_list())
+        controls.add_widget(self.stage_spinner)
+        
+        self.age_btn = Button(
+            font_size=sp(12),
+            background_color=(0.25, 0.25, 0.35, 1),
+            background_normal=''
+        )
+        self.age_btn.bind(on_release=lambda x: self.cycle_age())
+        controls.add_widget(self.age_btn)
+        layout.add_widget(controls)
+        
+        self.list_view = make_list_view(dp(70), dp(8))
+        self.list_view.size_hint = (1, 0.73)
+        layout.add_widget(self.list_view)
         
         back_btn = Button(
             text='< BACK',
@@ -1279,43 +1449,76 @@ class PlanetsScreen(BaseScreen):
         layout.add_widget(back_btn)
         
         self.add_widget(layout)
+        self.update_controls()
     
     def on_pre_enter(self):
         self.refresh_list()
     
+    def update_controls(self):
+        self.sort_btn.text = f"Sort: {PLANET_SORTS[self.sort_index][0]}"
+        self.age_btn.text = AGE_FILTERS[self.age_index][0]
+    
+    def cycle_sort(self):
+        self.sort_index = (self.sort_index + 1) % len(PLANET_SORTS)
+        self.update_controls()
+        self.refresh_list()
+    
+    def cycle_age(self):
+        self.age_index = (self.age_index + 1) % len(AGE_FILTERS)
+        self.update_controls()
+        self.refresh_list()
+    
     def refresh_list(self):
-        self.grid.clear_widgets()
         data = self.app.data_manager.user_data
-        planets = data.get('planets', {})
+        if not data:
+            return
+        index = self.app.data_manager.planet_index
         current = data.get('current_planet')
+        stage_name = self.stage_spinner.text
         
-        if not planets:
-            self.grid.add_widget(Label(
-                text='No planets yet!\nCreate your first world.',
-                font_size=sp(16),
-                size_hint_y=None,
-                height=dp(80)
-            ))
+        # Ничего не менялось с прошлого входа - список уже актуален
+        if not self.list_state.changed(index, current, self.sort_index, stage_name,
+                                       self.age_index):
             return
         
-        for planet_id, planet_data in planets.items():
-            planet = Planet.from_dict(planet_data)
-            
-            is_current = planet_id == current
-            bg_color = (0.25, 0.35, 0.25, 1) if is_current else (0.2, 0.2, 0.25, 1)
-            
-            btn = Button(
-                text=f"{planet.name}\n{planet.get_life_stage_name()} | Age: {planet.age}\nPop: {planet.population:,}",
-                font_size=sp(13),
-                size_hint_y=None,
-                height=dp(70),
-                background_color=bg_color,
-                background_normal='',
-                halign='left',
-                valign='middle'
-            )
-            btn.bind(on_release=lambda x, pid=planet_id: self.select_planet(pid))
-            self.grid.add_widget(btn)
+        if not len(index):
+            apply_rows(self.list_view, [{
+                'text': 'No planets yet!\nCreate your first world.',
+                'font_size': sp(16),
+                'background_color': (0, 0, 0, 0),
+                'row_id': None,
+                'owner': None,
+                'thumbnail': None,
+            }])
+            return
+        
+        stage = None
+        if stage_name != ALL_STAGES:
+            stage = [s['name'] for s in LIFE_STAGES].index(stage_name)
+        min_age = AGE_FILTERS[self.age_index][1]
+        
+        def where(planet):
+            return planet.age >= min_age and (stage is None or planet.life_stage == stage)
+        
+        _, sort, reverse = PLANET_SORTS[self.sort_index]
+        rows = []
+        for planet in index.query(sort=sort, reverse=reverse, where=where):
+            is_current = planet.id == current
+            rows.append({
+                'text': f"{planet.name}\n{planet.get_life_stage_name()} | Age: {planet.age}\nPop: {planet.population:,}",
+                'font_size': sp(13),
+                'background_color': (0.25, 0.35, 0.25, 1) if is_current else (0.2, 0.2, 0.25, 1),
+                'row_id': planet.id,
+                'owner': self,
+                'thumbnail': planet_body_state(planet),
+            })
+        apply_rows(self.list_view, rows)
+    
+    def get_thumbnail(self, state):
+        return self.app.thumbnails.get(state)
+    
+    def on_row(self, planet_id):
+        self.select_planet(planet_id)
     
     def select_planet(self, planet_id):
         data = self.app.data_manager.user_data
@@ -1346,11 +1549,9 @@ class AchievementsScreen(BaseScreen):
             color=(1, 0.8, 0.3, 1)
         ))
         
-        self.scroll = ScrollView(size_hint=(1, 0.8))
-        self.grid = GridLayout(cols=1, spacing=dp(5), size_hint_y=None, padding=dp(5))
-        self.grid.bind(minimum_height=self.grid.setter('height'))
-        self.scroll.add_widget(self.grid)
-        layout.add_widget(self.scroll)
+        self.list_view = make_list_view(dp(55), dp(5))
+        self.list_view.size_hint = (1, 0.8)
+        layout.add_widget(self.list_view)
         
         back_btn = Button(
             text='< BACK',
@@ -1368,10 +1569,10 @@ class AchievementsScreen(BaseScreen):
         self.refresh_list()
     
     def refresh_list(self):
-        self.grid.clear_widgets()
         data = self.app.data_manager.user_data
         unlocked = data.get('achievements', [])
         
+        rows = []
         for ach_id, ach in ACHIEVEMENTS.items():
             is_unlocked = ach_id in unlocked
             
@@ -1382,16 +1583,14 @@ class AchievementsScreen(BaseScreen):
                 text = f"[??] {ach['name']}\n{ach['desc']} | +{ach['reward']} Energy"
                 color = (0.2, 0.2, 0.25, 1)
             
-            lbl = Button(
-                text=text,
-                font_size=sp(12),
-                size_hint_y=None,
-                height=dp(55),
-                background_color=color,
-                background_normal='',
-                halign='left'
-            )
-            self.grid.add_widget(lbl)
+            rows.append({
+                'text': text,
+                'font_size': sp(12),
+                'background_color': color,
+                'row_id': None,
+                'owner': None,
+            })
+        apply_rows(self.list_view, rows)
     
     def go_back(self):
         self.manager.transition = SlideTransition(direction='right')
@@ -1404,6 +1603,9 @@ class PocketUniverseApp(App):
     def build(self):
         self.title = 'Pocket Universe'
         self.data_manager = DataManager()
+        self.catch_up_event = None
+        self.thumbnails = ThumbnailCache(
+            os.path.join(self.data_manager.data_path, 'pu_thumbs'))
         
         self.sm = ScreenManager(transition=FadeTransition())
         
@@ -1420,6 +1622,7 @@ class PocketUniverseApp(App):
         self.sm.add_widget(self.game_screen)
         self.sm.add_widget(self.planets_screen)
         self.sm.add_widget(self.achievements_screen)
+        animation_clock.attach(self.sm)
         
         return self.sm
     
@@ -1430,8 +1633,36 @@ class PocketUniverseApp(App):
     def load_planet(self, planet_id):
         data = self.data_manager.user_data
         if planet_id in data.get('planets', {}):
+            # Недоигранная перемотка прошлой загрузки бросается: её планета
+            # не сохранялась, а журнал и запись статов подрежутся по возрасту
+            if self.catch_up_event is not None:
+                self.catch_up_event.cancel()
+                self.catch_up_event = None
             planet = Planet.from_dict(data['planets'][planet_id])
+            self.data_manager.attach_event_log(planet_id, planet)
+            self.data_manager.attach_recorder(planet_id, planet)
+            if not OFFLINE_PROGRESS['enabled']:
+                self.game_screen.set_planet(planet)
+                return
+            # Офлайн-прогресс перематывается по куску за кадр: до 10000 лет
+            # с записью статов одним вызовом заметно подвешивают интерфейс.
+            # Экран получает планету, когда перемотка закончится
+            self.game_screen.set_planet(None)
+            self.game_screen.event_label.text = "Catching up..."
+            self.step_catch_up(planet, planet.catch_up_steps())
+    
+    def step_catch_up(self, planet, steps):
+        try:
+            next(steps)
+        except StopIteration as done:
+            self.catch_up_event = None
+            self.game_screen.event_label.text = ''
             self.game_screen.set_planet(planet)
+            if done.value['years']:
+                self.game_screen.show_offline_summary(done.value)
+            return
+        self.catch_up_event = Clock.schedule_once(
+            lambda dt: self.step_catch_up(planet, steps))
     
     def check_achievement(self, ach_id):
         data = self.data_manager.user_data
@@ -1443,10 +1674,22 @@ class PocketUniverseApp(App):
             data['divine_energy'] = data.get('divine_energy', 0) + reward
             self.data_manager.save_current_user()
     
+    def on_pause(self):
+        animation_clock.pause()
+        # Android может выгрузить приложение из фона без on_stop
+        if self.game_screen.planet:
+            self.game_screen.save_planet()
+        self.data_manager.flush()
+        return True
+    
+    def on_resume(self):
+        animation_clock.resume()
+    
     def on_stop(self):
         if self.game_screen.planet:
             self.game_screen.save_planet()
         self.data_manager.save_current_user()
+        self.data_manager.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,29 @@
+"""
+Ядро POCKET UNIVERSE без зависимостей от Kivy: конфигурация,
+модель планеты, пакетная симуляция и хранение данных.
+"""
+
+from .config import (
+    LIFE_STAGES, EVENTS, DIVINE_POWERS, ACHIEVEMENTS, PLANET_TYPES, OFFLINE_PROGRESS,
+    STORAGE, HISTORY, TIMESERIES, ANIMATION, RENDER_CACHE,
+)
+from .rng import PlanetRandom
+from .planet import STATS, EventTable, EVENT_TABLE, StageResolver, STAGE_RESOLVER, Planet
+from .eventlog import EventLog
+from .timeseries import StatRecorder
+from .summary import (
+    SUMMARY_FIELDS, PlanetSummary, PlanetIndex, ListState, apply_rows, summary_data,
+)
+from .snapshot import PlanetSnapshot, encode_planet, decode_planet
+from .storage import (
+    get_data_path, hash_pin, normalize_username, DocumentCache, JsonBackend, open_backend,
+    DataManager,
+)
+
+
+def __getattr__(name):
+    # PlanetBatch тянет NumPy, поэтому импортируется только по запросу
+    if name == 'PlanetBatch':
+        from .batch import PlanetBatch
+        return PlanetBatch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
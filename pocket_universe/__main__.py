@@ -0,0 +1,73 @@
+"""
+Безоконный запуск симуляции сохранённых планет пользователей.
+
+    python -m pocket_universe --years 1000
+    python -m pocket_universe --user Alice --catch-up --save
+"""
+
+import argparse
+import time
+
+from .planet import Planet
+from .storage import DataManager
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pocket_universe',
+        description='Simulate saved planets without the Kivy UI.')
+    parser.add_argument('--data', help='data directory (default: app data path)')
+    parser.add_argument('--user', action='append', help='only simulate this user (repeatable)')
+    parser.add_argument('--years', type=int, default=0, help='years to advance every planet')
+    parser.add_argument('--catch-up', action='store_true',
+                        help='apply offline progress since the last simulation')
+    parser.add_argument('--save', action='store_true', help='write the results back')
+    return parser.parse_args(argv)
+
+
+def simulate_user(user_data, years, catch_up, manager=None, username=None):
+    # С manager история планет уходит в их журналы событий, как в приложении
+    results = []
+    for planet_id, planet_data in user_data.get('planets', {}).items():
+        planet = Planet.from_dict(planet_data)
+        if manager is not None:
+            manager.attach_event_log(planet_id, planet, username)
+        start = time.perf_counter()
+        events = 0
+        if catch_up:
+            events += sum(planet.catch_up()['events'].values())
+        if years:
+            events += len(planet.advance(years))
+            planet.last_simulated = time.time()
+        user_data['planets'][planet_id] = planet.to_dict()
+        results.append((planet_id, planet, events, time.perf_counter() - start))
+    if manager is not None:
+        manager.close_event_log()
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Без --save запуск ничего не пишет, в том числе не переносит старые данные
+    manager = DataManager(args.data, migrate=args.save)
+    names = args.user or manager.usernames()
+    for name in names:
+        name = manager.find_user(name) or name
+        user_data = manager.load_user(name)
+        if user_data is None:
+            print(f"{name}: user not found")
+            continue
+        # Журналы пишутся только вместе с сохранением планет
+        archive = manager if args.save else None
+        for planet_id, planet, events, elapsed in simulate_user(
+                user_data, args.years, args.catch_up, archive, name):
+            print(f"{name}/{planet_id}: {planet.name} - {planet.get_life_stage_name()} | "
+                  f"Age: {planet.age} | Pop: {planet.population:,} | "
+                  f"Events: {events} | {elapsed * 1000:.1f} ms")
+        if args.save:
+            manager.save_user(name, user_data)
+    manager.close()
+
+
+if __name__ == '__main__':
+    main()
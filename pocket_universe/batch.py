@@ -0,0 +1,204 @@
+"""
+Пакетная симуляция множества планет на NumPy.
+
+Пакет копит события и смены стадий каждого шага, а для планет с
+подключённым StatRecorder - ещё и статы каждого года; write_back
+передаёт их в add_history (history и history_log) и в recorder, как
+если бы планеты прошли те же годы через simulate_tick.
+"""
+
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .config import LIFE_STAGES
+from .planet import STATS, EVENT_TABLE, STAGE_RESOLVER
+from .rng import GOLDEN_GAMMA
+
+
+# ==================== ПАКЕТНАЯ СИМУЛЯЦИЯ ====================
+
+def _mix64(z):
+    # rng.mix64 для массива uint64: умножение по модулю 2**64
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+# Замер года для StatRecorder.record: те же поля, что он читает у планеты
+_Sample = namedtuple('_Sample', ('age',) + STATS + ('population',))
+
+
+class PlanetBatch:
+    def __init__(self, planets=()):
+        if np is None:
+            raise RuntimeError("PlanetBatch requires numpy")
+        planets = list(planets)
+        # Потоки PlanetRandom всех планет: step() берёт следующий бросок
+        # каждой, как Planet.simulate_tick
+        self.rng_seed = np.array([p.rng.seed for p in planets], dtype=np.uint64)
+        self.rng_counter = np.array([p.rng.counter for p in planets], dtype=np.uint64)
+        # Шаги с готовыми draws идут мимо потоков: такие планеты replay
+        # повторить не сможет
+        self.external_draws = False
+
+        self.water = np.array([p.water for p in planets], dtype=np.float64)
+        self.oxygen = np.array([p.oxygen for p in planets], dtype=np.float64)
+        self.temperature = np.array([p.temperature for p in planets], dtype=np.float64)
+        self.biomass = np.array([p.biomass for p in planets], dtype=np.float64)
+        self.age = np.array([p.age for p in planets], dtype=np.int64)
+        self.life_stage = np.array([p.life_stage for p in planets], dtype=np.int64)
+        self.population = np.array([p.population for p in planets], dtype=np.int64)
+        self.shield = np.array([p.shield for p in planets], dtype=np.int64)
+
+        # Таблицы событий: накопленные вероятности, эффекты и флаг "щит блокирует"
+        self.event_cumulative = np.array(EVENT_TABLE.cumulative)
+        self.event_effects = np.array(EVENT_TABLE.effects, dtype=np.float64)
+        self.event_blockable = np.array(EVENT_TABLE.blockable)
+
+        # Скомпилированная таблица стадий жизни
+        self.stage_levels = [np.array(levels, dtype=np.float64)
+                             for levels in STAGE_RESOLVER.levels]
+        self.stage_table = np.array(STAGE_RESOLVER.table, dtype=np.int64)
+
+        n = len(planets)
+        self.last_event = np.full(n, -1, dtype=np.int64)
+        self.last_blocked = np.zeros(n, dtype=bool)
+        self.last_evolved = np.zeros(n, dtype=bool)
+
+        # Записи истории по шагам: (планета, год, текст) в порядке add_history
+        self.history_entries = []
+        # Статы после каждого шага, только для планет с recorder
+        self.recorded = np.array([i for i, p in enumerate(planets) if p.recorder is not None],
+                                 dtype=np.int64)
+        self.samples = []
+
+    def __len__(self):
+        return len(self.age)
+
+    def stats_matrix(self):
+        return np.stack([getattr(self, stat) for stat in STATS], axis=1)
+
+    def random(self):
+        # PlanetRandom.random для всех планет сразу
+        self.rng_counter += np.uint64(1)
+        z = _mix64(self.rng_seed + self.rng_counter * np.uint64(GOLDEN_GAMMA))
+        return (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    def step(self, draws=None):
+        # draws — по одному равномерному числу на планету; draws[i]
+        # соответствует вызову random.random() в Planet.simulate_tick.
+        # Без draws броски берутся из потоков планет
+        if draws is None:
+            draws = self.random()
+        else:
+            self.external_draws = True
+        self.age += 1
+
+        # Естественные процессы
+        b = self.biomass
+        self.oxygen += np.where(b > 10, b * 0.02, 0.0)
+        growing = (self.water > 30) & (self.temperature > 20) & (self.temperature < 80)
+        hot = self.temperature > 100
+        cold = self.temperature < 0
+        self.biomass += np.where(growing, 0.1, 0.0)
+        self.biomass -= np.where(hot, 0.5, 0.0)
+        self.water -= np.where(hot, 0.3, 0.0)
+        self.biomass -= np.where(cold, 0.2, 0.0)
+
+        # Случайные события: поиск по накопленным вероятностям
+        first = np.searchsorted(self.event_cumulative, draws, side='right')
+        happened = first < len(self.event_cumulative)
+        first = np.where(happened, first, -1)
+        blocked = happened & (self.shield > 0) & self.event_blockable[first]
+        applied = happened & ~blocked
+        self.shield -= blocked
+        deltas = self.event_effects[first] * applied[:, None]
+        for i, stat in enumerate(STATS):
+            values = getattr(self, stat)
+            values += deltas[:, i]
+        self.last_event = first
+        self.last_blocked = blocked
+
+        # Обновление стадии жизни
+        previous = self.life_stage
+        self.update_life_stage()
+        self.last_evolved = self.life_stage > previous
+
+        # Популяция
+        stage = self.life_stage
+        self.population = np.where(
+            stage >= 9,
+            (self.biomass * 1000000 * (stage - 8)).astype(np.int64),
+            np.where(
+                stage >= 5,
+                (self.biomass * 10000).astype(np.int64),
+                (self.biomass * 100).astype(np.int64),
+            ),
+        )
+
+        self.clamp_stats()
+        self.collect(applied)
+        return first
+
+    def collect(self, applied):
+        # Как в _tick: сначала запись события, потом смена стадии
+        entries = self.history_entries
+        for i in np.flatnonzero(applied | self.last_evolved).tolist():
+            year = int(self.age[i])
+            if applied[i]:
+                entries.append((i, year, EVENT_TABLE.events[self.last_event[i]]['name']))
+            if self.last_evolved[i]:
+                stage = LIFE_STAGES[self.life_stage[i]]['name']
+                entries.append((i, year, f"Evolved to {stage}!"))
+        if len(self.recorded):
+            rows = self.recorded
+            self.samples.append(np.stack(
+                [self.age[rows]] + [getattr(self, stat)[rows] for stat in STATS]
+                + [self.population[rows]], axis=1).tolist())
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            self.step()
+
+    def update_life_stage(self):
+        index = np.zeros(len(self), dtype=np.int64)
+        for levels, size, stat in zip(self.stage_levels, STAGE_RESOLVER.sizes, STATS):
+            index = index * size + np.searchsorted(levels, getattr(self, stat), side='right')
+        self.life_stage = self.stage_table[index]
+
+    def clamp_stats(self):
+        np.clip(self.water, 0, 100, out=self.water)
+        np.clip(self.oxygen, 0, 100, out=self.oxygen)
+        np.clip(self.temperature, -50, 150, out=self.temperature)
+        np.clip(self.biomass, 0, 100, out=self.biomass)
+
+    def write_back(self, planets):
+        for i, p in enumerate(planets):
+            p.water = float(self.water[i])
+            p.oxygen = float(self.oxygen[i])
+            p.temperature = float(self.temperature[i])
+            p.biomass = float(self.biomass[i])
+            p.age = int(self.age[i])
+            p.life_stage = int(self.life_stage[i])
+            p.population = int(self.population[i])
+            p.shield = int(self.shield[i])
+            p.rng.counter = int(self.rng_counter[i])
+            # Как после simulate_tick: расписание advance разыгрывается заново
+            p._next_event = None
+            p.mark_step_mode('mixed' if self.external_draws else 'tick')
+
+        for i, year, event in self.history_entries:
+            planets[i].add_history({'year': year, 'event': event})
+        for column, i in enumerate(self.recorded.tolist()):
+            recorder = planets[i].recorder
+            for row in self.samples:
+                age, water, oxygen, temperature, biomass, population = row[column]
+                recorder.record(_Sample(int(age), water, oxygen, temperature, biomass,
+                                        int(population)))
+        # Повторный write_back не должен дублировать историю
+        self.history_entries = []
+        self.samples = []
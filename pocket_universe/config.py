@@ -0,0 +1,175 @@
+"""
+Конфигурация мира: стадии жизни, события, божественные силы,
+достижения и типы планет.
+"""
+
+
+# ==================== КОНФИГУРАЦИЯ ====================
+
+LIFE_STAGES = [
+    {'name': 'Lifeless', 'icon': '.', 'min_conditions': {}},
+    {'name': 'Bacteria', 'icon': '*', 'min_conditions': {'water': 10, 'temperature': 20}},
+    {'name': 'Algae', 'icon': '~', 'min_conditions': {'water': 25, 'oxygen': 5, 'temperature': 25}},
+    {'name': 'Plants', 'icon': 'Y', 'min_conditions': {'water': 35, 'oxygen': 15, 'temperature': 30}},
+    {'name': 'Insects', 'icon': 'x', 'min_conditions': {'water': 40, 'oxygen': 25, 'biomass': 20}},
+    {'name': 'Fish', 'icon': '>', 'min_conditions': {'water': 50, 'oxygen': 30, 'biomass': 30}},
+    {'name': 'Reptiles', 'icon': 'S', 'min_conditions': {'water': 45, 'oxygen': 40, 'biomass': 40}},
+    {'name': 'Mammals', 'icon': 'M', 'min_conditions': {'water': 50, 'oxygen': 50, 'biomass': 50}},
+    {'name': 'Primates', 'icon': 'P', 'min_conditions': {'water': 55, 'oxygen': 55, 'biomass': 60}},
+    {'name': 'Civilization', 'icon': 'A', 'min_conditions': {'water': 50, 'oxygen': 60, 'biomass': 70}},
+    {'name': 'Industrial', 'icon': 'I', 'min_conditions': {'water': 45, 'oxygen': 55, 'biomass': 65}},
+    {'name': 'Space Age', 'icon': 'V', 'min_conditions': {'water': 40, 'oxygen': 50, 'biomass': 60}},
+    {'name': 'Galactic', 'icon': '@', 'min_conditions': {'water': 40, 'oxygen': 50, 'biomass': 55}},
+]
+
+EVENTS = {
+    'meteor_small': {
+        'name': 'Small Meteor',
+        'desc': 'A small meteor strikes!',
+        'effects': {'biomass': -5, 'temperature': 2},
+        'chance': 0.03
+    },
+    'meteor_large': {
+        'name': 'EXTINCTION EVENT',
+        'desc': 'Massive asteroid impact!',
+        'effects': {'biomass': -40, 'temperature': -15, 'oxygen': -10},
+        'chance': 0.005
+    },
+    'volcano': {
+        'name': 'Volcanic Eruption',
+        'desc': 'Volcanoes release gases',
+        'effects': {'temperature': 3, 'oxygen': -2, 'biomass': -3},
+        'chance': 0.02
+    },
+    'ice_age': {
+        'name': 'Ice Age Begins',
+        'desc': 'Global cooling event',
+        'effects': {'temperature': -20, 'water': -10, 'biomass': -15},
+        'chance': 0.008
+    },
+    'solar_flare': {
+        'name': 'Solar Flare',
+        'desc': 'Intense radiation!',
+        'effects': {'temperature': 10, 'biomass': -8},
+        'chance': 0.015
+    },
+    'evolution_boost': {
+        'name': 'Evolution Leap!',
+        'desc': 'Rapid mutation event',
+        'effects': {'biomass': 15},
+        'chance': 0.02
+    },
+    'ocean_bloom': {
+        'name': 'Ocean Bloom',
+        'desc': 'Algae explosion!',
+        'effects': {'oxygen': 8, 'biomass': 5},
+        'chance': 0.025
+    },
+    'magnetic_shift': {
+        'name': 'Magnetic Reversal',
+        'desc': 'Poles are shifting',
+        'effects': {'biomass': -5},
+        'chance': 0.01
+    },
+}
+
+DIVINE_POWERS = {
+    'rain': {
+        'name': 'Divine Rain',
+        'desc': '+15 Water',
+        'cost': 20,
+        'effects': {'water': 15}
+    },
+    'sunlight': {
+        'name': 'Blessed Sun',
+        'desc': '+10 Temperature',
+        'cost': 15,
+        'effects': {'temperature': 10}
+    },
+    'breath': {
+        'name': 'Breath of Life',
+        'desc': '+20 Oxygen',
+        'cost': 30,
+        'effects': {'oxygen': 20}
+    },
+    'seed': {
+        'name': 'Genesis Seed',
+        'desc': '+25 Biomass',
+        'cost': 40,
+        'effects': {'biomass': 25}
+    },
+    'shield': {
+        'name': 'Divine Shield',
+        'desc': 'Block next disaster',
+        'cost': 50,
+        'effects': {'shield': 1}
+    },
+    'miracle': {
+        'name': 'Miracle',
+        'desc': '+10 to all stats',
+        'cost': 100,
+        'effects': {'water': 10, 'oxygen': 10, 'temperature': 5, 'biomass': 10}
+    },
+}
+
+ACHIEVEMENTS = {
+    'creator': {'name': 'Creator', 'desc': 'Create your first planet', 'reward': 50},
+    'life_giver': {'name': 'Life Giver', 'desc': 'Evolve to Bacteria', 'reward': 30},
+    'gardener': {'name': 'Gardener', 'desc': 'Evolve to Plants', 'reward': 50},
+    'shepherd': {'name': 'Shepherd', 'desc': 'Evolve to Mammals', 'reward': 100},
+    'civilization': {'name': 'Civilization', 'desc': 'Reach Civilization', 'reward': 200},
+    'space_age': {'name': 'Space Age', 'desc': 'Reach Space Age', 'reward': 500},
+    'galactic': {'name': 'Galactic Empire', 'desc': 'Reach Galactic stage', 'reward': 1000},
+    'survivor': {'name': 'Survivor', 'desc': 'Survive an extinction event', 'reward': 150},
+    'balance': {'name': 'Balance', 'desc': 'All stats above 50', 'reward': 100},
+    'ancient': {'name': 'Ancient World', 'desc': 'Planet age > 1000 years', 'reward': 200},
+    'multiverse': {'name': 'Multiverse', 'desc': 'Create 3 planets', 'reward': 300},
+    'divine_10': {'name': 'Minor God', 'desc': 'Use 10 divine powers', 'reward': 100},
+    'divine_50': {'name': 'Major God', 'desc': 'Use 50 divine powers', 'reward': 300},
+}
+
+PLANET_TYPES = {
+    'terra': {'name': 'Terra', 'color': (0.2, 0.5, 0.3), 'water': 50, 'temp': 50},
+    'ocean': {'name': 'Ocean World', 'color': (0.1, 0.3, 0.7), 'water': 80, 'temp': 40},
+    'desert': {'name': 'Desert World', 'color': (0.7, 0.5, 0.2), 'water': 20, 'temp': 70},
+    'ice': {'name': 'Ice World', 'color': (0.7, 0.8, 0.9), 'water': 60, 'temp': 10},
+    'volcanic': {'name': 'Volcanic World', 'color': (0.5, 0.2, 0.1), 'water': 15, 'temp': 85},
+}
+
+OFFLINE_PROGRESS = {
+    'enabled': True,
+    'years_per_second': 1,  # как game_tick на скорости 1x
+    'max_years': 10000,
+    'chunk_years': 1000,  # лет перемотки за кадр при загрузке планеты
+}
+
+STORAGE = {
+    'backend': 'sqlite',  # 'sqlite' или 'json' (файл на пользователя)
+}
+
+HISTORY = {
+    'memory': 50,               # записей в Planet.history (и в сохранении)
+    'segment_entries': 1000,    # записей в сегменте журнала до ротации
+    'compact_entries': 20000,   # размер сегмента после слияния
+    'max_small_segments': 8,    # сколько мелких сегментов копить до слияния
+}
+
+TIMESERIES = {
+    # (лет в корзине, корзин): 1000 лет по годам, 100 тысяч лет по
+    # векам и 10 миллионов лет по 10 тысяч лет
+    'levels': [(1, 1000), (100, 1000), (10000, 1000)],
+}
+
+ANIMATION = {
+    'fps': 30,            # предел частоты кадров PlanetWidget
+    'low_power': False,   # экономный режим: кадры реже
+    'low_power_fps': 10,
+}
+
+RENDER_CACHE = {
+    'rotation_frames': 60,       # кадров тела планеты на оборот
+    'max_side': 384,             # предел стороны текстуры тела, px
+    'budget_mb': 48,             # память под текстуры тел (LRU)
+    'thumbnail_radius': 24,      # радиус планеты на миниатюре списка, dp
+    'thumbnail_budget_mb': 4,
+}
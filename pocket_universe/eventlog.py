@@ -0,0 +1,248 @@
+"""
+Журнал событий планеты: вся история, которая не помещается в
+кольцевой буфер Planet.history.
+
+Журнал - каталог с сегментами в формате JSON lines и manifest.json
+с годами каждого сегмента. Запись идёт только в конец последнего
+сегмента; заполненный сегмент закрывается и начинается новый. Манифест
+сохраняется и мелкие закрытые сегменты сливаются в крупные только в
+flush/close, а не при записи, которая идёт из тика симуляции. Запрос по
+диапазону лет открывает только пересекающиеся сегменты и читает их
+построчно.
+"""
+
+import json
+import os
+
+from .config import HISTORY
+from .saver import write_json_atomic
+
+
+_encode = json.JSONEncoder().encode
+
+class EventLog:
+    def __init__(self, path, segment_entries=None, compact_entries=None, max_small_segments=None):
+        self.path = path
+        self.manifest_file = os.path.join(path, 'manifest.json')
+        self.segment_entries = segment_entries or HISTORY['segment_entries']
+        self.compact_entries = compact_entries or HISTORY['compact_entries']
+        self.max_small_segments = max_small_segments or HISTORY['max_small_segments']
+        # Сегмент: {'file', 'first', 'last', 'count'}; последний открыт для записи
+        self.segments = []
+        self.next_id = 1
+        self._file = None
+        self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+            self.segments, self.next_id = manifest['segments'], manifest['next_id']
+        except (OSError, ValueError, KeyError):
+            pass
+        # Сегменты, начатые после последнего сохранения манифеста
+        listed = len(self.segments)
+        while os.path.exists(os.path.join(self.path, f"{self.next_id:08d}.jsonl")):
+            self._new_segment()
+        # Записи после последнего сохранения манифеста
+        for segment in self.segments[max(0, listed - 1):]:
+            self._recount(segment)
+
+    def _recount(self, segment):
+        count = 0
+        first = last = None
+        for entry in self._read_segment(segment):
+            if first is None:
+                first = entry['year']
+            last = entry['year']
+            count += 1
+        segment.update(count=count, first=first, last=last)
+
+    def _save_manifest(self):
+        write_json_atomic(self.manifest_file,
+                          {'segments': self.segments, 'next_id': self.next_id})
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, segment['file'])
+
+    def _new_segment(self):
+        segment = {'file': f"{self.next_id:08d}.jsonl", 'first': None, 'last': None, 'count': 0}
+        self.next_id += 1
+        self.segments.append(segment)
+        return segment
+
+    def append(self, entry):
+        # Сигнатура list.append: журнал подключается как Planet.history_log
+        segment = self.segments[-1] if self.segments else None
+        if segment is None or segment['count'] >= self.segment_entries:
+            # Только новый сегмент: манифест и слияние ждут flush
+            self._close_file()
+            segment = self._new_segment()
+        if self._file is None:
+            self._open_segment(segment)
+        self._file.write(_encode(entry) + '\n')
+        if segment['first'] is None:
+            segment['first'] = entry['year']
+        segment['last'] = entry['year']
+        segment['count'] += 1
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def _open_segment(self, segment):
+        path = self._segment_path(segment)
+        os.makedirs(self.path, exist_ok=True)
+        # Хвост без перевода строки (сбой при записи) не склеивается
+        # со следующей записью
+        torn = False
+        try:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        except OSError:
+            pass
+        self._file = open(path, 'a')
+        if torn:
+            self._file.write('\n')
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+        self._maintain()
+
+    def close(self):
+        self._close_file()
+        self._maintain()
+
+    def _maintain(self):
+        if not self.segments:
+            return
+        small = [s for s in self.segments[:-1] if s['count'] < self.compact_entries]
+        if len(small) >= self.max_small_segments:
+            self.compact()
+        else:
+            self._save_manifest()
+
+    def compact(self):
+        # Подряд идущие мелкие закрытые сегменты сливаются в сегменты
+        # по compact_entries записей; открытый сегмент не трогается
+        sealed = self.segments[:-1]
+        result = []
+        run = []
+        merges = []
+
+        def merge():
+            if len(run) < 2:
+                result.extend(run)
+            else:
+                result.append(None)
+                merges.append((len(result) - 1, list(run)))
+            run.clear()
+
+        for segment in sealed:
+            if segment['count'] >= self.compact_entries:
+                merge()
+                result.append(segment)
+                continue
+            if run and sum(s['count'] for s in run) + segment['count'] > self.compact_entries:
+                merge()
+            run.append(segment)
+        merge()
+
+        # Номера слитых сегментов сохраняются заранее: после сбоя
+        # недописанное слияние не примут за новый сегмент
+        first_id = self.next_id
+        self.next_id += len(merges)
+        self._save_manifest()
+        for offset, (position, segments) in enumerate(merges):
+            result[position] = self._merge(segments, first_id + offset)
+
+        old = self.segments[:-1]
+        self.segments[:-1] = result
+        self._save_manifest()
+        kept = {s['file'] for s in result}
+        for segment in old:
+            if segment['file'] not in kept:
+                try:
+                    os.remove(self._segment_path(segment))
+                except OSError:
+                    pass
+
+    def _merge(self, run, segment_id):
+        merged = {'file': f"{segment_id:08d}.jsonl", 'first': run[0]['first'],
+                  'last': run[-1]['last'], 'count': sum(s['count'] for s in run)}
+        tmp_path = self._segment_path(merged) + '.tmp'
+        with open(tmp_path, 'w') as out:
+            for segment in run:
+                with open(self._segment_path(segment), 'r') as f:
+                    for line in f:
+                        out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self._segment_path(merged))
+        return merged
+
+    def _read_segment(self, segment):
+        try:
+            f = open(self._segment_path(segment), 'r')
+        except OSError:
+            return
+        with f:
+            for line in f:
+                # Недописанная при сбое строка пропускается
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def query(self, first_year=None, last_year=None):
+        # Генератор записей с first_year <= year <= last_year
+        if self._file is not None:
+            self._file.flush()
+        for segment in list(self.segments):
+            if segment['first'] is None:
+                continue
+            if first_year is not None and segment['last'] < first_year:
+                continue
+            if last_year is not None and segment['first'] > last_year:
+                break
+            for entry in self._read_segment(segment):
+                year = entry['year']
+                if first_year is not None and year < first_year:
+                    continue
+                if last_year is not None and year > last_year:
+                    break
+                yield entry
+
+    def truncate(self, year):
+        # Удаляет записи новее year: планета загружена из сохранения,
+        # сделанного раньше последней записи в журнал
+        self._close_file()
+        while self.segments and (self.segments[-1]['first'] is None
+                                 or self.segments[-1]['first'] > year):
+            segment = self.segments.pop()
+            try:
+                os.remove(self._segment_path(segment))
+            except OSError:
+                pass
+        if self.segments and self.segments[-1]['last'] is not None \
+                and self.segments[-1]['last'] > year:
+            segment = self.segments[-1]
+            entries = [e for e in self._read_segment(segment) if e['year'] <= year]
+            tmp_path = self._segment_path(segment) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for entry in entries:
+                    f.write(_encode(entry) + '\n')
+            os.replace(tmp_path, self._segment_path(segment))
+            self._recount(segment)
+        if self.segments:
+            self._save_manifest()
+
+    def __len__(self):
+        return sum(s['count'] for s in self.segments)
@@ -0,0 +1,159 @@
+"""
+Monte Carlo: статистика исходов множества независимых планет.
+
+    python -m pocket_universe.montecarlo --type desert --years 5000 --stage Galactic
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .config import LIFE_STAGES, EVENTS, PLANET_TYPES
+from .planet import Planet
+from .rng import derive_seed
+
+
+STAGE_INDEX = {f"Evolved to {stage['name']}!": i for i, stage in enumerate(LIFE_STAGES)}
+EXTINCTION_NAME = EVENTS['meteor_large']['name']
+
+
+class OutcomeStats:
+    # Агрегаты без траекторий: их дёшево пересылать между процессами
+    def __init__(self, years, bin_years):
+        self.years = years
+        self.bin_years = bin_years
+        self.trials = 0
+        self.final_stage = [0] * len(LIFE_STAGES)
+        self.reached = [0] * len(LIFE_STAGES)
+        bins = years // bin_years + 1
+        self.time_to_stage = [[0] * bins for _ in LIFE_STAGES]
+        self.extinction_events = 0
+        self.died_out = 0
+
+    def add(self, planet, history, extinctions):
+        # Первый год, когда стадия >= s, по записям "Evolved to" в полной
+        # истории (planet.history хранит только последние записи)
+        first = [None] * len(LIFE_STAGES)
+        first[0] = 0
+        for entry in history:
+            stage = STAGE_INDEX.get(entry['event'])
+            if stage is None:
+                continue
+            for s in range(1, stage + 1):
+                if first[s] is None:
+                    first[s] = entry['year']
+
+        self.trials += 1
+        self.final_stage[planet.life_stage] += 1
+        for s, year in enumerate(first):
+            if year is not None:
+                self.reached[s] += 1
+                self.time_to_stage[s][year // self.bin_years] += 1
+        self.extinction_events += extinctions
+        if first[1] is not None and planet.life_stage == 0:
+            self.died_out += 1
+
+    def merge(self, other):
+        self.trials += other.trials
+        for s in range(len(LIFE_STAGES)):
+            self.final_stage[s] += other.final_stage[s]
+            self.reached[s] += other.reached[s]
+            row = self.time_to_stage[s]
+            for b, count in enumerate(other.time_to_stage[s]):
+                row[b] += count
+        self.extinction_events += other.extinction_events
+        self.died_out += other.died_out
+        return self
+
+    def reach_fraction(self, stage):
+        return self.reached[stage] / self.trials if self.trials else 0.0
+
+
+def _run_chunk(planet_type, years, seed, first, count, bin_years):
+    # Зерно каждой планеты выводится из её номера: результат не зависит
+    # от того, какой процесс и в каком порядке её посчитал
+    stats = OutcomeStats(years, bin_years)
+    for trial in range(first, first + count):
+        planet = Planet('MC', planet_type, derive_seed(seed, trial))
+        planet.history_log = history = []
+        extinctions = sum(1 for event in planet.advance(years)
+                          if event['name'] == EXTINCTION_NAME)
+        stats.add(planet, history, extinctions)
+    return stats
+
+
+def iter_monte_carlo(planet_type='terra', years=5000, trials=10000, seed=0,
+                     workers=None, chunk_size=200, bin_years=100):
+    # Отдаёт накопленную статистику по мере готовности кусков
+    chunks = [(start, min(chunk_size, trials - start))
+              for start in range(0, trials, chunk_size)]
+    total = OutcomeStats(years, bin_years)
+
+    if workers == 1:
+        for first, count in chunks:
+            yield total.merge(_run_chunk(planet_type, years, seed, first, count, bin_years))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_chunk, planet_type, years, seed, first, count, bin_years)
+                   for first, count in chunks]
+        for future in as_completed(futures):
+            yield total.merge(future.result())
+
+
+def run_monte_carlo(planet_type='terra', years=5000, trials=10000, seed=0,
+                    workers=None, chunk_size=200, bin_years=100):
+    stats = OutcomeStats(years, bin_years)
+    for stats in iter_monte_carlo(planet_type, years, trials, seed,
+                                  workers, chunk_size, bin_years):
+        pass
+    return stats
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pocket_universe.montecarlo',
+        description='Outcome statistics for planets left without divine intervention.')
+    parser.add_argument('--type', default='terra', choices=list(PLANET_TYPES))
+    parser.add_argument('--years', type=non_negative_int, default=5000)
+    parser.add_argument('--trials', type=positive_int, default=10000)
+    parser.add_argument('--stage', default='Galactic',
+                        choices=[stage['name'] for stage in LIFE_STAGES])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=positive_int, default=200)
+    args = parser.parse_args(argv)
+
+    target = [stage['name'] for stage in LIFE_STAGES].index(args.stage)
+    start = time.perf_counter()
+    stats = None
+    for stats in iter_monte_carlo(args.type, args.years, args.trials, args.seed,
+                                  args.workers, args.chunk_size):
+        print(f"\r{stats.trials}/{args.trials} trials", end='', flush=True)
+    print()
+
+    print(f"{args.type}, {args.years} years, {stats.trials} trials "
+          f"({time.perf_counter() - start:.1f} s, {args.workers} workers)")
+    print(f"Reached {args.stage}: {stats.reach_fraction(target):.2%}")
+    print(f"Extinction events: {stats.extinction_events} | Died out: {stats.died_out}")
+    for stage, count in zip(LIFE_STAGES, stats.final_stage):
+        print(f"  {stage['name']:<13}{count / stats.trials:8.2%}")
+
+
+if __name__ == '__main__':
+    main()
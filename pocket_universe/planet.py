@@ -0,0 +1,732 @@
+"""
+Модель планеты и скомпилированные таблицы симуляции.
+"""
+
+import math
+import bisect
+import itertools
+import time
+from collections import deque
+
+from .config import LIFE_STAGES, EVENTS, DIVINE_POWERS, PLANET_TYPES, OFFLINE_PROGRESS, HISTORY
+from .rng import PlanetRandom
+
+
+# ==================== ПЛАНЕТА ====================
+
+STATS = ('water', 'oxygen', 'temperature', 'biomass')
+
+
+class EventTable:
+    # EVENTS, скомпилированные в накопленные вероятности "сработало первым":
+    # один random.random() на тик вместо броска на каждое событие
+    def __init__(self, events):
+        self.ids = list(events)
+        self.events = [events[event_id] for event_id in self.ids]
+        
+        self.cumulative = []
+        total = 0.0
+        miss = 1.0
+        for event in self.events:
+            total += miss * event['chance']
+            miss *= 1 - event['chance']
+            self.cumulative.append(total)
+        self.any_chance = total
+        
+        self.effects = [tuple(event['effects'].get(stat, 0) for stat in STATS)
+                        for event in self.events]
+        self.blockable = [event['effects'].get('biomass', 0) < -10
+                          for event in self.events]
+    
+    def __len__(self):
+        return len(self.events)
+    
+    def sample(self, u):
+        # Индекс события для равномерного u из [0, 1) или None
+        index = bisect.bisect_right(self.cumulative, u)
+        return index if index < len(self.events) else None
+    
+    def sample_hit(self, u):
+        # Индекс события при условии, что какое-то событие случилось
+        return min(bisect.bisect_right(self.cumulative, u * self.any_chance),
+                   len(self.events) - 1)
+    
+    def sample_gap(self, u):
+        # Число спокойных лет до следующего события (геометрическое распределение)
+        return int(math.log(1.0 - u) / math.log(1.0 - self.any_chance))
+
+
+EVENT_TABLE = EventTable(EVENTS)
+
+class StageResolver:
+    # Пороги стадий жизни, скомпилированные в таблицу: каждый стат делится
+    # своими порогами на интервалы, и стадия заранее посчитана для каждой
+    # комбинации интервалов (ячейки)
+    def __init__(self, stages):
+        levels = [set() for _ in STATS]
+        for stage in stages:
+            for stat, min_val in stage['min_conditions'].items():
+                levels[STATS.index(stat)].add(min_val)
+        self.levels = [sorted(values) for values in levels]
+        self.sizes = [len(values) + 1 for values in self.levels]
+        
+        # Матрица порогов: минимальный номер интервала по каждому стату
+        self.required = [
+            [bisect.bisect_left(self.levels[k], stage['min_conditions'][stat]) + 1
+             if stat in stage['min_conditions'] else 0
+             for k, stat in enumerate(STATS)]
+            for stage in stages
+        ]
+        
+        # Битовая маска стадий, условие которых выполнено по стату k
+        # в интервале b; стадия ячейки — старший бит пересечения масок
+        masks = [
+            [sum(1 << i for i, req in enumerate(self.required) if req[k] <= bucket)
+             for bucket in range(size)]
+            for k, size in enumerate(self.sizes)
+        ]
+        self.table = [
+            (mw & mo & mt & mb).bit_length() - 1
+            for mw, mo, mt, mb in itertools.product(*masks)
+        ]
+    
+    def cell(self, water, oxygen, temperature, biomass):
+        levels = self.levels
+        return (bisect.bisect_right(levels[0], water),
+                bisect.bisect_right(levels[1], oxygen),
+                bisect.bisect_right(levels[2], temperature),
+                bisect.bisect_right(levels[3], biomass))
+    
+    def stage(self, cell):
+        index = 0
+        for bucket, size in zip(cell, self.sizes):
+            index = index * size + bucket
+        return self.table[index]
+    
+    def update(self, cell, water, oxygen, temperature, biomass):
+        # Статы между тиками меняются слабо: проверяем соседние интервалы
+        # и делаем полный поиск только после больших скачков
+        if cell is None:
+            return self.cell(water, oxygen, temperature, biomass)
+        return (self._step(0, water, cell[0]),
+                self._step(1, oxygen, cell[1]),
+                self._step(2, temperature, cell[2]),
+                self._step(3, biomass, cell[3]))
+    
+    def _step(self, k, value, bucket):
+        levels = self.levels[k]
+        if bucket > 0 and value < levels[bucket - 1]:
+            bucket -= 1
+            if bucket > 0 and value < levels[bucket - 1]:
+                return bisect.bisect_right(levels, value)
+        elif bucket < len(levels) and value >= levels[bucket]:
+            bucket += 1
+            if bucket < len(levels) and value >= levels[bucket]:
+                return bisect.bisect_right(levels, value)
+        return bucket
+
+
+STAGE_RESOLVER = StageResolver(LIFE_STAGES)
+
+
+def _linear_sum(start, step, first, last):
+    # Сумма start + i * step для i из [first, last)
+    count = last - first
+    if count <= 0:
+        return 0.0
+    return count * start + step * (first + last - 1) * count / 2
+
+
+def _drift_regime(water, temperature):
+    # Скорость роста биомассы и потери воды между событиями
+    if water > 30 and 20 < temperature < 80:
+        return 0.1, 0
+    if temperature > 100:
+        return -0.5, 0.3
+    if temperature < 0:
+        return -0.2, 0
+    return 0, 0
+
+
+def _drift_state(anchor, years):
+    # (water, oxygen, biomass) через years спокойных лет после опорной точки
+    age, w0, o0, temperature, b0 = anchor
+    growth, water_loss = _drift_regime(w0, temperature)
+    water = max(0, w0 - water_loss * years)
+    oxygen = min(100, o0 + 0.02 * _biomass_sum(b0, growth, years))
+    biomass = max(0, min(100, b0 + growth * years))
+    return water, oxygen, biomass
+
+
+def _biomass_bounds(b0, growth):
+    # Годы [low, top), в которые биомасса дрейфа > 10 и меняется линейно;
+    # при росте после top она стоит на 100, при убыли - уже не выше 10
+    if growth > 0:
+        return (0 if b0 > 10 else int((10 - b0) / growth) + 1,
+                max(0, math.ceil((100 - b0) / growth)))
+    return 0, max(0, math.ceil((b0 - 10) / -growth))
+
+
+def _biomass_sum(b0, growth, years):
+    # Сумма биомассы > 10 за первые years лет дрейфа (питает кислород)
+    if growth == 0:
+        return years * b0 if b0 > 10 else 0.0
+    low, top = _biomass_bounds(b0, growth)
+    if growth > 0:
+        return (_linear_sum(b0, growth, low, min(years, top))
+                + 100 * max(0, years - max(low, top)))
+    return _linear_sum(b0, growth, low, min(years, top))
+
+
+def _crossing(value, step, limit):
+    # Первый год j >= 0, когда value + step * j доходит до limit; та же
+    # арифметика, что в _drift_state, поэтому год совпадает с упором в ней
+    if step > 0:
+        reached = lambda j: value + step * j >= limit
+    else:
+        reached = lambda j: value + step * j <= limit
+    j = max(0, math.ceil((limit - value) / step))
+    while j > 0 and reached(j - 1):
+        j -= 1
+    while not reached(j):
+        j += 1
+    return j
+
+
+def _drift_breaks(anchor, end):
+    # Годы дрейфа из (0, end), где меняется вид формулы статов: вода и
+    # биомасса упираются в 0 или 100, сумма биомассы для кислорода меняет
+    # кусок, кислород упирается в 100. Между соседними точками каждый стат -
+    # многочлен степени не выше 2 от года. Популяция считается от биомассы
+    # прошлого года, поэтому упоры биомассы берутся и со сдвигом на год
+    age, w0, o0, temperature, b0 = anchor
+    growth, water_loss = _drift_regime(w0, temperature)
+    points = []
+    if water_loss and w0 > 0:
+        points.append(_crossing(w0, -water_loss, 0))
+    if growth:
+        for limit in (0, 100):
+            if (limit - b0) * growth > 0:
+                j = _crossing(b0, growth, limit)
+                points += [j, j + 1]
+        points += _biomass_bounds(b0, growth)
+    if o0 < 100 <= o0 + 0.02 * _biomass_sum(b0, growth, end):
+        lo, hi = 0, end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if o0 + 0.02 * _biomass_sum(b0, growth, mid) >= 100:
+                hi = mid
+            else:
+                lo = mid + 1
+        points.append(lo)
+    return sorted({j for j in points if 0 < j < end})
+
+
+def _newton_sum(f0, d1, d2, lo, hi):
+    # Сумма f0 + d1 * m + d2 * m * (m - 1) / 2 для m из [lo, hi)
+    return ((hi - lo) * f0 + d1 * ((hi * (hi - 1) - lo * (lo - 1)) // 2)
+            + d2 * ((hi * (hi - 1) * (hi - 2) - lo * (lo - 1) * (lo - 2)) // 6))
+
+
+def _drift_pieces(anchor, stages, end):
+    # Куски годов дрейфа между изломами и сменами стадии: (начало, конец,
+    # water, oxygen, biomass как (f0, d1, d2) в форме Ньютона, популяция).
+    # Внутри куска стат либо стоит в упоре, либо идёт по своей формуле из
+    # _drift_state, поэтому коэффициенты берутся прямо из неё.
+    # Популяция - целая часть от биомассы, и по формуле её сумма не берётся:
+    # пока биомасса меняется, хранятся суммы по годам, но такой кусок не
+    # длиннее 100 / |growth| лет, дальше биомасса упирается в 0 или 100
+    age, w0, o0, temperature, b0 = anchor
+    growth, water_loss = _drift_regime(w0, temperature)
+    low, top = _biomass_bounds(b0, growth) if growth else (0, 0)
+    breaks = _drift_breaks(anchor, end + 1)
+    
+    def biomass(j):
+        return max(0, min(100, b0 + growth * j))
+    
+    pieces = []
+    for first, last, life_stage in stages:
+        i = bisect.bisect_right(breaks, first)
+        p = first
+        while p < last:
+            q = min(last, breaks[i]) if i < len(breaks) else last
+            water = w0 - water_loss * p
+            water = (water, -water_loss, 0) if water > 0 else (0, 0, 0)
+            
+            # Приросты суммы биомассы > 10 на куске, как в _biomass_sum
+            if growth == 0:
+                feed = (b0 if b0 > 10 else 0, 0)
+            elif p < low:
+                feed = (0, 0)
+            elif p < top:
+                feed = (b0 + growth * p, growth)
+            else:
+                feed = (100 if growth > 0 else 0, 0)
+            oxygen = o0 + 0.02 * _biomass_sum(b0, growth, p)
+            if oxygen >= 100:
+                oxygen = (100, 0, 0)
+            else:
+                oxygen = (oxygen, 0.02 * feed[0], 0.02 * feed[1])
+            
+            head, tail = b0 + growth * p, b0 + growth * (q - 1)
+            if growth and 0 <= head <= 100 and 0 <= tail <= 100:
+                mass = (head, growth, 0)
+            else:
+                mass = (biomass(p), 0, 0)
+            
+            previous = biomass(p - 1)
+            if previous == biomass(q - 2):
+                population = (_population(life_stage, previous + growth), None)
+            else:
+                # Биомасса на куске не упирается: b0 + growth * j, как в _drift_state
+                prefix = [0]
+                for j in range(p - 1, q - 1):
+                    prefix.append(prefix[-1] + _population(life_stage, b0 + growth * j + growth))
+                population = (None, prefix)
+            pieces.append((p, q, (water, oxygen, mass), population))
+            p = q
+            i += 1
+    return pieces
+
+
+def _population(life_stage, biomass):
+    if life_stage >= 9:  # Civilization+
+        return int(biomass * 1000000 * (life_stage - 8))
+    if life_stage >= 5:
+        return int(biomass * 10000)
+    return int(biomass * 100)
+
+
+class _EvolutionTap:
+    # history_log на время catch_up: запоминает смены стадии и передаёт
+    # все записи дальше, в настоящий журнал, если он есть
+    __slots__ = ('log', 'evolutions')
+    
+    def __init__(self, log):
+        self.log = log
+        self.evolutions = []
+    
+    def append(self, entry):
+        if entry['event'].startswith('Evolved'):
+            self.evolutions.append(entry)
+        if self.log is not None:
+            self.log.append(entry)
+
+
+class Planet:
+    # Компактное состояние: без __dict__ на экземпляр, история общая
+    # между клонами и снимками до первой записи (copy-on-write)
+    _STATE = ('name', 'type', 'water', 'oxygen', 'temperature', 'biomass',
+              'age', 'life_stage', 'population', 'shield', 'created',
+              'last_simulated', '_stage_cell', 'inputs', 'origin',
+              '_anchor', '_next_event', 'step_mode')
+    __slots__ = _STATE + ('rng', 'history', '_history_shared', 'history_log', 'recorder')
+    
+    def __init__(self, name, planet_type='terra', seed=None):
+        self.name = name
+        self.type = planet_type
+        
+        self.water = self.type_data['water']
+        self.oxygen = 5
+        self.temperature = self.type_data['temp']
+        self.biomass = 0
+        
+        self.age = 0
+        self.life_stage = 0
+        self.population = 0
+        self.shield = 0
+        self._stage_cell = None
+        
+        # Свой генератор, журнал божественных сил и исходное состояние:
+        # по ним replay восстанавливает любой прошлый год
+        self.rng = PlanetRandom(seed)
+        self.inputs = ()
+        self.origin = self._origin_state()
+        self._anchor = None
+        self._next_event = None
+        # Как расходовался генератор: advance берёт по два числа на событие,
+        # simulate_tick и PlanetBatch - по одному на год. replay повторяет
+        # только один из способов; 'mixed' воспроизвести нельзя
+        self.step_mode = None
+        
+        # Последние HISTORY['memory'] записей; полная история уходит в
+        # history_log (любой объект с append, например EventLog)
+        self.history = deque(maxlen=HISTORY['memory'])
+        self._history_shared = False
+        self.history_log = None
+        # StatRecorder: замер статов после каждого тика и перемотки
+        self.recorder = None
+        self.created = time.time()
+        self.last_simulated = self.created
+    
+    @property
+    def type_data(self):
+        return PLANET_TYPES.get(self.type, PLANET_TYPES['terra'])
+    
+    def _origin_state(self):
+        return (self.age, self.water, self.oxygen, self.temperature, self.biomass,
+                self.life_stage, self.population, self.shield)
+    
+    def snapshot(self):
+        self._history_shared = True
+        return (tuple(getattr(self, name) for name in self._STATE)
+                + (self.rng.getstate(), self.history))
+    
+    def restore(self, snapshot):
+        for name, value in zip(self._STATE, snapshot):
+            setattr(self, name, value)
+        self.rng = PlanetRandom(*snapshot[-2])
+        self.history = snapshot[-1]
+        self._history_shared = True
+    
+    def clone(self):
+        p = Planet.__new__(Planet)
+        p.history_log = None
+        p.recorder = None
+        p.restore(self.snapshot())
+        return p
+    
+    def add_history(self, entry):
+        if self._history_shared:
+            self.history = deque(self.history, HISTORY['memory'])
+            self._history_shared = False
+        self.history.append(entry)
+        if self.history_log is not None:
+            self.history_log.append(entry)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'type': self.type,
+            'water': self.water,
+            'oxygen': self.oxygen,
+            'temperature': self.temperature,
+            'biomass': self.biomass,
+            'age': self.age,
+            'life_stage': self.life_stage,
+            'population': self.population,
+            'shield': self.shield,
+            'history': list(self.history),
+            'created': self.created,
+            'last_simulated': self.last_simulated,
+            'seed': self.rng.seed,
+            'rng_counter': self.rng.counter,
+            'inputs': [list(i) for i in self.inputs],
+            'origin': list(self.origin),
+            'anchor': list(self._anchor) if self._anchor else None,
+            'next_event': ([self._next_event[0], EVENT_TABLE.ids[self._next_event[1]]]
+                           if self._next_event else None),
+            'step_mode': self.step_mode,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        p = cls(data['name'], data.get('type', 'terra'), data.get('seed'))
+        p.water = data.get('water', 50)
+        p.oxygen = data.get('oxygen', 5)
+        p.temperature = data.get('temperature', 50)
+        p.biomass = data.get('biomass', 0)
+        p.age = data.get('age', 0)
+        p.life_stage = data.get('life_stage', 0)
+        p.population = data.get('population', 0)
+        p.shield = data.get('shield', 0)
+        p.history = deque(data.get('history', []), HISTORY['memory'])
+        p.created = data.get('created', time.time())
+        p.last_simulated = data.get('last_simulated', time.time())
+        
+        if 'seed' in data:
+            p.rng.counter = data.get('rng_counter', 0)
+            p.inputs = tuple(tuple(i) for i in data.get('inputs', []))
+            p.origin = tuple(data['origin'])
+            p._anchor = tuple(data['anchor']) if data.get('anchor') else None
+            if data.get('next_event'):
+                year, event_id = data['next_event']
+                p._next_event = (year, EVENT_TABLE.ids.index(event_id))
+            p.step_mode = data.get('step_mode')
+        else:
+            # Старое сохранение: запись для replay начинается с этого момента
+            p.origin = p._origin_state()
+        return p
+    
+    def clamp_stats(self):
+        self.water = max(0, min(100, self.water))
+        self.oxygen = max(0, min(100, self.oxygen))
+        self.temperature = max(-50, min(150, self.temperature))
+        self.biomass = max(0, min(100, self.biomass))
+    
+    def simulate_tick(self):
+        # Пошаговый эталон; расписание событий advance при этом сбрасывается
+        self.mark_step_mode('tick')
+        self._next_event = None
+        return self._tick(EVENT_TABLE.sample(self.rng.random()))
+    
+    def _tick(self, event_index):
+        self.age += 1
+        event_happened = None
+        
+        # Естественные процессы
+        if self.biomass > 10:
+            self.oxygen += self.biomass * 0.02
+        if self.water > 30 and self.temperature > 20 and self.temperature < 80:
+            self.biomass += 0.1
+        if self.temperature > 100:
+            self.biomass -= 0.5
+            self.water -= 0.3
+        if self.temperature < 0:
+            self.biomass -= 0.2
+        
+        # Случайные события
+        if event_index is not None:
+            event = EVENT_TABLE.events[event_index]
+            if self.shield > 0 and EVENT_TABLE.blockable[event_index]:
+                self.shield -= 1
+                event_happened = {'id': 'shield_block', 'name': 'Shield Blocked!', 
+                                 'desc': f"Blocked: {event['name']}"}
+            else:
+                water, oxygen, temperature, biomass = EVENT_TABLE.effects[event_index]
+                self.water += water
+                self.oxygen += oxygen
+                self.temperature += temperature
+                self.biomass += biomass
+                event_happened = event
+                self.add_history({
+                    'year': self.age,
+                    'event': event['name']
+                })
+        
+        # Обновление стадии жизни
+        self.update_life_stage()
+        
+        self.update_population()
+        self.clamp_stats()
+        if self.recorder is not None:
+            self.recorder.record(self)
+        return event_happened
+    
+    def update_population(self):
+        self.population = _population(self.life_stage, self.biomass)
+    
+    def mark_step_mode(self, mode):
+        if self.step_mode is None:
+            self.step_mode = mode
+        elif self.step_mode != mode:
+            self.step_mode = 'mixed'
+    
+    def advance(self, years):
+        # Перемотка: спокойные отрезки считаются в замкнутой форме,
+        # тики с событиями — как обычно. Год и тип следующего события
+        # разыгрываются сразу после предыдущего, поэтому результат не
+        # зависит от того, какими кусками идёт перемотка
+        self.mark_step_mode('advance')
+        events = []
+        target = self.age + int(years)
+        while True:
+            if self._next_event is None or self._next_event[0] <= self.age:
+                gap = EVENT_TABLE.sample_gap(self.rng.random())
+                index = EVENT_TABLE.sample_hit(self.rng.random())
+                self._next_event = (self.age + gap + 1, index)
+            year, index = self._next_event
+            if year > target:
+                break
+            self._drift(year - 1 - self.age, target)
+            event = self._tick(index)
+            self._anchor = (self.age, self.water, self.oxygen, self.temperature, self.biomass)
+            if event:
+                events.append(event)
+        self._drift(target - self.age, target)
+        if self.recorder is not None:
+            self.recorder.record(self)
+        return events
+    
+    def catch_up(self, now=None):
+        # Офлайн-прогресс: прошедшее реальное время перематывается через advance
+        steps = self.catch_up_steps(now)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+    
+    def catch_up_steps(self, now=None, chunk=None):
+        # catch_up по кускам в chunk лет: генератор отдаёт управление после
+        # каждого куска (интерфейс успевает нарисовать кадр) и возвращает
+        # сводку. Перемотка кусками даёт то же состояние, что и одним вызовом
+        if now is None:
+            now = time.time()
+        per_second = OFFLINE_PROGRESS['years_per_second']
+        max_years = OFFLINE_PROGRESS['max_years']
+        chunk = chunk or OFFLINE_PROGRESS['chunk_years']
+        elapsed = now - self.last_simulated
+        years = min(int(elapsed * per_second), max_years) if elapsed > 0 else 0
+        start_stage = self.life_stage
+        
+        # Смены стадии собираются по ходу перемотки: буфер history за
+        # долгий офлайн их уже вытеснит
+        tap = _EvolutionTap(self.history_log)
+        self.history_log = tap
+        try:
+            events = {}
+            done = 0
+            while done < years:
+                step = min(chunk, years - done)
+                for event in self.advance(step):
+                    events[event['name']] = events.get(event['name'], 0) + 1
+                done += step
+                if done < years:
+                    yield done
+        finally:
+            self.history_log = tap.log
+        
+        # Часы сдвигаются ровно на просимулированные годы: остаток меньше
+        # года доиграется в следующий раз, а часы, ушедшие назад, ничего
+        # не откатывают. Время сверх max_years пропадает
+        if years == max_years:
+            self.last_simulated = max(self.last_simulated, now)
+        else:
+            self.last_simulated += years / per_second
+        
+        return {
+            'years': years,
+            'events': events,
+            'evolutions': tap.evolutions,
+            'from_stage': start_stage,
+            'to_stage': self.life_stage,
+        }
+    
+    def _drift(self, years, horizon):
+        if years <= 0:
+            return
+        
+        # Статы считаются от опорной точки (последнего события или силы),
+        # а не от текущих значений: так округления не зависят от разбиения
+        # перемотки на куски. Если статы меняли извне, точка переносится.
+        # Сразу после события точка совпадает с текущими статами, и
+        # проверять её не нужно
+        anchor = self._anchor
+        temperature = self.temperature
+        # Ячейка порогов текущих статов: после тика она уже посчитана
+        current = self._stage_cell
+        if anchor != (self.age, self.water, self.oxygen, temperature, self.biomass):
+            current = None
+            if (anchor is None or anchor[0] > self.age or anchor[3] != temperature
+                    or _drift_state(anchor, self.age - anchor[0])
+                    != (self.water, self.oxygen, self.biomass)):
+                anchor = (self.age, self.water, self.oxygen, temperature, self.biomass)
+                self._anchor = anchor
+        if current is None:
+            current = STAGE_RESOLVER.cell(self.water, self.oxygen, temperature, self.biomass)
+        
+        start = self.age - anchor[0]
+        end = start + years
+        age, w0, o0, temperature, b0 = anchor
+        growth, water_loss = _drift_regime(w0, temperature)
+        stages = [] if self.recorder is not None else None
+        # То же, что _drift_state(anchor, end), без повторного выбора режима
+        final = (max(0, w0 - water_loss * end),
+                 min(100, o0 + 0.02 * _biomass_sum(b0, growth, end)),
+                 max(0, min(100, b0 + growth * end)))
+        
+        # Статы монотонны, поэтому каждый порог пересекается не более раза.
+        # Если ячейка порогов в конце отрезка та же, что сейчас, стадия на
+        # всём отрезке не меняется и поиск не нужен
+        cell = STAGE_RESOLVER.cell(final[0], final[1], temperature, final[2])
+        if cell == current and STAGE_RESOLVER.stage(cell) == self.life_stage:
+            self._stage_cell = cell
+            if stages is not None:
+                stages.append((start + 1, end + 1, self.life_stage))
+        else:
+            self._drift_stages(anchor, start, end, stages)
+        
+        # Популяция считается по биомассе до ограничения, как в simulate_tick
+        self.biomass = max(0, min(100, b0 + growth * (end - 1))) + growth
+        self.update_population()
+        self.water, self.oxygen, self.biomass = final
+        self.age = age + end
+        if stages:
+            self._record_drift(anchor, stages, end, horizon)
+    
+    def _drift_stages(self, anchor, start, end, stages):
+        # Бинарным поиском находим годы смены набора пройденных порогов
+        temperature = anchor[3]
+        
+        def key(j):
+            water, oxygen, biomass = _drift_state(anchor, j)
+            return STAGE_RESOLVER.cell(water, oxygen, temperature, biomass)
+        
+        done = start
+        while done < end:
+            current = key(done + 1)
+            lo, hi = done + 1, end
+            if key(hi) == current:
+                lo = hi
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if key(mid) == current:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            self.water, self.oxygen, self.biomass = _drift_state(anchor, done + 1)
+            self.age = anchor[0] + done + 1
+            self.update_life_stage()
+            if stages is not None:
+                stages.append((done + 1, lo + 1, self.life_stage))
+            done = lo
+    
+    def _record_drift(self, anchor, stages, end, horizon):
+        # Каждый год дрейфа попадает в запись, как при потиковой симуляции,
+        # но суммы корзин считаются по формулам: цена - число корзин, а не
+        # лет. horizon - последний год перемотки: корзины, которые она же
+        # перезапишет, не считаются вовсе
+        pieces = _drift_pieces(anchor, stages, end)
+        starts = [piece[0] for piece in pieces]
+        
+        def total(first_year, last_year):
+            first, last = first_year - anchor[0], last_year - anchor[0]
+            sums = [0.0, 0.0, anchor[3] * (last - first), 0.0, 0]
+            i = bisect.bisect_right(starts, first) - 1
+            while i < len(pieces) and pieces[i][0] < last:
+                p, q, columns, (population, prefix) = pieces[i]
+                lo, hi = max(p, first) - p, min(q, last) - p
+                for index, (f0, d1, d2) in zip((0, 1, 3), columns):
+                    sums[index] += _newton_sum(f0, d1, d2, lo, hi)
+                if prefix is None:
+                    sums[4] += population * (hi - lo)
+                else:
+                    sums[4] += prefix[hi] - prefix[lo]
+                i += 1
+            return sums
+        
+        self.recorder.record_span(anchor[0] + stages[0][0], anchor[0] + end + 1, total, horizon)
+    
+    def update_life_stage(self):
+        self._stage_cell = STAGE_RESOLVER.update(
+            self._stage_cell, self.water, self.oxygen, self.temperature, self.biomass)
+        i = STAGE_RESOLVER.stage(self._stage_cell)
+        if i > self.life_stage:
+            self.add_history({
+                'year': self.age,
+                'event': f"Evolved to {LIFE_STAGES[i]['name']}!"
+            })
+        self.life_stage = i
+    
+    def get_life_stage_name(self):
+        return LIFE_STAGES[self.life_stage]['name']
+    
+    def apply_divine_power(self, power_id):
+        if power_id not in DIVINE_POWERS:
+            return False
+        power = DIVINE_POWERS[power_id]
+        for stat, value in power['effects'].items():
+            if stat == 'shield':
+                self.shield += value
+            else:
+                current = getattr(self, stat, 0)
+                setattr(self, stat, current + value)
+        self.clamp_stats()
+        self._anchor = None
+        self.inputs += ((self.age, power_id),)
+        self.add_history({
+            'year': self.age,
+            'event': f"Divine: {power['name']}"
+        })
+        return True
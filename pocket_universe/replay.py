@@ -0,0 +1,71 @@
+"""
+Replay: восстановление планеты по зерну и журналу божественных сил.
+
+Запись для replay — несколько сотен байт вместо полного снимка:
+исходное состояние, зерно генератора и список (год, сила).
+"""
+
+import json
+
+from .planet import Planet
+
+
+REPLAY_VERSION = 1
+
+
+def make_record(planet):
+    return {
+        'version': REPLAY_VERSION,
+        'name': planet.name,
+        'type': planet.type,
+        'seed': planet.rng.seed,
+        'origin': list(planet.origin),
+        'inputs': [list(i) for i in planet.inputs],
+        'age': planet.age,
+        'step_mode': planet.step_mode,
+    }
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def _ticks(planet, years):
+    for _ in range(years):
+        planet.simulate_tick()
+
+
+def replay(record, year=None):
+    # Перемотка между вводами идёт тем же способом, каким шла планета:
+    # через advance (годы без событий не проигрываются по одному) или
+    # по тику на год. Смешанный расход генератора не повторить
+    mode = record.get('step_mode')
+    if mode == 'mixed':
+        raise ReplayError("planet was stepped both by advance and by ticks; "
+                          "its random stream cannot be replayed")
+    step = _ticks if mode == 'tick' else Planet.advance
+    if year is None:
+        year = record['age']
+
+    planet = Planet(record['name'], record['type'], record['seed'])
+    (planet.age, planet.water, planet.oxygen, planet.temperature, planet.biomass,
+     planet.life_stage, planet.population, planet.shield) = record['origin']
+    planet.origin = tuple(record['origin'])
+
+    for input_year, power_id in record['inputs']:
+        if input_year > year:
+            break
+        step(planet, input_year - planet.age)
+        planet.apply_divine_power(power_id)
+    step(planet, year - planet.age)
+    return planet
+
+
+def save_record(planet, path):
+    with open(path, 'w') as f:
+        json.dump(make_record(planet), f)
+
+
+def load_record(path):
+    with open(path, 'r') as f:
+        return json.load(f)
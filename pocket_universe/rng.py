@@ -0,0 +1,43 @@
+"""
+Детерминированный генератор случайных чисел планеты (SplitMix64).
+"""
+
+import os
+
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix64(z):
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def derive_seed(seed, index):
+    # Независимый поток для index-й планеты из общего зерна
+    return mix64((seed * GOLDEN_GAMMA + index + 1) & MASK64)
+
+
+class PlanetRandom:
+    # Состояние — два числа (зерно и номер броска), поэтому его дёшево
+    # сохранять в to_dict и восстанавливать без прокрутки потока
+    __slots__ = ('seed', 'counter')
+
+    def __init__(self, seed=None, counter=0):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'big')
+        self.seed = seed & MASK64
+        self.counter = counter
+
+    def random(self):
+        self.counter += 1
+        z = mix64((self.seed + self.counter * GOLDEN_GAMMA) & MASK64)
+        return (z >> 11) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return self.seed, self.counter
+
+    def setstate(self, state):
+        self.seed, self.counter = state
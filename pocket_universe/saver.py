@@ -0,0 +1,124 @@
+"""
+Отложенная запись на диск: объединение частых сохранений и атомарная
+замена файлов в фоновом потоке.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def write_bytes_atomic(path, raw):
+    # Временный файл + fsync + os.replace: на диске всегда либо старая,
+    # либо новая версия целиком
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path, data):
+    write_bytes_atomic(path, json.dumps(data).encode('utf-8'))
+
+
+def snapshot_document(data):
+    # Копия двух верхних уровней: UI меняет пользователя заменой значений
+    # (планеты пересобираются через to_dict), поэтому глубже копировать
+    # не нужно, а фоновая сериализация не увидит изменений на полпути
+    snapshot = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            value = dict(value)
+        elif isinstance(value, list):
+            value = list(value)
+        snapshot[key] = value
+    return snapshot
+
+
+class WriteBehindSaver:
+    def __init__(self, write=write_json_atomic, delay=2.0):
+        self.write = write
+        self.delay = delay
+        self.requests = 0
+        self.writes = 0
+        self.errors = 0
+        # Первая ошибка записи: фоновый поток её не покажет, её поднимает close
+        self.error = None
+
+        self._pending = {}
+        self._deadline = None
+        self._cond = threading.Condition()
+        # Запись идёт под отдельной блокировкой, чтобы flush не обогнал
+        # уже начатую фоновую запись более старых данных
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, path, data):
+        with self._cond:
+            self._pending[path] = data
+            self.requests += 1
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pu-saver', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, path):
+        with self._cond:
+            return self._pending.get(path)
+
+    def write_now(self, path, data):
+        with self._write_lock:
+            with self._cond:
+                self._pending.pop(path, None)
+            self._write(path, data)
+
+    def flush(self):
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._deadline = None
+            for path, data in batch.items():
+                self._write(path, data)
+
+    def close(self):
+        # Последняя запись перед выходом; неудачная запись (в том числе
+        # фоновая) не должна пропасть молча
+        self.flush()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._deadline is None:
+                    self._cond.wait()
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
+
+    def _write(self, path, data):
+        try:
+            self.write(path, data)
+            self.writes += 1
+        except Exception as exc:
+            self.errors += 1
+            if self.error is None:
+                self.error = exc
@@ -0,0 +1,233 @@
+"""
+Двоичный снимок планеты: заголовок фиксированного размера с числовыми
+полями, таблица строк и массивы истории и вводов.
+
+    заголовок   HEADER (все статы, ГСЧ, origin, anchor, счётчики)
+    строки      n_strings x (u16 длина + UTF-8)
+    вводы       n_inputs  x INPUT   (год, номер строки силы)
+    история     n_history x ENTRY   (год, номер строки события)
+    modified    MODIFIED, если выставлен флаг HAS_MODIFIED
+
+Имена событий повторяются в истории десятки раз и хранятся один раз.
+Статы читаются из заголовка без разбора остального, поэтому снимок
+можно открыть через mmap и показать в списке, не трогая историю.
+"""
+
+import mmap
+import struct
+
+from .planet import Planet
+
+
+MAGIC = b'PUSN'
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct(
+    '<4sHH'       # magic, version, flags
+    'dddd'        # water, oxygen, temperature, biomass
+    'qqqq'        # age, life_stage, population, shield
+    'dd'          # created, last_simulated
+    'QQ'          # seed, rng_counter
+    'qddddqqq'    # origin
+    'qdddd'       # anchor
+    'qH'          # next_event: год, номер строки
+    'HHHII'       # name, type, n_strings, n_inputs, n_history
+)
+STRING_LENGTH = struct.Struct('<H')
+ENTRY = struct.Struct('<qH')
+INPUT = ENTRY
+MODIFIED = struct.Struct('<d')
+
+# Пределы полей: длина строки - u16, число строк - u16 (номер в ENTRY)
+MAX_STRING_BYTES = 0xFFFF
+MAX_STRINGS = 0xFFFF
+
+HAS_ANCHOR = 1
+HAS_NEXT_EVENT = 2
+# Отметка DataManager.put_planet; хранится после истории, поэтому
+# читатели без этого флага её просто не видят
+HAS_MODIFIED = 4
+# Planet.step_mode: оба флага - 'mixed', ни одного - None
+STEPPED_BY_ADVANCE = 8
+STEPPED_BY_TICK = 16
+STEP_FLAGS = {None: 0, 'advance': STEPPED_BY_ADVANCE, 'tick': STEPPED_BY_TICK,
+              'mixed': STEPPED_BY_ADVANCE | STEPPED_BY_TICK}
+STEP_MODES = {flags: mode for mode, flags in STEP_FLAGS.items()}
+
+# Поля заголовка, доступные без декодирования
+STAT_FIELDS = ('water', 'oxygen', 'temperature', 'biomass', 'age', 'life_stage',
+               'population', 'shield', 'created', 'last_simulated')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def encode_planet(data):
+    # data - словарь Planet.to_dict()
+    strings = []
+    index = {}
+
+    def intern(text):
+        i = index.get(text)
+        if i is None:
+            if len(strings) >= MAX_STRINGS:
+                raise ValueError(f"snapshot has more than {MAX_STRINGS} distinct strings")
+            i = index[text] = len(strings)
+            strings.append(text)
+        return i
+
+    name = intern(data['name'])
+    planet_type = intern(data['type'])
+    inputs = [INPUT.pack(year, intern(power_id)) for year, power_id in data.get('inputs', [])]
+    history = [ENTRY.pack(entry['year'], intern(entry['event']))
+               for entry in data.get('history', [])]
+
+    flags = STEP_FLAGS[data.get('step_mode')]
+    anchor = data.get('anchor')
+    if anchor:
+        flags |= HAS_ANCHOR
+    else:
+        anchor = (0, 0.0, 0.0, 0.0, 0.0)
+    next_event = data.get('next_event')
+    if next_event:
+        flags |= HAS_NEXT_EVENT
+        next_event = (next_event[0], intern(next_event[1]))
+    else:
+        next_event = (0, 0)
+    modified = data.get('modified')
+    if modified is not None:
+        flags |= HAS_MODIFIED
+
+    header = HEADER.pack(
+        MAGIC, SNAPSHOT_VERSION, flags,
+        data['water'], data['oxygen'], data['temperature'], data['biomass'],
+        data['age'], data['life_stage'], data['population'], data['shield'],
+        data['created'], data['last_simulated'],
+        data['seed'], data['rng_counter'],
+        *data['origin'], *anchor, *next_event,
+        name, planet_type, len(strings), len(inputs), len(history))
+
+    parts = [header]
+    for text in strings:
+        raw = text.encode('utf-8')
+        if len(raw) > MAX_STRING_BYTES:
+            raise ValueError(f"snapshot string is {len(raw)} bytes, "
+                             f"max {MAX_STRING_BYTES}: {text[:20]!r}...")
+        parts.append(STRING_LENGTH.pack(len(raw)))
+        parts.append(raw)
+    parts.extend(inputs)
+    parts.extend(history)
+    if modified is not None:
+        parts.append(MODIFIED.pack(modified))
+    return b''.join(parts)
+
+
+class PlanetSnapshot:
+    # Ленивый вид на снимок в bytes, memoryview или mmap. Заголовок
+    # разбирается сразу, строки - при первом обращении к имени или
+    # истории, история - только при обращении к ней
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+        self.buffer = buffer
+        self.header = HEADER.unpack_from(buffer, 0)
+        if self.header[0] != MAGIC:
+            raise SnapshotError("not a planet snapshot")
+        if self.header[1] != SNAPSHOT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {self.header[1]}")
+        self._strings = None
+        self._strings_end = None
+
+    def __getattr__(self, name):
+        # Статы из заголовка: snapshot.age, snapshot.population, ...
+        if name in STAT_FIELDS:
+            return self.header[3 + STAT_FIELDS.index(name)]
+        raise AttributeError(name)
+
+    @property
+    def flags(self):
+        return self.header[2]
+
+    @property
+    def strings(self):
+        self._load_strings()
+        return self._strings
+
+    def _load_strings(self):
+        # Возвращает смещение массива вводов, идущего сразу за строками
+        if self._strings is None:
+            strings = []
+            offset = HEADER.size
+            for _ in range(self.header[-3]):
+                length, = STRING_LENGTH.unpack_from(self.buffer, offset)
+                offset += STRING_LENGTH.size
+                strings.append(bytes(self.buffer[offset:offset + length]).decode('utf-8'))
+                offset += length
+            self._strings = strings
+            self._strings_end = offset
+        return self._strings_end
+
+    @property
+    def name(self):
+        return self.strings[self.header[-5]]
+
+    @property
+    def type(self):
+        return self.strings[self.header[-4]]
+
+    def _entries(self, offset, count):
+        strings = self.strings
+        return [(year, strings[i]) for year, i in
+                ENTRY.iter_unpack(self.buffer[offset:offset + count * ENTRY.size])]
+
+    @property
+    def inputs(self):
+        return self._entries(self._load_strings(), self.header[-2])
+
+    @property
+    def history(self):
+        offset = self._load_strings() + self.header[-2] * INPUT.size
+        return [{'year': year, 'event': event}
+                for year, event in self._entries(offset, self.header[-1])]
+
+    def stats(self):
+        return dict(zip(STAT_FIELDS, self.header[3:3 + len(STAT_FIELDS)]))
+
+    def to_dict(self):
+        h = self.header
+        data = {'name': self.name, 'type': self.type}
+        data.update(self.stats())
+        data['history'] = self.history
+        data['seed'] = h[13]
+        data['rng_counter'] = h[14]
+        data['inputs'] = [list(i) for i in self.inputs]
+        data['origin'] = list(h[15:23])
+        data['anchor'] = list(h[23:28]) if self.flags & HAS_ANCHOR else None
+        data['next_event'] = ([h[28], self.strings[h[29]]]
+                              if self.flags & HAS_NEXT_EVENT else None)
+        data['step_mode'] = STEP_MODES[self.flags & (STEPPED_BY_ADVANCE | STEPPED_BY_TICK)]
+        if self.flags & HAS_MODIFIED:
+            offset = (self._load_strings() + self.header[-2] * INPUT.size
+                      + self.header[-1] * ENTRY.size)
+            data['modified'], = MODIFIED.unpack_from(self.buffer, offset)
+        return data
+
+    def to_planet(self):
+        return Planet.from_dict(self.to_dict())
+
+
+def decode_planet(buffer):
+    return PlanetSnapshot(buffer).to_dict()
+
+
+def save_snapshot(planet, path):
+    with open(path, 'wb') as f:
+        f.write(encode_planet(planet.to_dict()))
+
+
+def open_snapshot(path):
+    # Файл отображается в память; страницы истории не читаются, пока
+    # к ней не обратились
+    with open(path, 'rb') as f:
+        return PlanetSnapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
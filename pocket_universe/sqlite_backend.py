@@ -0,0 +1,307 @@
+"""
+Хранилище SQLite: пользователи, планеты, достижения и история событий
+в отдельных таблицах. Сохранение пишет только изменившиеся строки.
+Поля сводки планеты лежат в своих столбцах и читаются без разбора data.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from .storage import normalize_username
+from .summary import STORED_FIELDS, summary_data
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    folded TEXT NOT NULL,
+    pin_hash TEXT NOT NULL DEFAULT '',
+    created REAL,
+    divine_energy REAL NOT NULL DEFAULT 0,
+    total_planets INTEGER NOT NULL DEFAULT 0,
+    divine_uses INTEGER NOT NULL DEFAULT 0,
+    current_planet TEXT,
+    stats TEXT NOT NULL DEFAULT '{}',
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS planets (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    planet_key TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    life_stage INTEGER,
+    age INTEGER,
+    population INTEGER,
+    water REAL,
+    oxygen REAL,
+    biomass REAL,
+    shield INTEGER,
+    modified REAL,
+    data TEXT NOT NULL,
+    UNIQUE (user_id, planet_key)
+);
+
+CREATE TABLE IF NOT EXISTS achievements (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    achievement TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, achievement)
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    planet_id INTEGER NOT NULL REFERENCES planets (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (planet_id, seq)
+);
+CREATE INDEX IF NOT EXISTS history_planet_year ON history (planet_id, year);
+"""
+
+# Столбцы сводки планеты
+SUMMARY_COLUMNS = STORED_FIELDS + ('modified',)
+
+# Поля пользователя со своими столбцами; остальное уходит в extra
+USER_FIELDS = ('pin_hash', 'created', 'divine_energy', 'total_planets',
+               'achievements', 'divine_uses', 'planets', 'current_planet', 'stats')
+
+
+class SqliteBackend:
+    name = 'sqlite'
+    errors = (sqlite3.Error, OSError, TypeError, ValueError)
+
+    def __init__(self, data_path, filename='pu_universe.db'):
+        self.db_path = os.path.join(data_path, filename)
+        os.makedirs(data_path, exist_ok=True)
+        # Одно соединение на процесс: запись идёт из фонового потока
+        # сохранения, чтение - из UI, поэтому доступ под блокировкой.
+        # WAL позволяет другим процессам читать во время записи
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('PRAGMA foreign_keys=ON')
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+        # Последние записанные/прочитанные словари планет и достижения:
+        # планеты в user_data заменяются целиком (to_dict), поэтому
+        # неизменившиеся узнаются по идентичности объекта
+        self._written = {}
+
+    def _migrate(self):
+        # Базы до нормализованных имён: столбец folded заполняется из
+        # username, и только потом на нём строится индекс. ALTER TABLE
+        # sqlite3 фиксирует сразу, вне транзакции, поэтому прерванный
+        # перенос оставляет столбец с NULL - их дозаполняет следующий запуск
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(users)')]
+        if 'folded' not in columns:
+            self.conn.execute('ALTER TABLE users ADD COLUMN folded TEXT')
+        rows = self.conn.execute('SELECT id, username FROM users WHERE folded IS NULL').fetchall()
+        if rows:
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE users SET folded = ? WHERE id = ?',
+                    [(normalize_username(username), user_id) for user_id, username in rows])
+        self.conn.execute('DROP INDEX IF EXISTS users_username_nocase')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS users_folded ON users (folded)')
+
+        # Базы без столбцов сводки: добавляем их и заполняем из data
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(planets)')]
+        if 'modified' in columns:
+            return
+        with self.conn:
+            for column, kind in (('water', 'REAL'), ('oxygen', 'REAL'), ('biomass', 'REAL'),
+                                 ('shield', 'INTEGER'), ('modified', 'REAL')):
+                if column not in columns:
+                    self.conn.execute(f'ALTER TABLE planets ADD COLUMN {column} {kind}')
+            rows = self.conn.execute('SELECT id, data FROM planets').fetchall()
+            self.conn.executemany(
+                'UPDATE planets SET water = ?, oxygen = ?, biomass = ?, shield = ?, '
+                'modified = ? WHERE id = ?',
+                [self._summary_row(json.loads(data))[5:] + (planet_id,)
+                 for planet_id, data in rows])
+
+    def usernames(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT username FROM users ORDER BY id').fetchall()
+        return [row[0] for row in rows]
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None
+
+    def find_user(self, username):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT username FROM users WHERE folded = ? ORDER BY id LIMIT 1',
+                (normalize_username(username),)).fetchone()
+        return row[0] if row else None
+
+    def load_user(self, username):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT id, pin_hash, created, divine_energy, total_planets, divine_uses, '
+                'current_planet, stats, extra FROM users WHERE username = ?',
+                (username,)).fetchone()
+            if row is None:
+                return None
+            user_id = row[0]
+            achievements = [a for a, in self.conn.execute(
+                'SELECT achievement FROM achievements WHERE user_id = ? ORDER BY position',
+                (user_id,))]
+            planet_rows = self.conn.execute(
+                'SELECT id, planet_key, data FROM planets WHERE user_id = ? ORDER BY id',
+                (user_id,)).fetchall()
+            history = {}
+            for planet_id, year, event in self.conn.execute(
+                    'SELECT h.planet_id, h.year, h.event FROM history h '
+                    'JOIN planets p ON p.id = h.planet_id '
+                    'WHERE p.user_id = ? ORDER BY h.planet_id, h.seq', (user_id,)):
+                history.setdefault(planet_id, []).append({'year': year, 'event': event})
+
+            planets = {}
+            for planet_id, key, data in planet_rows:
+                planet = json.loads(data)
+                planet['history'] = history.get(planet_id, [])
+                planets[key] = planet
+
+            user_data = {
+                'pin_hash': row[1],
+                'created': row[2],
+                'divine_energy': row[3],
+                'total_planets': row[4],
+                'achievements': achievements,
+                'divine_uses': row[5],
+                'planets': planets,
+                'current_planet': row[6],
+                'stats': json.loads(row[7]),
+            }
+            user_data.update(json.loads(row[8]))
+            # Под той же блокировкой, что и чтение: фоновая запись не
+            # вклинится между ними со своим состоянием _written
+            self._written[username] = (dict(planets), tuple(achievements))
+        return user_data
+
+    def load_users(self):
+        return {username: self.load_user(username) for username in self.usernames()}
+
+    def load_summaries(self, username):
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT p.planet_key, ' + ', '.join('p.' + c for c in SUMMARY_COLUMNS) +
+                ' FROM planets p JOIN users u ON u.id = p.user_id '
+                'WHERE u.username = ? ORDER BY p.id', (username,)).fetchall()
+        summaries = {}
+        for row in rows:
+            summaries[row[0]] = {column: value for column, value in zip(SUMMARY_COLUMNS, row[1:])
+                                 if value is not None}
+        return summaries
+
+    def write_user(self, username, user_data):
+        with self.lock, self.conn:
+            self._write_user(username, user_data)
+
+    def write_users(self, users):
+        # Весь импорт - одна транзакция
+        with self.lock, self.conn:
+            for username, user_data in users.items():
+                self._write_user(username, user_data)
+
+    def _write_user(self, username, user_data):
+        extra = {k: v for k, v in user_data.items() if k not in USER_FIELDS}
+        self.conn.execute(
+            'INSERT INTO users (username, folded, pin_hash, created, divine_energy, '
+            'total_planets, divine_uses, current_planet, stats, extra) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (username) DO UPDATE SET pin_hash = excluded.pin_hash, '
+            'created = excluded.created, divine_energy = excluded.divine_energy, '
+            'total_planets = excluded.total_planets, divine_uses = excluded.divine_uses, '
+            'current_planet = excluded.current_planet, stats = excluded.stats, '
+            'extra = excluded.extra',
+            (username, normalize_username(username), user_data.get('pin_hash', ''), user_data.get('created'),
+             user_data.get('divine_energy', 0), user_data.get('total_planets', 0),
+             user_data.get('divine_uses', 0), user_data.get('current_planet'),
+             json.dumps(user_data.get('stats', {})), json.dumps(extra)))
+        user_id, = self.conn.execute(
+            'SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+
+        written_planets, written_achievements = self._written.get(username, ({}, ()))
+
+        achievements = tuple(user_data.get('achievements', []))
+        if achievements != written_achievements:
+            self.conn.execute('DELETE FROM achievements WHERE user_id = ?', (user_id,))
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO achievements (user_id, achievement, position) '
+                'VALUES (?, ?, ?)',
+                [(user_id, a, i) for i, a in enumerate(achievements)])
+
+        planets = user_data.get('planets', {})
+        for key, planet in planets.items():
+            if written_planets.get(key) is not planet:
+                self._write_planet(user_id, key, planet)
+        removed = [key for key in written_planets if key not in planets]
+        if removed or not written_planets:
+            # Без кэша (первая запись) сверяемся с таблицей
+            stored = [key for key, in self.conn.execute(
+                'SELECT planet_key FROM planets WHERE user_id = ?', (user_id,))]
+            self.conn.executemany(
+                'DELETE FROM planets WHERE user_id = ? AND planet_key = ?',
+                [(user_id, key) for key in stored if key not in planets])
+
+        self._written[username] = (dict(planets), achievements)
+
+    @staticmethod
+    def _summary_row(planet):
+        summary = summary_data(planet)
+        return tuple(summary.get(column) for column in SUMMARY_COLUMNS)
+
+    def _write_planet(self, user_id, key, planet):
+        data = {k: v for k, v in planet.items() if k != 'history'}
+        self.conn.execute(
+            'INSERT INTO planets (user_id, planet_key, name, type, life_stage, age, '
+            'population, water, oxygen, biomass, shield, modified, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (user_id, planet_key) DO UPDATE SET name = excluded.name, '
+            'type = excluded.type, life_stage = excluded.life_stage, age = excluded.age, '
+            'population = excluded.population, water = excluded.water, '
+            'oxygen = excluded.oxygen, biomass = excluded.biomass, '
+            'shield = excluded.shield, modified = excluded.modified, data = excluded.data',
+            (user_id, key) + self._summary_row(planet) + (json.dumps(data),))
+        planet_id, = self.conn.execute(
+            'SELECT id FROM planets WHERE user_id = ? AND planet_key = ?',
+            (user_id, key)).fetchone()
+        self.conn.execute('DELETE FROM history WHERE planet_id = ?', (planet_id,))
+        self.conn.executemany(
+            'INSERT INTO history (planet_id, seq, year, event) VALUES (?, ?, ?, ?)',
+            [(planet_id, i, entry['year'], entry['event'])
+             for i, entry in enumerate(planet.get('history', []))])
+
+    def planet_history(self, username, planet_key, first_year=None, last_year=None):
+        # Выборка по индексу (planet_id, year)
+        query = ('SELECT h.year, h.event FROM history h '
+                 'JOIN planets p ON p.id = h.planet_id '
+                 'JOIN users u ON u.id = p.user_id '
+                 'WHERE u.username = ? AND p.planet_key = ?')
+        params = [username, planet_key]
+        if first_year is not None:
+            query += ' AND h.year >= ?'
+            params.append(first_year)
+        if last_year is not None:
+            query += ' AND h.year <= ?'
+            params.append(last_year)
+        with self.lock:
+            rows = self.conn.execute(query + ' ORDER BY h.seq', params).fetchall()
+        return [{'year': year, 'event': event} for year, event in rows]
+
+    def invalidate(self):
+        self._written.clear()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
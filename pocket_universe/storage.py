@@ -0,0 +1,481 @@
+"""
+Хранение аккаунтов и планет пользователей.
+"""
+
+import json
+import time
+import os
+import hashlib
+import struct
+
+from .config import STORAGE
+from .eventlog import EventLog
+from .timeseries import StatRecorder
+from .summary import PlanetIndex, summary_data
+from .saver import WriteBehindSaver, write_json_atomic, write_bytes_atomic, snapshot_document
+
+
+# Сколько секунд копить изменения текущего пользователя перед записью
+SAVE_DELAY = 2.0
+
+
+# ==================== УТИЛИТЫ ====================
+
+def get_data_path():
+    if 'ANDROID_ARGUMENT' in os.environ or 'P4A_BOOTSTRAP' in os.environ:
+        try:
+            from android.storage import app_storage_path
+            return app_storage_path()
+        except:
+            pass
+    return os.path.expanduser('~')
+
+
+def hash_pin(pin):
+    return hashlib.sha256(pin.encode()).hexdigest()[:16]
+
+
+def normalize_username(username):
+    # Ключ для сравнения имён без учёта регистра (и в Unicode, не только ASCII)
+    return username.casefold()
+
+
+# ==================== КЭШ ДОКУМЕНТОВ ====================
+
+class DocumentCache:
+    # Разобранные JSON-документы по пути. Запись действительна, пока у
+    # файла те же mtime, размер и inode: os.replace при атомарной записи
+    # даёт новый inode, поэтому замена файла другим процессом видна даже
+    # в пределах одного тика mtime
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _key(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    
+    def get(self, path, default):
+        try:
+            key = self._key(path)
+        except OSError:
+            self.entries.pop(path, None)
+            return default
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except:
+            self.entries.pop(path, None)
+            return default
+        self.entries[path] = (key, data)
+        return data
+    
+    def put(self, path, data):
+        # После собственной записи документ не нужно разбирать заново
+        try:
+            self.entries[path] = (self._key(path), data)
+        except OSError:
+            self.entries.pop(path, None)
+    
+    def invalidate(self, path=None):
+        if path is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(path, None)
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+# ==================== JSON-ХРАНИЛИЩЕ ====================
+
+class JsonBackend:
+    # Каждый пользователь хранится в своём файле pu_users/<hash>.json,
+    # а pu_users/index.json сопоставляет имя с файлом и нормализованное
+    # имя с исходным. Сохранение одного пользователя не трогает данные
+    # остальных. Рядом с файлом пользователя лежит <hash>.planets.json
+    # со сводками планет для списка
+    name = 'json'
+    # Ошибки записи, после которых данные могли сохраниться не полностью
+    errors = (OSError, TypeError, ValueError)
+    
+    def __init__(self, data_path):
+        self.users_dir = os.path.join(data_path, 'pu_users')
+        self.index_file = os.path.join(self.users_dir, 'index.json')
+        # Имя -> файл для уже встречавшихся пользователей, чтобы запись
+        # не перечитывала индекс
+        self._files = {}
+        # Индекс читается при каждом входе, регистрации и поиске имени.
+        # Файлы пользователей не кэшируются: их словари отдаются в UI
+        # и меняются там на месте
+        self.cache = DocumentCache()
+    
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return json.load(f)
+        except:
+            pass
+        return default
+    
+    @staticmethod
+    def user_filename(username):
+        return hashlib.sha256(username.encode()).hexdigest()[:24] + '.json'
+    
+    def user_path(self, filename):
+        return os.path.join(self.users_dir, filename)
+    
+    def summaries_path(self, filename):
+        return self.user_path(filename[:-len('.json')] + '.planets.json')
+    
+    def load_index(self):
+        # Общий объект из кэша: изменять только копию
+        index = self.cache.get(self.index_file, {'users': {}, 'folded': {}})
+        if 'folded' not in index:
+            # Индекс старой версии без нормализованных имён: достраиваем
+            # один раз в кэше, на диск он попадёт при следующей записи
+            folded = {}
+            for username in index.get('users', {}):
+                folded.setdefault(normalize_username(username), username)
+            index['folded'] = folded
+        return index
+    
+    def _copy_index(self):
+        index = self.load_index()
+        return {'users': dict(index['users']), 'folded': dict(index['folded'])}
+    
+    def save_index(self, index):
+        write_json_atomic(self.index_file, index)
+        self.cache.put(self.index_file, index)
+    
+    def invalidate(self):
+        self.cache.invalidate()
+        self._files.clear()
+    
+    def usernames(self):
+        return list(self.load_index()['users'])
+    
+    def is_empty(self):
+        return not self.load_index()['users']
+    
+    def find_user(self, username):
+        return self.load_index()['folded'].get(normalize_username(username))
+    
+    def load_user(self, username):
+        filename = self.load_index()['users'].get(username)
+        if filename is None:
+            return None
+        self._files[username] = filename
+        return self._read_json(self.user_path(filename), None)
+    
+    def load_users(self):
+        return {
+            username: self._read_json(self.user_path(filename), {})
+            for username, filename in self.load_index()['users'].items()
+        }
+    
+    def load_summaries(self, username):
+        # Сводки планет без разбора файла пользователя; None, если их нет
+        # или файл пользователя с тех пор записан заново
+        filename = self.load_index()['users'].get(username)
+        if filename is None:
+            return None
+        summaries = self._read_json(self.summaries_path(filename), None)
+        try:
+            key = DocumentCache._key(self.user_path(filename))
+        except OSError:
+            return None
+        if not summaries or summaries.get('source') != list(key):
+            return None
+        return summaries['planets']
+    
+    def _write_user_file(self, filename, user_data):
+        path = self.user_path(filename)
+        write_json_atomic(path, user_data)
+        planets = user_data.get('planets', {})
+        write_json_atomic(self.summaries_path(filename), {
+            'source': list(DocumentCache._key(path)),
+            'planets': {key: summary_data(planet) for key, planet in planets.items()},
+        })
+    
+    def write_user(self, username, user_data):
+        filename = self._files.get(username)
+        if filename is None:
+            filename = self.load_index()['users'].get(username)
+            if filename is None:
+                index = self._copy_index()
+                filename = index['users'][username] = self.user_filename(username)
+                index['folded'].setdefault(normalize_username(username), username)
+                self.save_index(index)
+            self._files[username] = filename
+        self._write_user_file(filename, user_data)
+    
+    def write_users(self, users):
+        index = self._copy_index()
+        for username, user_data in users.items():
+            filename = index['users'].setdefault(username, self.user_filename(username))
+            index['folded'].setdefault(normalize_username(username), username)
+            self._write_user_file(filename, user_data)
+        self.save_index(index)
+    
+    def close(self):
+        pass
+
+
+def open_backend(name, data_path):
+    if name == 'sqlite':
+        try:
+            from .sqlite_backend import SqliteBackend
+            return SqliteBackend(data_path)
+        except ImportError:
+            # Сборка без модуля sqlite3 - остаёмся на JSON
+            pass
+    return JsonBackend(data_path)
+
+
+# ==================== МЕНЕДЖЕР ДАННЫХ ====================
+
+class DataManager:
+    # Работает поверх сменного хранилища (STORAGE['backend']): JSON-файлы
+    # или SQLite. Полный документ {'users': {...}} в старом формате
+    # pu_users.json остаётся путём импорта и экспорта
+    def __init__(self, data_path=None, save_delay=SAVE_DELAY, backend=None, migrate=True):
+        self.data_path = data_path or get_data_path()
+        self.users_file = os.path.join(self.data_path, 'pu_users.json')
+        self.backend = backend or open_backend(STORAGE['backend'], self.data_path)
+        self.current_user = None
+        self.user_data = None
+        self.planet_index = PlanetIndex()
+        self.event_log = None
+        self.recorder = None
+        self.recorder_file = None
+        self.saver = WriteBehindSaver(self.backend.write_user, save_delay)
+        # Без migrate хранилище только читается: старые файлы не переносятся
+        if migrate:
+            self.migrate_legacy()
+    
+    def usernames(self):
+        return self.backend.usernames()
+    
+    def find_user(self, username):
+        # Исходное написание имени или None; регистр не важен
+        return self.backend.find_user(username)
+    
+    def load_user(self, username):
+        pending = self.saver.pending(username)
+        if pending is not None:
+            return pending
+        return self.backend.load_user(username)
+    
+    def save_user(self, username, user_data):
+        self.saver.write_now(username, user_data)
+    
+    def load_users(self):
+        # Экспорт в формате pu_users.json
+        self.flush()
+        return {'users': self.backend.load_users()}
+    
+    def save_users(self, data):
+        # Импорт документа в формате pu_users.json; ошибки хранилища
+        # (self.backend.errors) не глотаются
+        self.flush()
+        self.backend.write_users(data['users'])
+    
+    def export_json(self, path):
+        write_json_atomic(path, self.load_users())
+    
+    def import_json(self, path):
+        # False, если документ не прочитан или не записан целиком
+        data = JsonBackend._read_json(path, None)
+        if not data or 'users' not in data:
+            return False
+        return self.import_users(data['users'])
+    
+    def import_users(self, users):
+        # Запись с проверкой: каждый пользователь читается обратно
+        try:
+            self.save_users({'users': users})
+            stored = {username: self.backend.load_user(username) for username in users}
+        except self.backend.errors:
+            return False
+        users = json.loads(json.dumps(users))
+        return all(stored[username] is not None
+                   and {key: stored[username].get(key) for key in user_data} == user_data
+                   for username, user_data in users.items())
+    
+    def migrate_legacy(self):
+        # Однократный перенос старых данных: монолитного pu_users.json или,
+        # для пустой базы SQLite, файлов pu_users/ по пользователям. Старый
+        # файл убирается в сторону только после проверенной записи; прерванный
+        # перенос продолжается при следующем запуске и не трогает тех, кто
+        # уже перенесён
+        migrated = self.users_file + '.migrated'
+        if os.path.exists(self.users_file) and not os.path.exists(migrated):
+            data = JsonBackend._read_json(self.users_file, None)
+            if data and 'users' in data:
+                missing = {username: user_data for username, user_data in data['users'].items()
+                           if self.backend.load_user(username) is None}
+                if self.import_users(missing):
+                    try:
+                        os.replace(self.users_file, migrated)
+                    except OSError:
+                        pass
+            return
+        if self.backend.name != 'json' and self.backend.is_empty():
+            files = JsonBackend(self.data_path)
+            if not files.is_empty():
+                self.import_users(files.load_users())
+    
+    def register(self, username, pin):
+        if self.backend.find_user(username) is not None:
+            return False, "Username already exists"
+        if len(username) < 3:
+            return False, "Username too short"
+        if len(pin) < 4:
+            return False, "PIN must be 4+ digits"
+        
+        self.save_user(username, {
+            'pin_hash': hash_pin(pin),
+            'created': time.time(),
+            'divine_energy': 100,
+            'total_planets': 0,
+            'achievements': [],
+            'divine_uses': 0,
+            'planets': {},
+            'current_planet': None,
+            'stats': {
+                'total_years': 0,
+                'max_life_stage': 0,
+                'disasters_survived': 0
+            }
+        })
+        return True, "Account created!"
+    
+    def login(self, username, pin):
+        self.flush()
+        username = self.backend.find_user(username)
+        user_data = self.backend.load_user(username) if username else None
+        if user_data is None:
+            return False, "User not found"
+        if user_data['pin_hash'] != hash_pin(pin):
+            return False, "Wrong PIN"
+        
+        self.current_user = username
+        self.user_data = user_data
+        # Сводки хранилища не требуют разбора планет; без них - из словарей
+        summaries = self.backend.load_summaries(username)
+        if summaries is None:
+            summaries = user_data.get('planets')
+        self.planet_index = PlanetIndex(summaries)
+        return True, "Welcome back!"
+    
+    def save_current_user(self):
+        # Только помечает пользователя изменённым: частые вызовы из UI
+        # схлопываются в одну фоновую запись
+        if not self.current_user:
+            return
+        self.saver.schedule(self.current_user, snapshot_document(self.user_data))
+    
+    def put_planet(self, planet_id, planet):
+        # Словарь планеты заменяется целиком: SQLite по этому узнаёт
+        # изменившиеся планеты, а фоновое сохранение - неизменные снимки
+        data = planet.to_dict()
+        data['modified'] = time.time()
+        self.user_data.setdefault('planets', {})[planet_id] = data
+        self.planet_index.update(planet_id, data, data['modified'])
+        return data
+    
+    def planet_dir(self, planet_id, username=None):
+        user_dir = hashlib.sha256((username or self.current_user).encode()).hexdigest()[:24]
+        return os.path.join(self.data_path, 'pu_logs', user_dir, planet_id)
+    
+    def open_event_log(self, planet_id, username=None):
+        return EventLog(self.planet_dir(planet_id, username))
+    
+    def load_recorder(self, planet_id, username=None):
+        path = os.path.join(self.planet_dir(planet_id, username), 'stats.bin')
+        try:
+            with open(path, 'rb') as f:
+                return StatRecorder.from_bytes(f.read())
+        except (OSError, ValueError, struct.error):
+            return None
+    
+    def attach_recorder(self, planet_id, planet):
+        # Запись статов текущей планеты; сохраняется при flush
+        self.save_recorder()
+        recorder = self.load_recorder(planet_id)
+        if recorder is None or (recorder.last_year or 0) > planet.age:
+            recorder = StatRecorder()
+        planet.recorder = self.recorder = recorder
+        self.recorder_file = os.path.join(self.planet_dir(planet_id), 'stats.bin')
+        return recorder
+    
+    def attach_event_log(self, planet_id, planet, username=None):
+        # Журнал текущей планеты; журнал предыдущей закрывается
+        self.close_event_log()
+        log = self.open_event_log(planet_id, username)
+        try:
+            log.truncate(planet.age)
+            if not len(log):
+                # Первое подключение: начинаем с того, что сохранилось в history
+                log.extend(planet.history)
+        except OSError:
+            return None
+        planet.history_log = self.event_log = log
+        return log
+    
+    def close_event_log(self):
+        if self.event_log is not None:
+            try:
+                self.event_log.close()
+            except OSError:
+                pass
+            self.event_log = None
+    
+    def save_recorder(self):
+        if self.recorder is None:
+            return
+        try:
+            write_bytes_atomic(self.recorder_file, self.recorder.to_bytes())
+        except OSError:
+            pass
+    
+    def flush(self):
+        self.saver.flush()
+        self.save_recorder()
+        if self.event_log is not None:
+            try:
+                self.event_log.flush()
+            except OSError:
+                pass
+    
+    def logout(self):
+        self.save_current_user()
+        self.flush()
+        self.close_event_log()
+        self.recorder = None
+        self.current_user = None
+        self.user_data = None
+        self.planet_index = PlanetIndex()
+    
+    def invalidate_cache(self):
+        # Для данных, изменённых в обход DataManager
+        self.flush()
+        self.backend.invalidate()
+    
+    def close(self):
+        self.close_event_log()
+        # Ошибки отложенных записей поднимаются здесь, а не теряются
+        try:
+            self.saver.close()
+        finally:
+            self.backend.close()
@@ -0,0 +1,133 @@
+"""
+Сводка планет пользователя для списков: несколько полей на планету
+без разбора истории и без создания объектов Planet.
+"""
+
+import time
+from operator import attrgetter
+
+from .config import LIFE_STAGES, PLANET_TYPES
+
+
+# Поля сводки; water/oxygen/biomass/shield нужны PlanetWidget для превью
+SUMMARY_FIELDS = ('id', 'name', 'type', 'life_stage', 'age', 'population',
+                  'water', 'oxygen', 'biomass', 'shield', 'last_modified')
+
+# Поля словаря планеты, которые хранилища держат рядом с ним, чтобы
+# при входе строить сводку без разбора планет
+STORED_FIELDS = ('name', 'type', 'life_stage', 'age', 'population',
+                 'water', 'oxygen', 'biomass', 'shield')
+
+
+def summary_data(data):
+    summary = {field: data[field] for field in STORED_FIELDS if field in data}
+    summary['modified'] = data.get('modified', data.get('last_simulated', 0))
+    return summary
+
+
+class PlanetSummary:
+    # Совместима с Planet по полям, которые читают списки и превью
+    __slots__ = SUMMARY_FIELDS
+
+    def __init__(self, planet_id, data, modified=None):
+        self.id = planet_id
+        self.name = data.get('name', '')
+        self.type = data.get('type', 'terra')
+        self.life_stage = data.get('life_stage', 0)
+        self.age = data.get('age', 0)
+        self.population = data.get('population', 0)
+        self.water = data.get('water', 50)
+        self.oxygen = data.get('oxygen', 5)
+        self.biomass = data.get('biomass', 0)
+        self.shield = data.get('shield', 0)
+        if modified is None:
+            modified = data.get('modified', data.get('last_simulated', 0))
+        self.last_modified = modified
+
+    @property
+    def type_data(self):
+        return PLANET_TYPES.get(self.type, PLANET_TYPES['terra'])
+
+    def get_life_stage_name(self):
+        return LIFE_STAGES[self.life_stage]['name']
+
+
+class PlanetIndex:
+    # Строится один раз при входе (из сохранённых хранилищем сводок или
+    # из словарей планет) и дальше обновляется по одной планете при
+    # каждом сохранении
+    def __init__(self, planets=None):
+        # version растёт при каждом изменении: экраны по нему понимают,
+        # что список можно не перестраивать
+        self.version = 0
+        self.summaries = {}
+        for planet_id, data in (planets or {}).items():
+            self.summaries[planet_id] = PlanetSummary(planet_id, data)
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def __contains__(self, planet_id):
+        return planet_id in self.summaries
+
+    def get(self, planet_id):
+        return self.summaries.get(planet_id)
+
+    def update(self, planet_id, data, modified=None):
+        if modified is None:
+            modified = time.time()
+        self.summaries[planet_id] = PlanetSummary(planet_id, data, modified)
+        self.version += 1
+
+    def remove(self, planet_id):
+        if self.summaries.pop(planet_id, None) is not None:
+            self.version += 1
+
+    def query(self, sort=None, reverse=False, offset=0, limit=None, where=None):
+        # sort - имя поля сводки или None (порядок создания)
+        items = self.summaries.values()
+        if where is not None:
+            items = [s for s in items if where(s)]
+        if sort is not None:
+            if sort not in SUMMARY_FIELDS:
+                raise ValueError(f"unknown summary field {sort!r}")
+            items = sorted(items, key=attrgetter(sort), reverse=reverse)
+        else:
+            items = list(items)
+            if reverse:
+                items.reverse()
+        end = None if limit is None else offset + limit
+        return items[offset:end]
+
+
+# ==================== СПИСКИ ====================
+
+class ListState:
+    # Параметры последней сборки списка: индекс (сам объект и его
+    # version) и то, как список показан. Пока они те же, список на экране
+    # актуален и строки не собираются заново
+    def __init__(self):
+        self.key = None
+
+    def changed(self, index, *view):
+        key = (index, index.version) + view
+        if key == self.key:
+            return False
+        self.key = key
+        return True
+
+
+def apply_rows(rv, rows):
+    # rv - RecycleView или любой объект с data. Сравнение со старой
+    # моделью: при той же длине обновляются только изменившиеся строки,
+    # иначе модель заменяется целиком. Возвращает число записанных строк
+    old = rv.data
+    if len(old) != len(rows):
+        rv.data = rows
+        return len(rows)
+    changed = 0
+    for i, row in enumerate(rows):
+        if old[i] != row:
+            old[i] = row
+            changed += 1
+    return changed
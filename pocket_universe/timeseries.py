@@ -0,0 +1,187 @@
+"""
+Запись статов планеты во времени с фиксированным объёмом памяти.
+
+Каждый уровень - кольцо из capacity корзин по resolution лет; в корзине
+суммы статов и число замеров. Уровни по 1, 100 и 10 000 лет хранят
+последнюю тысячу лет подробно, а миллионы лет - грубо; старые корзины
+перезаписываются, поэтому память не растёт с возрастом планеты.
+"""
+
+import struct
+import sys
+from array import array
+
+from .config import TIMESERIES
+
+
+FIELDS = ('water', 'oxygen', 'temperature', 'biomass', 'population')
+
+MAGIC = b'PUTS'
+TIMESERIES_VERSION = 1
+HEADER = struct.Struct('<4sHH')
+LEVEL_HEADER = struct.Struct('<qI')
+
+
+class Level:
+    __slots__ = ('resolution', 'capacity', 'keys', 'counts', 'sums')
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        # keys[slot] - номер корзины (год // resolution) или -1
+        self.keys = array('q', [-1]) * capacity
+        self.counts = array('I', [0]) * capacity
+        self.sums = [array('d', [0.0]) * capacity for _ in FIELDS]
+
+    def add(self, year, values, count=1):
+        # values - сумма count замеров из одной корзины
+        key = year // self.resolution
+        slot = key % self.capacity
+        if self.keys[slot] != key:
+            self.keys[slot] = key
+            self.counts[slot] = 0
+            for column in self.sums:
+                column[slot] = 0.0
+        self.counts[slot] += count
+        for column, value in zip(self.sums, values):
+            column[slot] += value
+
+    def add_run(self, first_year, end, total, horizon):
+        # Замеры за годы [first_year, end): total(lo, hi) даёт суммы статов
+        # за годы [lo, hi). Каждая корзина складывается одним вызовом, а
+        # корзины, которые перезапишет запись до года horizon, пропускаются
+        resolution = self.resolution
+        year = max(first_year,
+                   (horizon // resolution - self.capacity + 1) * resolution)
+        while year < end:
+            stop = min(end, (year // resolution + 1) * resolution)
+            self.add(year, total(year, stop), stop - year)
+            year = stop
+
+    def buckets(self, first_key, last_key):
+        # (номер корзины, слот) в порядке времени
+        found = [(key, slot) for slot, key in enumerate(self.keys)
+                 if first_key <= key <= last_key]
+        found.sort()
+        return found
+
+    def oldest_key(self):
+        keys = [key for key in self.keys if key >= 0]
+        return min(keys) if keys else None
+
+
+class StatRecorder:
+    def __init__(self, levels=None):
+        if levels is None:
+            levels = TIMESERIES['levels']
+        self.levels = [Level(resolution, capacity) for resolution, capacity in levels]
+        self.last_year = None
+
+    def record(self, planet):
+        # Один замер на год: повторный вызов в том же году игнорируется
+        year = planet.age
+        if year == self.last_year:
+            return
+        self.last_year = year
+        values = (planet.water, planet.oxygen, planet.temperature,
+                  planet.biomass, planet.population)
+        for level in self.levels:
+            level.add(year, values)
+
+    def record_span(self, first_year, end, total, horizon=None):
+        # Замеры за годы [first_year, end) одним вызовом: так перемотка без
+        # событий записывает каждый пройденный год. total(lo, hi) - суммы
+        # FIELDS за годы [lo, hi), их спрашивают по разу на корзину.
+        # horizon - год, до которого запись точно дойдёт следом (конец
+        # перемотки): корзины, вытесняемые до него, не считаются
+        if horizon is None or horizon < end - 1:
+            horizon = end - 1
+        if self.last_year is not None:
+            first_year = max(first_year, self.last_year + 1)
+        if first_year >= end:
+            return
+        # Грубые уровни обычно спрашивают один и тот же отрезок целиком
+        known = {}
+
+        def cached(lo, hi):
+            if (lo, hi) not in known:
+                known[lo, hi] = total(lo, hi)
+            return known[lo, hi]
+
+        for level in self.levels:
+            level.add_run(first_year, end, cached, horizon)
+        self.last_year = end - 1
+
+    def _pick_level(self, first_year, last_year):
+        # Самый подробный уровень, который ещё хранит начало диапазона;
+        # если начало уже нигде не хранится - тот, что хранит больше всего
+        best = None
+        for level in self.levels:
+            oldest = level.oldest_key()
+            if oldest is None:
+                continue
+            if oldest * level.resolution <= first_year:
+                return level
+            if best is None or oldest * level.resolution < best[0]:
+                best = (oldest * level.resolution, level)
+        return best[1] if best else None
+
+    def query(self, first_year=0, last_year=None, max_points=200):
+        # Не более max_points точек (год, water, oxygen, temperature,
+        # biomass, population); соседние корзины сливаются с учётом числа замеров
+        if last_year is None:
+            last_year = self.last_year if self.last_year is not None else 0
+        level = self._pick_level(first_year, last_year)
+        if level is None or max_points <= 0:
+            return []
+        buckets = level.buckets(first_year // level.resolution, last_year // level.resolution)
+        if not buckets:
+            return []
+
+        group = -(-len(buckets) // max_points)
+        points = []
+        for start in range(0, len(buckets), group):
+            chunk = buckets[start:start + group]
+            count = sum(level.counts[slot] for _, slot in chunk)
+            if not count:
+                continue
+            year = chunk[0][0] * level.resolution
+            means = tuple(sum(column[slot] for _, slot in chunk) / count
+                          for column in level.sums)
+            points.append((year,) + means)
+        return points
+
+    def to_bytes(self):
+        parts = [HEADER.pack(MAGIC, TIMESERIES_VERSION, len(self.levels))]
+        for level in self.levels:
+            parts.append(LEVEL_HEADER.pack(level.resolution, level.capacity))
+            for column in (level.keys, level.counts, *level.sums):
+                if sys.byteorder == 'big':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                parts.append(column.tobytes())
+        parts.append(struct.pack('<q', -1 if self.last_year is None else self.last_year))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        magic, version, count = HEADER.unpack_from(raw, 0)
+        if magic != MAGIC or version != TIMESERIES_VERSION:
+            raise ValueError("not a stats recording")
+        offset = HEADER.size
+        recorder = cls.__new__(cls)
+        recorder.levels = []
+        for _ in range(count):
+            resolution, capacity = LEVEL_HEADER.unpack_from(raw, offset)
+            offset += LEVEL_HEADER.size
+            level = Level(resolution, capacity)
+            for column in (level.keys, level.counts, *level.sums):
+                size = capacity * column.itemsize
+                column[:] = array(column.typecode, raw[offset:offset + size])
+                if sys.byteorder == 'big':
+                    column.byteswap()
+                offset += size
+            recorder.levels.append(level)
+        last_year, = struct.unpack_from('<q', raw, offset)
+        recorder.last_year = None if last_year < 0 else last_year
+        return recorder
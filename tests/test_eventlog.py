@@ -0,0 +1,124 @@
+"""
+Журнал событий: ротация и слияние сегментов, усечение и восстановление
+после сбоя посреди записи.
+"""
+
+import json
+import os
+
+from pocket_universe import DataManager, Planet
+from pocket_universe.__main__ import main
+from pocket_universe.eventlog import EventLog
+
+
+def entries(years):
+    return [{'year': year, 'event': f"Event {year}"} for year in years]
+
+
+def on_disk(path):
+    with open(os.path.join(path, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    files = sorted(name for name in os.listdir(path) if name.endswith('.jsonl'))
+    return manifest, files
+
+
+def test_rotation_and_range_query(tmp_path):
+    path = str(tmp_path)
+    log = EventLog(path, segment_entries=10, compact_entries=1000, max_small_segments=100)
+    log.extend(entries(range(95)))
+    assert len(log) == 95
+    assert [s['count'] for s in log.segments] == [10] * 9 + [5]
+    assert list(log.query(20, 34)) == entries(range(20, 35))
+    log.close()
+
+    reopened = EventLog(path, segment_entries=10)
+    assert list(reopened.query()) == entries(range(95))
+    assert list(reopened.query(90)) == entries(range(90, 95))
+
+
+def test_compaction_rewrites_manifest(tmp_path):
+    path = str(tmp_path)
+    log = EventLog(path, segment_entries=10, compact_entries=40, max_small_segments=3)
+    log.extend(entries(range(100)))
+    log.compact()
+    log.close()
+
+    manifest, files = on_disk(path)
+    segments = manifest['segments']
+    # Манифест описывает ровно те файлы, что остались на диске
+    assert files == sorted(s['file'] for s in segments)
+    assert sum(s['count'] for s in segments) == 100
+    assert all(s['count'] <= 40 for s in segments)
+    assert len(segments) < 10
+    assert list(EventLog(path).query()) == entries(range(100))
+
+
+def test_truncate_drops_newer_entries(tmp_path):
+    path = str(tmp_path)
+    log = EventLog(path, segment_entries=10)
+    log.extend(entries(range(100)))
+    log.truncate(42)
+    assert len(log) == 43
+    assert list(log.query()) == entries(range(43))
+
+    log.extend(entries(range(43, 50)))
+    log.close()
+    manifest, files = on_disk(path)
+    assert files == sorted(s['file'] for s in manifest['segments'])
+    assert list(EventLog(path, segment_entries=10).query()) == entries(range(50))
+
+
+def test_recovers_torn_tail(tmp_path):
+    path = str(tmp_path)
+    log = EventLog(path, segment_entries=10)
+    log.extend(entries(range(25)))
+    log.close()
+
+    # Сбой посреди записи: строка без конца, манифест о ней не знает
+    with open(os.path.join(path, log.segments[-1]['file']), 'a') as f:
+        f.write('{"year": 25, "ev')
+
+    reopened = EventLog(path, segment_entries=10)
+    assert len(reopened) == 25
+    assert list(reopened.query()) == entries(range(25))
+
+    # Новая запись не склеивается с оборванной строкой
+    reopened.extend(entries([26, 27]))
+    reopened.close()
+    assert list(EventLog(path, segment_entries=10).query()) == entries(list(range(25)) + [26, 27])
+
+
+def test_recovers_entries_written_after_manifest(tmp_path):
+    path = str(tmp_path)
+    log = EventLog(path, segment_entries=100)
+    log.extend(entries(range(5)))
+    log.flush()
+    log.extend(entries(range(5, 12)))
+    # Процесс упал: данные дошли до файла, манифест - нет
+    log._file.flush()
+
+    reopened = EventLog(path, segment_entries=100)
+    assert len(reopened) == 12
+    assert list(reopened.query(10)) == entries([10, 11])
+
+
+def test_headless_run_archives_history(tmp_path):
+    path = str(tmp_path)
+    manager = DataManager(path)
+    manager.register('Alice', '1234')
+    manager.login('Alice', '1234')
+    manager.put_planet('planet_1', Planet('Home', 'terra', seed=1))
+    manager.save_current_user()
+    manager.close()
+
+    main(['--data', path, '--user', 'alice', '--years', '5000', '--save'])
+
+    manager = DataManager(path)
+    manager.login('Alice', '1234')
+    history = manager.user_data['planets']['planet_1']['history']
+    log = manager.open_event_log('planet_1')
+    archived = list(log.query())
+    assert len(archived) > len(history)
+    assert archived[-len(history):] == history
+    log.close()
+    manager.close()
@@ -0,0 +1,32 @@
+"""
+Monte Carlo: результат не зависит от числа процессов.
+"""
+
+import pytest
+
+from pocket_universe.montecarlo import main, run_monte_carlo
+
+
+def test_workers_give_identical_results():
+    # Куски считаются со своими зёрнами, поэтому один процесс и пул
+    # должны совпасть до последнего счётчика
+    args = dict(planet_type='terra', years=2000, trials=60, seed=4, chunk_size=7)
+    single = run_monte_carlo(workers=1, **args)
+    pooled = run_monte_carlo(workers=3, **args)
+    assert single.trials == 60
+    assert vars(single) == vars(pooled)
+
+
+@pytest.mark.parametrize('option', ['--trials', '--workers', '--chunk-size'])
+def test_cli_rejects_non_positive_counts(option, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([option, '0'])
+    assert exc.value.code == 2
+    assert 'must be at least 1' in capsys.readouterr().err
+
+
+def test_cli_rejects_negative_years(capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(['--years', '-5'])
+    assert exc.value.code == 2
+    assert 'must be at least 0' in capsys.readouterr().err
@@ -0,0 +1,201 @@
+"""
+Отложенная запись: схлопывание сохранений, атомарная замена файла,
+ошибки при закрытии и итоговое содержимое на диске.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from pocket_universe import DataManager, Planet, open_backend
+from pocket_universe import saver as saver_module
+from pocket_universe.saver import WriteBehindSaver, write_json_atomic
+
+
+class Writes:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path, data):
+        self.calls.append((path, data))
+
+
+def test_schedule_coalesces_within_delay():
+    write = Writes()
+    saver = WriteBehindSaver(write, delay=60)
+    for i in range(1000):
+        saver.schedule('a', {'n': i})
+        saver.schedule('b', {'n': -i})
+    assert write.calls == []
+    assert saver.pending('a') == {'n': 999}
+
+    saver.flush()
+    assert sorted(write.calls) == [('a', {'n': 999}), ('b', {'n': -999})]
+    assert (saver.requests, saver.writes) == (2000, 2)
+
+
+def test_background_writes_are_bounded_by_delay():
+    write = Writes()
+    delay = 0.05
+    saver = WriteBehindSaver(write, delay)
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < 0.5:
+        saver.schedule('a', i)
+        i += 1
+        time.sleep(0.001)
+    elapsed = time.monotonic() - start
+    saver.close()
+
+    # Не больше одной записи за окно, и последней на диск уходит последняя версия
+    assert 1 <= len(write.calls) <= elapsed / delay + 2
+    assert write.calls[-1] == ('a', i - 1)
+    assert saver.requests == i
+
+
+def test_atomic_write_replaces_whole_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'user.json')
+    order = []
+    real_fsync, real_replace = os.fsync, os.replace
+
+    def fsync(fd):
+        order.append('fsync')
+        real_fsync(fd)
+
+    def replace(src, dst):
+        order.append('replace')
+        assert os.path.dirname(src) == os.path.dirname(dst)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(saver_module.os, 'fsync', fsync)
+    monkeypatch.setattr(saver_module.os, 'replace', replace)
+    write_json_atomic(path, {'v': 1})
+    assert order == ['fsync', 'replace']
+    assert json.loads((tmp_path / 'user.json').read_text()) == {'v': 1}
+
+
+def test_failed_atomic_write_keeps_old_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'user.json')
+    write_json_atomic(path, {'v': 1})
+
+    def replace(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(saver_module.os, 'replace', replace)
+    with pytest.raises(OSError):
+        write_json_atomic(path, {'v': 2})
+    assert json.loads((tmp_path / 'user.json').read_text()) == {'v': 1}
+    assert os.listdir(tmp_path) == ['user.json']
+
+
+def test_crash_before_replace_keeps_previous_file(tmp_path):
+    # Процесс умирает между записью временного файла и os.replace:
+    # except в write_bytes_atomic уже не выполняется
+    path = str(tmp_path)
+    manager = DataManager(path, backend=open_backend('json', path))
+    assert manager.register('Alice', '1234')[0]
+    manager.close()
+    before = open_backend('json', path).load_user('Alice')
+
+    script = (
+        "import os, sys\n"
+        "from pocket_universe import DataManager, open_backend\n"
+        "os.replace = lambda src, dst: os._exit(3)\n"
+        "manager = DataManager(sys.argv[1], backend=open_backend('json', sys.argv[1]))\n"
+        "manager.login('Alice', '1234')\n"
+        "manager.user_data['divine_energy'] = 99\n"
+        "manager.save_current_user()\n"
+        "manager.flush()\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    crashed = subprocess.run([sys.executable, '-c', script, path], cwd=root)
+    assert crashed.returncode == 3
+    assert [name for _, _, files in os.walk(path) for name in files
+            if name.startswith('.tmp-')]
+
+    manager = DataManager(path, backend=open_backend('json', path))
+    assert manager.load_user('Alice') == before
+    assert manager.login('Alice', '1234')[0]
+    manager.user_data['divine_energy'] = 5
+    manager.save_current_user()
+    manager.close()
+    assert open_backend('json', path).load_user('Alice')['divine_energy'] == 5
+
+
+def test_close_raises_background_error():
+    def write(path, data):
+        raise OSError('read-only file system')
+
+    saver = WriteBehindSaver(write, delay=0.01)
+    saver.schedule('a', {})
+    deadline = time.monotonic() + 5
+    while not saver.errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saver.errors == 1
+
+    with pytest.raises(OSError, match='read-only'):
+        saver.close()
+    # Ошибка поднимается один раз
+    saver.close()
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_saved_user_reaches_disk(tmp_path, backend):
+    path = str(tmp_path)
+    manager = DataManager(path, save_delay=60, backend=open_backend(backend, path))
+    assert manager.register('Alice', '1234')[0]
+    assert manager.login('Alice', '1234')[0]
+
+    planet = Planet('Home', 'ocean', seed=3)
+    planet.advance(300)
+    manager.user_data['planets']['planet_1'] = planet.to_dict()
+    manager.user_data['divine_energy'] = 12.5
+    manager.save_current_user()
+    expected = json.loads(json.dumps(manager.user_data))
+    manager.close()
+
+    reopened = DataManager(path, backend=open_backend(backend, path))
+    assert reopened.load_user('Alice') == expected
+    reopened.close()
+    assert not [name for _, _, files in os.walk(path) for name in files
+                if name.startswith('.tmp-')]
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_login_builds_index_from_stored_summaries(tmp_path, backend):
+    path = str(tmp_path)
+    manager = DataManager(path, save_delay=60, backend=open_backend(backend, path))
+    manager.register('Alice', '1234')
+    manager.login('Alice', '1234')
+    for i in range(3):
+        planet = Planet(f"Planet {i}", 'desert', seed=i)
+        planet.advance(100 * i)
+        manager.put_planet(f"planet_{i}", planet)
+    manager.save_current_user()
+    manager.logout()
+
+    summaries = manager.backend.load_summaries('Alice')
+    assert sorted(summaries) == ['planet_0', 'planet_1', 'planet_2']
+    assert manager.login('Alice', '1234')[0]
+    planets = manager.user_data['planets']
+    for planet_id, summary in manager.planet_index.summaries.items():
+        assert (summary.age, summary.water, summary.last_modified) == (
+            planets[planet_id]['age'], planets[planet_id]['water'],
+            planets[planet_id]['modified'])
+    manager.close()
+
+
+def test_stale_json_summaries_are_ignored(tmp_path):
+    path = str(tmp_path)
+    backend = open_backend('json', path)
+    backend.write_user('Alice', {'planets': {'p': {'name': 'Old', 'age': 1}}})
+    filename = backend.load_index()['users']['Alice']
+    # Файл пользователя записан в обход сводок
+    write_json_atomic(backend.user_path(filename),
+                      {'planets': {'p': {'name': 'New', 'age': 2}}, 'pad': 'x' * 100})
+    assert backend.load_summaries('Alice') is None
+    backend.close()
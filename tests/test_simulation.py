@@ -0,0 +1,394 @@
+"""
+Свойства симуляции на фиксированных зёрнах: быстрые пути совпадают
+с эталонными — возраст, стадии и история точно, статы с точностью до
+округления float, население до единицы.
+"""
+
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from pocket_universe import (
+    DIVINE_POWERS, EVENT_TABLE, LIFE_STAGES, OFFLINE_PROGRESS, PLANET_TYPES, STATS, Planet,
+    StatRecorder,
+)
+from pocket_universe.replay import make_record, replay
+
+
+STATE = STATS + ('age', 'life_stage', 'population', 'shield')
+
+
+def stats(planet):
+    return tuple(getattr(planet, field) for field in STATE)
+
+
+def state(planet):
+    return stats(planet) + (planet.rng.getstate(),)
+
+
+def copy(planet):
+    return Planet.from_dict(json.loads(json.dumps(planet.to_dict())))
+
+
+def stage_by_conditions(planet):
+    # Прежняя цепочка if/elif по LIFE_STAGES
+    for i in range(len(LIFE_STAGES) - 1, -1, -1):
+        conditions = LIFE_STAGES[i]['min_conditions']
+        if all(getattr(planet, stat, 0) >= value for stat, value in conditions.items()):
+            return i
+    return 0
+
+
+def mean(planets, field):
+    return sum(getattr(p, field) for p in planets) / len(planets)
+
+
+def test_stage_resolver_matches_conditions():
+    rng = random.Random(3)
+    values = [-1, 0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 100]
+    planet = Planet('Stages')
+    for _ in range(20000):
+        # Скачки по порогам и их окрестностям и мелкие шаги между тиками
+        if rng.random() < 0.5:
+            for stat in STATS:
+                setattr(planet, stat, rng.choice(values) + rng.choice([0, 0, -1e-9, 1e-9, 0.5]))
+        else:
+            for stat in STATS:
+                setattr(planet, stat, getattr(planet, stat) + rng.uniform(-3, 3))
+        planet.update_life_stage()
+        assert planet.life_stage == stage_by_conditions(planet)
+
+
+@pytest.mark.parametrize('temperature, water', [
+    (150, 60),  # жара: биомасса гибнет, вода испаряется
+    (-30, 60),  # холод: биомасса гибнет
+    (50, 60),   # умеренно и влажно: рост
+    (50, 10),   # сухо: статы стоят
+])
+def test_drift_matches_ticks_without_events(monkeypatch, temperature, water):
+    # Без событий перемотка — та же арифметика, что и поштучные тики,
+    # в каждом режиме дрейфа
+    monkeypatch.setattr(EVENT_TABLE, 'sample_gap', lambda u: 10 ** 9)
+    monkeypatch.setattr(EVENT_TABLE, 'sample', lambda u: None)
+    for planet_type in PLANET_TYPES:
+        fast = Planet('Drift', planet_type)
+        fast.temperature = temperature
+        fast.water = water
+        fast.biomass = 8
+        slow = copy(fast)
+        fast.advance(700)
+        for _ in range(700):
+            slow.simulate_tick()
+        for field in ('water', 'oxygen', 'temperature', 'biomass'):
+            assert getattr(fast, field) == pytest.approx(getattr(slow, field), abs=1e-9)
+        assert (fast.age, fast.life_stage) == (slow.age, slow.life_stage)
+        assert fast.population == pytest.approx(slow.population, abs=1)
+        assert fast.history == slow.history
+
+
+def test_advance_matches_tick_distribution():
+    # Перемотка тянет промежутки и события иначе, чем тики, но по
+    # распределению совпадает: частота событий и средние статы по
+    # многим планетам
+    types = list(PLANET_TYPES)
+    fast = [Planet(f"Fast {i}", types[i % len(types)], seed=11 + i) for i in range(400)]
+    slow = [copy(planet) for planet in fast]
+    fast_events = sum(len(planet.advance(200)) for planet in fast)
+    slow_events = sum(1 for planet in slow for _ in range(200) if planet.simulate_tick())
+
+    assert fast_events == pytest.approx(slow_events, rel=0.05)
+    for field in ('water', 'oxygen', 'temperature', 'biomass'):
+        assert mean(fast, field) == pytest.approx(mean(slow, field), rel=0.1)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_chunked_advance_matches_single_call(seed):
+    rng = random.Random(seed)
+    whole = Planet('Chunks', rng.choice(list(PLANET_TYPES)), seed=seed)
+    chunked = copy(whole)
+    years = 0
+    while years < 5000:
+        step = rng.choice([0, 1, 2, 7, 40, 300])
+        chunked.advance(step)
+        years += step
+    whole.advance(years)
+    assert chunked.to_dict() == whole.to_dict()
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_replay_is_bit_exact(seed):
+    rng = random.Random(seed)
+    live = Planet('Replay', rng.choice(list(PLANET_TYPES)), seed=seed)
+    for _ in range(rng.randint(5, 100)):
+        live.advance(rng.choice([0, 1, 2, 5, 37, 400]))
+        if rng.random() < 0.2:
+            live.apply_divine_power(rng.choice(list(DIVINE_POWERS)))
+        if rng.random() < 0.1:
+            live = copy(live)
+    replayed = replay(json.loads(json.dumps(make_record(live))))
+    assert state(replayed) == state(live)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_tick_stepped_planet_replays(seed):
+    rng = random.Random(seed)
+    live = Planet('Ticks', rng.choice(list(PLANET_TYPES)), seed=seed)
+    for _ in range(rng.randint(5, 30)):
+        for _ in range(rng.choice([0, 1, 30, 120])):
+            live.simulate_tick()
+        if rng.random() < 0.3:
+            live.apply_divine_power(rng.choice(list(DIVINE_POWERS)))
+        if rng.random() < 0.1:
+            live = copy(live)
+    assert live.step_mode == 'tick'
+    replayed = replay(json.loads(json.dumps(make_record(live))))
+    assert state(replayed) == state(live)
+
+
+def test_mixed_step_modes_refuse_to_replay():
+    from pocket_universe.replay import ReplayError
+    from pocket_universe.snapshot import decode_planet, encode_planet
+
+    live = Planet('Mixed', 'terra', seed=3)
+    for _ in range(300):
+        live.simulate_tick()
+    live.apply_divine_power('rain')
+    live.advance(200)
+    assert live.step_mode == 'mixed'
+    # Способ шага переживает сохранение в обоих форматах
+    assert copy(live).step_mode == 'mixed'
+    assert decode_planet(encode_planet(live.to_dict()))['step_mode'] == 'mixed'
+    with pytest.raises(ReplayError):
+        replay(make_record(live))
+
+
+def test_batch_stepped_planet_replays():
+    pytest.importorskip('numpy')
+    from pocket_universe.batch import PlanetBatch
+
+    planets = [Planet(f"Batch {i}", 'terra', seed=100 + i) for i in range(10)]
+    batch = PlanetBatch(planets)
+    batch.run(200)
+    batch.write_back(planets)
+    for planet in planets:
+        planet.apply_divine_power('sunlight')
+    batch = PlanetBatch(planets)
+    batch.run(150)
+    batch.write_back(planets)
+    for planet in planets:
+        assert planet.step_mode == 'tick'
+        assert state(replay(make_record(planet))) == state(planet)
+
+
+def test_batch_matches_scalar():
+    np = pytest.importorskip('numpy')
+    from pocket_universe.batch import PlanetBatch
+
+    rng = random.Random(5)
+    planets = [Planet(f"Batch {i}", rng.choice(list(PLANET_TYPES)), seed=i) for i in range(100)]
+    for planet in planets:
+        planet.shield = rng.randint(0, 2)
+    scalar = [copy(planet) for planet in planets]
+
+    # Одни и те же равномерные числа: по одному на планету для пакета
+    # и как random.random() для скалярного тика
+    batch = PlanetBatch(planets)
+    draws = np.random.default_rng(7)
+    for _ in range(300):
+        row = draws.random(len(planets))
+        batch.step(row)
+        for planet, u in zip(scalar, row.tolist()):
+            planet.rng = SimpleNamespace(random=lambda: u)
+            planet.simulate_tick()
+    batch.write_back(planets)
+
+    assert [stats(p) for p in planets] == [stats(p) for p in scalar]
+
+
+def test_batch_draws_from_planet_streams():
+    pytest.importorskip('numpy')
+    from pocket_universe.batch import PlanetBatch
+
+    rng = random.Random(6)
+    planets = [Planet(f"Stream {i}", rng.choice(list(PLANET_TYPES)), seed=rng.getrandbits(64))
+               for i in range(100)]
+    for planet in planets:
+        planet.shield = rng.randint(0, 2)
+    scalar = [copy(planet) for planet in planets]
+
+    batch = PlanetBatch(planets)
+    batch.run(300)
+    batch.write_back(planets)
+    for planet in scalar:
+        for _ in range(300):
+            planet.simulate_tick()
+
+    assert [state(p) for p in planets] == [state(p) for p in scalar]
+
+
+def test_batch_write_back_keeps_history_and_recorder():
+    pytest.importorskip('numpy')
+    from pocket_universe.batch import PlanetBatch
+
+    planets = [Planet(f"Kept {i}", 'terra', seed=40 + i) for i in range(20)]
+    for planet in planets[::2]:
+        planet.recorder = StatRecorder()
+    for planet in planets:
+        planet.history_log = []
+    scalar = [copy(planet) for planet in planets]
+    for planet, twin in zip(planets, scalar):
+        twin.recorder = None if planet.recorder is None else StatRecorder()
+        twin.history_log = []
+
+    batch = PlanetBatch(planets)
+    batch.run(1500)
+    batch.write_back(planets)
+    batch.write_back(planets)
+    for planet in scalar:
+        for _ in range(1500):
+            planet.simulate_tick()
+
+    assert any(planet.history_log for planet in planets)
+    for planet, twin in zip(planets, scalar):
+        assert list(planet.history) == list(twin.history)
+        assert planet.history_log == twin.history_log
+        if twin.recorder is not None:
+            assert planet.recorder.to_bytes() == twin.recorder.to_bytes()
+
+
+def grown(seed):
+    planet = Planet('Grown', 'terra', seed=seed)
+    planet.advance(2000)
+    planet.apply_divine_power('rain')
+    planet.advance(500)
+    return planet
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_clone_leaves_parent_untouched(seed):
+    parent = grown(seed)
+    before = state(parent)
+    history = list(parent.history)
+
+    child = parent.clone()
+    assert child.history is parent.history
+    child.advance(3000)
+    assert child.apply_divine_power('shield')
+    child.advance(10)
+
+    assert state(parent) == before
+    assert list(parent.history) == history
+    assert child.history is not parent.history
+    assert list(child.history) != history
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_restore_brings_back_state_history_and_rng(seed):
+    planet = grown(seed)
+    snap = planet.snapshot()
+    before = state(planet)
+    history = list(planet.history)
+
+    planet.advance(3000)
+    planet.apply_divine_power('rain')
+    after = state(planet)
+    assert after != before
+    # Запись в историю после снимка не меняет сам снимок
+    assert list(snap[-1]) == history
+
+    planet.restore(snap)
+    assert state(planet) == before
+    assert planet.age == before[STATE.index('age')]
+    assert list(planet.history) == history
+    planet.advance(3000)
+    planet.apply_divine_power('rain')
+    assert state(planet) == after
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_catch_up_counts_evolutions_beyond_history_buffer(seed):
+    planet = Planet('Away', 'terra', seed=seed)
+    planet.last_simulated = 0
+    archive = []
+    planet.history_log = archive
+    summary = planet.catch_up(now=10000)
+
+    assert summary['evolutions'] == [h for h in archive if h['event'].startswith('Evolved')]
+    assert summary['evolutions']
+    assert len(archive) > planet.history.maxlen
+    assert planet.history_log is archive
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_catch_up_matches_advance(seed):
+    away = Planet('Away', 'terra', seed=seed)
+    stay = copy(away)
+    away.last_simulated = 1000.0
+    summary = away.catch_up(now=1000.0 + 3000)
+
+    start_stage = stay.life_stage
+    archive = stay.history_log = []
+    events = stay.advance(3000)
+    counts = {}
+    for event in events:
+        counts[event['name']] = counts.get(event['name'], 0) + 1
+
+    assert state(away) == state(stay)
+    assert list(away.history) == list(stay.history)
+    assert away.last_simulated == 4000.0
+    assert summary['years'] == 3000
+    assert summary['events'] == counts
+    assert sum(summary['events'].values()) == len(events)
+    assert (summary['from_stage'], summary['to_stage']) == (start_stage, stay.life_stage)
+    assert summary['evolutions'] == [h for h in archive if h['event'].startswith('Evolved')]
+
+
+def test_catch_up_caps_years_and_ignores_clock_skew():
+    planet = Planet('Capped', seed=1)
+    planet.last_simulated = 0
+    summary = planet.catch_up(now=10 ** 9)
+    assert summary['years'] == planet.age == OFFLINE_PROGRESS['max_years']
+
+    before = state(planet)
+    summary = planet.catch_up(now=planet.last_simulated - 500)
+    assert summary['years'] == 0 and summary['events'] == {} and summary['evolutions'] == []
+    assert state(planet) == before
+    assert planet.last_simulated == 10 ** 9
+
+
+def test_catch_up_keeps_fraction_and_never_moves_clock_back():
+    planet = Planet('Clock', seed=2)
+    planet.last_simulated = 100.0
+    # Полсекунды не теряются: два раза по 1.5 с — это три года
+    assert planet.catch_up(now=101.5)['years'] == 1
+    assert planet.last_simulated == 101.0
+    assert planet.catch_up(now=103.0)['years'] == 2
+    assert planet.last_simulated == 103.0
+
+    planet.catch_up(now=50.0)
+    assert planet.last_simulated == 103.0
+    assert planet.catch_up(now=104.0)['years'] == 1
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_catch_up_steps_match_catch_up(seed):
+    whole = Planet('Whole', 'terra', seed=seed)
+    whole.last_simulated = 0
+    steps = copy(whole)
+    expected = whole.catch_up(now=2500)
+
+    runner = steps.catch_up_steps(now=2500, chunk=300)
+    progress = []
+    while True:
+        try:
+            progress.append(next(runner))
+        except StopIteration as done:
+            summary = done.value
+            break
+
+    assert progress == list(range(300, 2500, 300))
+    assert summary == expected
+    assert state(steps) == state(whole)
+    assert steps.last_simulated == whole.last_simulated
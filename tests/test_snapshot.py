@@ -0,0 +1,81 @@
+"""
+Двоичный снимок планеты: обратимость кодирования и проверка формата.
+"""
+
+import random
+
+import pytest
+
+from pocket_universe import DIVINE_POWERS, PLANET_TYPES, Planet
+from pocket_universe.snapshot import (
+    HEADER, SnapshotError, PlanetSnapshot, decode_planet, encode_planet,
+    open_snapshot, save_snapshot,
+)
+
+
+def make_planet(seed):
+    rng = random.Random(seed)
+    planet = Planet(f"Снимок {seed}", rng.choice(list(PLANET_TYPES)), seed=seed)
+    for _ in range(rng.randint(0, 30)):
+        planet.advance(rng.choice([0, 1, 9, 120]))
+        if rng.random() < 0.3:
+            planet.apply_divine_power(rng.choice(list(DIVINE_POWERS)))
+    return planet
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_round_trip(seed):
+    data = make_planet(seed).to_dict()
+    assert decode_planet(encode_planet(data)) == data
+
+
+def test_fresh_planet_round_trip():
+    # Без опорной точки и расписания событий: флаги сброшены
+    data = Planet('Новая', seed=1).to_dict()
+    assert data['anchor'] is None and data['next_event'] is None
+    assert decode_planet(encode_planet(data)) == data
+
+
+def test_decoded_planet_continues_identically():
+    planet = make_planet(3)
+    restored = PlanetSnapshot(encode_planet(planet.to_dict())).to_planet()
+    planet.advance(500)
+    restored.advance(500)
+    assert restored.to_dict() == planet.to_dict()
+
+
+def test_open_snapshot_reads_stats_lazily(tmp_path):
+    planet = make_planet(5)
+    path = str(tmp_path / 'planet.pus')
+    save_snapshot(planet, path)
+    snapshot = open_snapshot(path)
+    assert snapshot._strings is None
+    assert (snapshot.age, snapshot.population) == (planet.age, planet.population)
+    assert snapshot._strings is None
+    assert snapshot.name == planet.name
+    assert snapshot.history == planet.to_dict()['history']
+
+
+def test_rejects_foreign_and_truncated_data():
+    raw = encode_planet(make_planet(1).to_dict())
+    with pytest.raises(SnapshotError):
+        PlanetSnapshot(raw[:HEADER.size - 1])
+    with pytest.raises(SnapshotError):
+        PlanetSnapshot(b'JUNK' + raw[4:])
+    with pytest.raises(SnapshotError):
+        PlanetSnapshot(raw[:4] + b'\xff\x00' + raw[6:])
+
+
+def test_modified_stamp_round_trips():
+    data = make_planet(2).to_dict()
+    data['modified'] = 1.7e9 + 0.25
+    assert decode_planet(encode_planet(data)) == data
+
+
+def test_oversized_fields_raise_value_error():
+    data = make_planet(4).to_dict()
+    with pytest.raises(ValueError, match='bytes'):
+        encode_planet(dict(data, name='x' * 0x10000))
+    data['history'] = [{'year': i, 'event': f"Event {i}"} for i in range(0x10000)]
+    with pytest.raises(ValueError, match='distinct strings'):
+        encode_planet(data)
@@ -0,0 +1,341 @@
+"""
+Хранилища: перенос данных прежних версий, имена без учёта регистра
+и кэш разобранных документов.
+"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from pocket_universe import DataManager, DocumentCache, Planet, open_backend
+
+
+# Таблица users до нормализованных имён: без folded, с индексом NOCASE
+LEGACY_USERS = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    pin_hash TEXT NOT NULL DEFAULT '',
+    created REAL,
+    divine_energy REAL NOT NULL DEFAULT 0,
+    total_planets INTEGER NOT NULL DEFAULT 0,
+    divine_uses INTEGER NOT NULL DEFAULT 0,
+    current_planet TEXT,
+    stats TEXT NOT NULL DEFAULT '{}',
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX users_username_nocase ON users (username COLLATE NOCASE);
+"""
+
+
+def test_json_index_without_folded_map(tmp_path):
+    path = str(tmp_path)
+    backend = open_backend('json', path)
+    backend.write_user('Alice', {'pin_hash': 'x', 'planets': {}})
+    with open(backend.index_file, 'r') as f:
+        index = json.load(f)
+    del index['folded']
+    with open(backend.index_file, 'w') as f:
+        json.dump(index, f)
+
+    reopened = open_backend('json', path)
+    assert reopened.find_user('ALICE') == 'Alice'
+    reopened.write_user('Bob', {'planets': {}})
+    assert open_backend('json', path).find_user('bob') == 'Bob'
+
+
+def test_sqlite_database_without_folded_column(tmp_path):
+    path = str(tmp_path)
+    conn = sqlite3.connect(os.path.join(path, 'pu_universe.db'))
+    conn.executescript(LEGACY_USERS)
+    conn.execute("INSERT INTO users (username, pin_hash) VALUES ('Ärger', 'x')")
+    conn.commit()
+    conn.close()
+
+    backend = open_backend('sqlite', path)
+    assert backend.find_user('ärger') == 'Ärger'
+    indexes = [row[1] for row in backend.conn.execute('PRAGMA index_list(users)')]
+    assert 'users_folded' in indexes and 'users_username_nocase' not in indexes
+    backend.close()
+
+    manager = DataManager(path, backend=open_backend('sqlite', path))
+    assert manager.register('Carol', '1234')[0]
+    assert not manager.register('CAROL', '1234')[0]
+    manager.close()
+
+
+def legacy_users():
+    planet = Planet('Home', 'ocean', seed=2)
+    planet.advance(200)
+    return {
+        'Alice': {'pin_hash': 'a', 'divine_energy': 7.5, 'achievements': ['first_planet'],
+                  'planets': {'planet_1': planet.to_dict()}, 'current_planet': 'planet_1',
+                  'stats': {'total_years': 200}},
+        'Bob': {'pin_hash': 'b', 'planets': {}, 'achievements': [], 'stats': {}},
+    }
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_monolithic_file_is_migrated_once(tmp_path, backend):
+    path = str(tmp_path)
+    users = legacy_users()
+    with open(os.path.join(path, 'pu_users.json'), 'w') as f:
+        json.dump({'users': users}, f)
+
+    manager = DataManager(path, backend=open_backend(backend, path))
+    assert not os.path.exists(os.path.join(path, 'pu_users.json'))
+    assert os.path.exists(os.path.join(path, 'pu_users.json.migrated'))
+    for username, data in users.items():
+        loaded = manager.load_user(username)
+        assert {key: loaded.get(key) for key in data} == json.loads(json.dumps(data))
+    manager.close()
+
+    # Повторный запуск не импортирует файл заново поверх новых данных
+    with open(os.path.join(path, 'pu_users.json'), 'w') as f:
+        json.dump({'users': {'Mallory': {'planets': {}}}}, f)
+    reopened = DataManager(path, backend=open_backend(backend, path))
+    assert reopened.load_user('Mallory') is None
+    reopened.close()
+
+
+def test_per_user_files_are_migrated_into_sqlite(tmp_path):
+    path = str(tmp_path)
+    files = open_backend('json', path)
+    files.write_users(legacy_users())
+
+    manager = DataManager(path, backend=open_backend('sqlite', path))
+    assert sorted(manager.backend.usernames()) == ['Alice', 'Bob']
+    assert manager.backend.find_user('alice') == 'Alice'
+    assert manager.load_user('Alice')['planets'] == files.load_user('Alice')['planets']
+    manager.close()
+
+
+def write(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def test_document_cache_hits_until_file_changes(tmp_path):
+    path = str(tmp_path / 'doc.json')
+    write(path, {'n': 1})
+    cache = DocumentCache()
+    first = cache.get(path, None)
+    assert cache.get(path, None) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Только mtime: размер и inode те же
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    assert cache.get(path, None) == {'n': 1}
+    assert cache.misses == 2
+
+    # Только размер: mtime возвращён прежним
+    st = os.stat(path)
+    write(path, {'n': 10})
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.get(path, None) == {'n': 10}
+    assert cache.misses == 3
+
+    # Только inode: замена файла тем же размером и mtime, как при os.replace
+    st = os.stat(path)
+    other = str(tmp_path / 'other.json')
+    write(other, {'n': 20})
+    os.utime(other, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(other, path)
+    assert os.stat(path).st_ino != st.st_ino
+    assert cache.get(path, None) == {'n': 20}
+    assert cache.misses == 4
+
+
+def test_same_size_external_edit_is_seen(tmp_path):
+    path = str(tmp_path / 'doc.json')
+    write(path, {'n': 1})
+    cache = DocumentCache()
+    assert cache.get(path, None) == {'n': 1}
+    size = os.path.getsize(path)
+
+    # Правка на месте: тот же inode и размер, новый mtime
+    st = os.stat(path)
+    write(path, {'n': 2})
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    assert (os.stat(path).st_ino, os.path.getsize(path)) == (st.st_ino, size)
+    assert cache.get(path, None) == {'n': 2}
+
+    # Редактор сохраняет через новый файл: новые inode и mtime, тот же размер
+    st = os.stat(path)
+    edited = str(tmp_path / 'edited.json')
+    write(edited, {'n': 3})
+    os.utime(edited, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    os.replace(edited, path)
+    assert os.path.getsize(path) == size
+    assert cache.get(path, None) == {'n': 3}
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # То же для индекса JsonBackend, который читается через кэш
+    backend = open_backend('json', str(tmp_path))
+    backend.write_user('Alice', {'planets': {}})
+    assert backend.find_user('alice') == 'Alice'
+    with open(backend.index_file, 'r') as f:
+        text = f.read()
+    st = os.stat(backend.index_file)
+    with open(backend.index_file, 'w') as f:
+        f.write(text.replace('Alice', 'Alina').replace('alice', 'alina'))
+    os.utime(backend.index_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    assert os.stat(backend.index_file).st_size == st.st_size
+    assert backend.find_user('alina') == 'Alina'
+    assert backend.find_user('alice') is None
+
+
+def test_document_cache_put_invalidate_and_missing_file(tmp_path):
+    path = str(tmp_path / 'doc.json')
+    write(path, {'n': 1})
+    cache = DocumentCache()
+    data = {'n': 1}
+    cache.put(path, data)
+    assert cache.get(path, None) is data
+    assert cache.stats() == {'hits': 1, 'misses': 0, 'entries': 1}
+
+    cache.invalidate(path)
+    assert cache.get(path, None) is not data
+    assert cache.misses == 1
+
+    os.remove(path)
+    assert cache.get(path, 'gone') == 'gone'
+    assert cache.stats()['entries'] == 0
+
+    with open(path, 'w') as f:
+        f.write('{broken')
+    assert cache.get(path, 'bad') == 'bad'
+    assert cache.stats()['entries'] == 0
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_failed_migration_keeps_legacy_file(tmp_path, monkeypatch, backend):
+    path = str(tmp_path)
+    users = legacy_users()
+    legacy = os.path.join(path, 'pu_users.json')
+    with open(legacy, 'w') as f:
+        json.dump({'users': users}, f)
+
+    store = open_backend(backend, path)
+    error = store.errors[0]
+
+    def failing(batch):
+        # Первый пользователь записан, на втором хранилище падает
+        first = next(iter(batch))
+        store.write_user(first, batch[first])
+        raise error("disk full")
+
+    monkeypatch.setattr(store, 'write_users', failing)
+    manager = DataManager(path, backend=store)
+    assert os.path.exists(legacy)
+    assert not os.path.exists(legacy + '.migrated')
+    assert not manager.import_json(legacy)
+    manager.close()
+
+    # Следующий запуск с исправным хранилищем переносит всё
+    manager = DataManager(path, backend=open_backend(backend, path))
+    assert os.path.exists(legacy + '.migrated')
+    assert sorted(manager.backend.usernames()) == sorted(users)
+    manager.close()
+
+
+def test_migration_checks_what_was_written(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    legacy = os.path.join(path, 'pu_users.json')
+    with open(legacy, 'w') as f:
+        json.dump({'users': legacy_users()}, f)
+
+    store = open_backend('json', path)
+    write_users = store.write_users
+    # Запись без ошибки, но без одного пользователя
+    monkeypatch.setattr(store, 'write_users', lambda batch: write_users(
+        {name: data for name, data in batch.items() if name != 'Bob'}))
+    DataManager(path, backend=store).close()
+    assert os.path.exists(legacy)
+
+
+def test_headless_run_without_save_does_not_migrate(tmp_path, capsys):
+    from pocket_universe.__main__ import main
+
+    path = str(tmp_path)
+    legacy = os.path.join(path, 'pu_users.json')
+    with open(legacy, 'w') as f:
+        json.dump({'users': legacy_users()}, f)
+    main(['--data', path, '--years', '5'])
+    assert os.path.exists(legacy)
+    assert not os.path.exists(legacy + '.migrated')
+    assert open_backend('json', path).is_empty()
+
+
+def legacy_database(path, usernames):
+    conn = sqlite3.connect(os.path.join(path, 'pu_universe.db'))
+    conn.executescript(LEGACY_USERS)
+    conn.executemany("INSERT INTO users (username, pin_hash) VALUES (?, 'x')",
+                     [(username,) for username in usernames])
+    conn.commit()
+    conn.close()
+
+
+def test_failed_schema_migration_is_redone_on_next_open(tmp_path, monkeypatch):
+    import pocket_universe.sqlite_backend as sqlite_backend
+
+    path = str(tmp_path)
+    legacy_database(path, ['Alice', 'Bob'])
+    calls = []
+
+    def failing(username):
+        calls.append(username)
+        if len(calls) > 1:
+            raise ValueError("interrupted")
+        return username.casefold()
+
+    monkeypatch.setattr(sqlite_backend, 'normalize_username', failing)
+    with pytest.raises(ValueError):
+        open_backend('sqlite', path)
+    monkeypatch.undo()
+
+    backend = open_backend('sqlite', path)
+    assert backend.find_user('ALICE') == 'Alice'
+    assert backend.find_user('bob') == 'Bob'
+    backend.close()
+
+
+def test_sqlite_reopens_in_wal_mode(tmp_path):
+    path = str(tmp_path)
+    backend = open_backend('sqlite', path)
+    backend.write_user('Alice', {'pin_hash': 'a', 'planets': {}})
+    # Второе соединение видит записанное, пока первое ещё открыто
+    other = open_backend('sqlite', path)
+    assert other.find_user('alice') == 'Alice'
+    other.close()
+    backend.close()
+
+    reopened = open_backend('sqlite', path)
+    assert reopened.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert reopened.load_user('Alice')['pin_hash'] == 'a'
+    reopened.write_user('Bob', {'planets': {}})
+    reopened.close()
+    assert open_backend('sqlite', path).usernames() == ['Alice', 'Bob']
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_lookup_by_folded_name(tmp_path, backend):
+    path = str(tmp_path)
+    store = open_backend(backend, path)
+    for username in ('Straße', 'Ärger', 'bob'):
+        store.write_user(username, {'planets': {}})
+    if backend == 'sqlite':
+        store.close()
+
+    store = open_backend(backend, path)
+    assert store.find_user('STRASSE') == 'Straße'
+    assert store.find_user('ärger') == 'Ärger'
+    assert store.find_user('BOB') == 'bob'
+    assert store.find_user('Strase') is None
+
+    manager = DataManager(path, backend=store)
+    assert not manager.register('strasse', '1234')[0]
+    manager.close()
@@ -0,0 +1,69 @@
+"""
+Списки планет без Kivy: пропуск пересборки при неизменном индексе и
+точечная замена строк в модели RecycleView.
+"""
+
+from types import SimpleNamespace
+
+from pocket_universe import ListState, Planet, PlanetIndex, apply_rows
+
+
+def planets():
+    result = {}
+    for i in range(5):
+        planet = Planet(f"World {i}", 'terra', seed=i)
+        planet.advance(100 * i)
+        result[f"planet_{i + 1}"] = planet.to_dict()
+    return result
+
+
+def rows(index):
+    # Те же данные, что кладёт в строку PlanetsScreen.refresh_list
+    return [{'text': f"{s.name}\n{s.get_life_stage_name()} | Age: {s.age}", 'row_id': s.id}
+            for s in index.query(sort='age', reverse=True)]
+
+
+def test_unchanged_index_skips_rebuild():
+    index = PlanetIndex(planets())
+    state = ListState()
+    assert state.changed(index, 'planet_1', 0, 'All stages', 0)
+    assert not state.changed(index, 'planet_1', 0, 'All stages', 0)
+
+    # Другая сортировка или фильтр - список собирается заново
+    assert state.changed(index, 'planet_1', 1, 'All stages', 0)
+    assert state.changed(index, 'planet_1', 1, 'All stages', 2)
+    assert not state.changed(index, 'planet_1', 1, 'All stages', 2)
+
+    # Изменился индекс: новая версия или новый объект после входа
+    index.update('planet_2', {'name': 'Renamed'})
+    assert state.changed(index, 'planet_1', 1, 'All stages', 2)
+    assert not state.changed(index, 'planet_1', 1, 'All stages', 2)
+    assert state.changed(PlanetIndex(planets()), 'planet_1', 1, 'All stages', 2)
+
+
+def test_one_changed_planet_replaces_one_row():
+    data = planets()
+    index = PlanetIndex(data)
+    rv = SimpleNamespace(data=[])
+    assert apply_rows(rv, rows(index)) == 5
+    before = list(rv.data)
+
+    planet = Planet.from_dict(data['planet_3'])
+    planet.advance(7)
+    index.update('planet_3', planet.to_dict())
+    assert apply_rows(rv, rows(index)) == 1
+
+    replaced = [i for i, (old, new) in enumerate(zip(before, rv.data)) if old is not new]
+    assert len(replaced) == 1
+    assert rv.data[replaced[0]]['row_id'] == 'planet_3'
+    assert apply_rows(rv, rows(index)) == 0
+
+
+def test_row_count_change_replaces_model():
+    index = PlanetIndex(planets())
+    rv = SimpleNamespace(data=[])
+    apply_rows(rv, rows(index))
+    model = rv.data
+    index.remove('planet_1')
+    assert apply_rows(rv, rows(index)) == 4
+    assert rv.data is not model and len(rv.data) == 4
@@ -0,0 +1,88 @@
+"""
+Запись статов: перемотка пишет те же корзины, что и пошаговая симуляция,
+а память и число точек ответа ограничены.
+"""
+
+import pytest
+
+from pocket_universe import EVENT_TABLE, Planet, StatRecorder
+from pocket_universe import planet as planet_module
+from pocket_universe.timeseries import Level
+
+
+LEVELS = [(1, 50), (10, 50), (100, 50)]
+
+
+def recorded(planet, steps):
+    planet.recorder = StatRecorder(LEVELS)
+    for years in steps:
+        planet.advance(years)
+    return planet.recorder
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_advance_matches_stepping(seed):
+    fast = recorded(Planet('Быстро', 'terra', seed=seed), [3000])
+    slow = recorded(Planet('Медленно', 'terra', seed=seed), [1] * 3000)
+    assert fast.last_year == slow.last_year == 3000
+    for a, b in zip(fast.levels, slow.levels):
+        assert list(a.keys) == list(b.keys)
+        assert list(a.counts) == list(b.counts)
+        for x, y in zip(a.sums, b.sums):
+            assert list(x) == pytest.approx(list(y))
+
+
+def test_query_picks_level_and_limits_points():
+    recorder = recorded(Planet('Запрос', seed=4), [3000])
+    # Последние 50 лет есть по годам, всё остальное - только по векам
+    recent = recorder.query(2960, 3000)
+    assert [point[0] for point in recent] == list(range(2960, 3001))
+    assert len(recorder.query(max_points=7)) <= 7
+    assert recorder.query(0, 3000, max_points=0) == []
+
+
+def test_quiet_advance_costs_buckets_not_years(monkeypatch):
+    # Без событий миллион лет - один отрезок дрейфа: суммы корзин берутся
+    # по формулам, а запись трогает только корзины, что останутся в кольцах
+    monkeypatch.setattr(EVENT_TABLE, 'sample_gap', lambda u: 10 ** 9)
+    adds, populations = [], []
+    add, population = Level.add, planet_module._population
+
+    def counted_add(self, year, values, count=1):
+        adds.append(count)
+        add(self, year, values, count)
+
+    def counted_population(life_stage, biomass):
+        populations.append(biomass)
+        return population(life_stage, biomass)
+
+    monkeypatch.setattr(Level, 'add', counted_add)
+    monkeypatch.setattr(planet_module, '_population', counted_population)
+    fast = recorded(Planet('Тихая', 'terra', seed=2), [1000000])
+    assert len(adds) <= sum(capacity for _, capacity in LEVELS) + len(LEVELS)
+    # Ни один записанный год не был затем вытеснен: лишней работы нет
+    assert sum(adds) == sum(sum(level.counts) for level in fast.levels)
+    # По годам считается только популяция, пока биомасса растёт до 100
+    assert len(populations) <= 100 / 0.1 + 10
+    monkeypatch.setattr(Level, 'add', add)
+    monkeypatch.setattr(planet_module, '_population', population)
+
+    # Корзины те же, что при пошаговой записи последних лет
+    slow = Planet('Тихая', 'terra', seed=2)
+    slow.advance(994000)
+    slow = recorded(slow, [1] * 6000)
+    assert fast.last_year == slow.last_year == 1000000
+    for a, b in zip(fast.levels, slow.levels):
+        assert list(a.keys) == list(b.keys)
+        assert list(a.counts) == list(b.counts)
+        for x, y in zip(a.sums, b.sums):
+            assert list(x) == pytest.approx(list(y))
+
+
+def test_bytes_round_trip():
+    recorder = recorded(Planet('Файл', seed=7), [500])
+    copy = StatRecorder.from_bytes(recorder.to_bytes())
+    assert copy.last_year == recorder.last_year
+    assert copy.query(max_points=1000) == recorder.query(max_points=1000)
+    with pytest.raises(ValueError):
+        StatRecorder.from_bytes(b'JUNK' + recorder.to_bytes()[4:])